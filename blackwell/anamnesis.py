@@ -5,13 +5,14 @@ from langchain_core.messages import AnyMessage, HumanMessage
 
 # LangGraph imports
 from langgraph.graph import StateGraph, add_messages, START, END
-from langgraph.checkpoint.memory import MemorySaver
 
 # Local imports
 from blackwell.config import fast_model
 from blackwell.prompts import anamnesis_prompt, document_analysis_prompt
 from blackwell.utils import get_available_docs
 from blackwell.document_processer import load_documents
+from blackwell.checkpointer import build_checkpointer
+from blackwell.registry import registry
 
 
 ##################### Graph Compiling Script #####################
@@ -79,20 +80,24 @@ def final_report(state: AnamnesisState) -> AnamnesisState:
     return state
 
 
-print("Compiling Anamnesis Agent...")
-workflow = StateGraph(AnamnesisState)
-memory = MemorySaver()
+def _build_anamnesis_agent():
+    # The graph and its checkpointer are built on first use (see blackwell.registry)
+    print("Compiling Anamnesis Agent...")
+    workflow = StateGraph(AnamnesisState)
 
-# Add nodes
-workflow.add_node("anamnesis", anamnesis)
-workflow.add_node("document", document_analysis)
-workflow.add_node("report", final_report)
+    # Add nodes
+    workflow.add_node("anamnesis", anamnesis)
+    workflow.add_node("document", document_analysis)
+    workflow.add_node("report", final_report)
 
-# Create edges
-workflow.add_conditional_edges("anamnesis", check_anamnesis_completion)
-workflow.add_conditional_edges(START, router)
-workflow.add_edge("document", "anamnesis")
-workflow.add_edge("report", END)
+    # Create edges
+    workflow.add_conditional_edges("anamnesis", check_anamnesis_completion)
+    workflow.add_conditional_edges(START, router)
+    workflow.add_edge("document", "anamnesis")
+    workflow.add_edge("report", END)
 
-# Compile the graph
-AnamnesisAgent = workflow.compile(checkpointer=memory)
+    # Compile the graph
+    return workflow.compile(checkpointer=build_checkpointer())
+
+
+AnamnesisAgent = registry.register("anamnesis_agent", _build_anamnesis_agent)
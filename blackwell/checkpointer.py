@@ -0,0 +1,214 @@
+"""
+Persistent LangGraph Checkpointer
+
+SQLite checkpoint saver for AnamnesisAgent and EvaluatorAgent, replacing MemorySaver so the
+checkpoints of past sessions do not accumulate in process memory. Storage and serialization
+are those of SqliteSaver (langgraph-checkpoint-sqlite); this module adds thread eviction so
+disk use stays bounded: threads unused for longer than a TTL are deleted, and the least
+recently used threads are evicted once more than a maximum number are stored.
+
+The web app runs the same compiled graphs synchronously (get_state) and asynchronously
+(astream_events, ainvoke), so the async methods run the SqliteSaver calls in a worker thread.
+
+Usage (from the project root):
+    python -m blackwell.checkpointer stats
+    python -m blackwell.checkpointer purge
+"""
+
+import os
+import time
+import sqlite3
+import asyncio
+import argparse
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from blackwell.config import logger, CHECKPOINTER, CHECKPOINT_PATH, CHECKPOINT_TTL, CHECKPOINT_MAX_THREADS
+
+
+class SQLiteCheckpointSaver(SqliteSaver):
+    """SqliteSaver with thread TTL and LRU eviction."""
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_threads: Optional[int] = None, **kwargs):
+        """
+        Open (or create) the checkpoint database.
+
+        Args:
+            path: Path to the SQLite file
+            ttl: Time (s) since its last use after which a thread is deleted (None never expires)
+            max_threads: Threads kept before the least recently used are evicted (None is unbounded)
+            kwargs: Passed to SqliteSaver (e.g. serde)
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(sqlite3.connect(path, check_same_thread=False), **kwargs)
+        self.path = path
+        self.ttl = ttl
+        self.max_threads = max_threads
+
+    def setup(self) -> None:
+        """Create the SqliteSaver tables and the table tracking the last use of each thread."""
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS threads_lru ON threads (last_access)")
+        self.conn.commit()
+
+    # Eviction
+
+    def _touch(self, thread_id: str) -> None:
+        # Record a use of the thread, a new thread evicts the expired and least recently used ones
+        now = time.time()
+        with self.cursor() as cur:
+            created = cur.execute("INSERT OR IGNORE INTO threads VALUES (?, ?, ?)", (thread_id, now, now)).rowcount
+            if not created:
+                cur.execute("UPDATE threads SET last_access = ? WHERE thread_id = ?", (now, thread_id))
+                return
+            evicted = []
+            if self.ttl is not None:
+                evicted += [row[0] for row in cur.execute(
+                    "SELECT thread_id FROM threads WHERE last_access <= ?", (now - self.ttl,)
+                ).fetchall()]
+            if self.max_threads is not None:
+                evicted += [row[0] for row in cur.execute(
+                    "SELECT thread_id FROM threads ORDER BY last_access DESC LIMIT -1 OFFSET ?", (self.max_threads,)
+                ).fetchall()]
+            for evicted_id in set(evicted):
+                self._delete(cur, evicted_id)
+        if evicted:
+            logger.info(f"Checkpointer: evicted {len(set(evicted))} threads")
+
+    @staticmethod
+    def _delete(cur: sqlite3.Cursor, thread_id: str) -> None:
+        for table in ("threads", "checkpoints", "writes"):
+            cur.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def purge_expired(self) -> int:
+        """
+        Delete the threads unused for longer than the TTL.
+
+        Returns:
+            Number of threads deleted
+        """
+        if self.ttl is None:
+            return 0
+        with self.cursor() as cur:
+            expired = [row[0] for row in cur.execute(
+                "SELECT thread_id FROM threads WHERE last_access <= ?", (time.time() - self.ttl,)
+            ).fetchall()]
+            for thread_id in expired:
+                self._delete(cur, thread_id)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of threads, checkpoints and pending writes stored, and the database size."""
+        with self.cursor(transaction=False) as cur:
+            counts = {
+                table: cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("threads", "checkpoints", "writes")
+            }
+        counts["size_bytes"] = os.path.getsize(self.path)
+        return counts
+
+    # SqliteSaver methods recording the use of their thread
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint of a config (the latest of its thread without a checkpoint_id)."""
+        checkpoint_tuple = super().get_tuple(config)
+        if checkpoint_tuple is not None:
+            self._touch(str(config["configurable"]["thread_id"]))
+        return checkpoint_tuple
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        """Store a checkpoint."""
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(str(config["configurable"]["thread_id"]))
+        return next_config
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint and write of a thread."""
+        with self.cursor() as cur:
+            self._delete(cur, str(thread_id))
+
+    # SqliteSaver calls are blocking, the async versions run them in a worker thread
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Async version of get_tuple."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        """Async version of list."""
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        """Async version of put."""
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        """Async version of put_writes."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async version of delete_thread."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+# Global checkpointer instance, shared by the agents (their thread ids are unique)
+_checkpointer: Optional[SQLiteCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> SQLiteCheckpointSaver:
+    """Get or create the global SQLite checkpointer."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = SQLiteCheckpointSaver(CHECKPOINT_PATH, ttl=CHECKPOINT_TTL, max_threads=CHECKPOINT_MAX_THREADS)
+            logger.info(f"Checkpointer opened at {CHECKPOINT_PATH}")
+    return _checkpointer
+
+
+def build_checkpointer() -> BaseCheckpointSaver:
+    """Checkpointer selected by CHECKPOINTER ("memory" or "sqlite") for compiling a graph."""
+    if CHECKPOINTER == "memory":
+        return MemorySaver()
+    if CHECKPOINTER == "sqlite":
+        return get_checkpointer()
+    raise ValueError(f"Unknown checkpointer '{CHECKPOINTER}', choose 'memory' or 'sqlite'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or purge the checkpoint database.")
+    parser.add_argument("command", choices=["stats", "purge"])
+    args = parser.parse_args()
+
+    checkpointer = get_checkpointer()
+    if args.command == "stats":
+        print(checkpointer.stats())
+    else:
+        print(f"Purged {checkpointer.purge_expired()} expired threads")
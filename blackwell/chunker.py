@@ -0,0 +1,164 @@
+"""
+Offset-based Text Chunker
+
+A single-pass alternative to LangChain's RecursiveCharacterTextSplitter. Separator offsets
+are computed once per document and chunks are produced as (start, end) spans over the
+original text, so no intermediate strings are copied while splitting. The chunk_size and
+chunk_overlap semantics follow RecursiveCharacterTextSplitter: chunks never exceed
+chunk_size, break at the coarsest separator available ("\\n\\n", then "\\n", then " ") and
+overlap by whole pieces of at most chunk_overlap.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " "]
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def regex_token_offsets(text: str) -> List[int]:
+    """Approximate tokenization (words and punctuation), returning each token's start offset."""
+    return [match.start() for match in _TOKEN_PATTERN.finditer(text)]
+
+
+def tiktoken_offsets(encoding_name: str = "cl100k_base") -> Callable[[str], List[int]]:
+    """
+    Build a token offset function from a tiktoken encoding (requires the tiktoken package).
+
+    Args:
+        encoding_name: Name of the tiktoken encoding
+
+    Returns:
+        Function mapping a text to the start offset of each of its tokens
+    """
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise ImportError("Token sizing with tiktoken requires `pip install tiktoken`.") from e
+
+    encoding = tiktoken.get_encoding(encoding_name)
+
+    def offsets(text: str) -> List[int]:
+        _, token_offsets = encoding.decode_with_offsets(encoding.encode(text))
+        return token_offsets
+
+    return offsets
+
+
+def _separator_offsets(text: str, separators: Sequence[str]) -> List[List[int]]:
+    """Precompute the start offset of every separator occurrence, one sorted list per separator."""
+    return [[m.start() for m in re.finditer(re.escape(sep), text)] for sep in separators]
+
+
+def iter_chunk_spans(
+    text: str,
+    chunk_size: int = 1536,
+    chunk_overlap: int = 256,
+    separators: Optional[Sequence[str]] = None,
+    token_offsets: Optional[Callable[[str], Sequence[int]]] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Split a text into overlapping chunks in a single pass, yielding (start, end) spans.
+
+    Args:
+        text: The text to split
+        chunk_size: Maximum size of each chunk (characters, or tokens if token_offsets is given)
+        chunk_overlap: Maximum overlap between consecutive chunks (same unit as chunk_size)
+        separators: Break points in order of preference (default: paragraphs, lines, words)
+        token_offsets: Optional function returning the start offset of each token of the text,
+                       enabling token-based sizing
+
+    Yields:
+        (start, end) offsets of each chunk, with surrounding whitespace excluded
+    """
+    if chunk_overlap > chunk_size:
+        raise ValueError(f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller.")
+
+    n = len(text)
+    boundaries = _separator_offsets(text, separators or DEFAULT_SEPARATORS)
+    tokens = list(token_offsets(text)) if token_offsets is not None else None
+
+    def forward(pos: int, size: int) -> int:
+        # Offset reached by moving `size` units forward from pos
+        if tokens is None:
+            return pos + size
+        idx = bisect_left(tokens, pos) + size
+        return tokens[idx] if idx < len(tokens) else n
+
+    def backward(pos: int, size: int) -> int:
+        # Offset reached by moving `size` units back from pos
+        if tokens is None:
+            return pos - size
+        idx = bisect_left(tokens, pos) - size
+        return tokens[idx] if idx >= 0 and tokens else 0
+
+    start = prev_end = 0
+    while start < n:
+        limit = forward(start, chunk_size)
+        level = None
+        if limit >= n:
+            end = n
+        else:
+            # Break at the last occurrence of the coarsest separator within the window,
+            # past the previous chunk's end so overlapping chunks always make progress
+            end = limit
+            for i, offsets in enumerate(boundaries):
+                idx = bisect_right(offsets, limit) - 1
+                if idx >= 0 and offsets[idx] > max(start, prev_end):
+                    end, level = offsets[idx], i
+                    break
+
+        # Trim surrounding whitespace without copying the text
+        span_start, span_end = start, end
+        while span_start < span_end and text[span_start].isspace():
+            span_start += 1
+        while span_end > span_start and text[span_end - 1].isspace():
+            span_end -= 1
+        if span_start < span_end:
+            yield span_start, span_end
+
+        if end >= n:
+            break
+
+        # Next chunk starts at the first break of the same level inside the overlap window
+        target = max(backward(end, chunk_overlap), span_start + 1)
+        prev_end = end
+        if level is None:
+            start = target if chunk_overlap > 0 else end
+        else:
+            offsets = boundaries[level]
+            idx = bisect_left(offsets, target)
+            start = offsets[idx] if idx < len(offsets) and offsets[idx] < end else end
+
+
+def split_documents(
+    documents: List[Document],
+    chunk_size: int = 1536,
+    chunk_overlap: int = 256,
+    separators: Optional[Sequence[str]] = None,
+    token_offsets: Optional[Callable[[str], Sequence[int]]] = None,
+) -> List[Document]:
+    """
+    Split documents into chunks using offset spans, copying each document's metadata.
+
+    Args:
+        documents: List of documents to split
+        chunk_size: Maximum size of each chunk
+        chunk_overlap: Maximum overlap between consecutive chunks
+        separators: Break points in order of preference
+        token_offsets: Optional function enabling token-based sizing
+
+    Returns:
+        List of document chunks
+    """
+    chunks = []
+    for doc in documents:
+        text = doc.page_content
+        for start, end in iter_chunk_spans(text, chunk_size, chunk_overlap, separators, token_offsets):
+            chunks.append(Document(page_content=text[start:end], metadata=dict(doc.metadata)))
+
+    return chunks
@@ -1,20 +1,80 @@
-from langchain_ollama import ChatOllama
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
+import os
 import logging
 
+from blackwell.registry import registry
+from blackwell.rate_limiter import rate_limited
+from blackwell.llm_cache import get_llm_cache
+from blackwell.prompt_cache import PromptCache, with_prompt_cache
+from blackwell.prompts import STATIC_PROMPTS
+
 ############### CONFIG FLAGS ############
 LOCAL_LLMS = False  # Set to True to use local LLMs (Ollama) instead of Gemini
 DB_PATH = "database/blackwell"  # Path to the database
 DB_COLLECTION = "medline_vector_store"  # Collection name in the database
 DATA_FOLDER = "data/"  # Folder containing data files
 QUOTA_AGENT_LIMIT = "2-15"
-QUOTA_RATE = 10  # RPM rate limit for Gemini API calls
+MODEL_RATE_LIMITS = {  # Requests (rpm) and tokens (tpm) per minute allowed for each Gemini model
+    "fast_model": {"rpm": 10, "tpm": 250000},
+    "pro_model": {"rpm": 5, "tpm": 250000},
+    "agent_model": {"rpm": 10, "tpm": 250000},
+}
+QUOTA_BACKOFF = 15  # Initial wait (s) after a quota error, doubled on consecutive errors
+RETRY_MAX_ATTEMPTS = 3  # Attempts of a graph node (first run included) before its error fails the evaluation
+RETRY_INITIAL_INTERVAL = 2.0  # Wait (s) before retrying a node after a parse or empty references error
+RETRY_BACKOFF_FACTOR = 2.0  # Multiplier of the retry wait after each failed attempt (with jitter)
+RETRY_MAX_INTERVAL = 120.0  # Upper bound (s) of the retry wait
+FINAL_REPORT_ROUTING = "pro"  # Final report model: "pro" (always pro_model), "fast" (always fast_model) or "confidence" (opt-in, see routing_benchmark)
+ROUTING_FAST_THRESHOLD = 0.8  # Confidence score from which fast_model writes the final report ("confidence" routing)
+ROUTING_CONFIDENCE_SCORES = {"high": 1.0, "moderate": 0.6, "low": 0.2}  # Score of the certainty expert's confidence levels
+ROUTING_RED_FLAG_PENALTY = 0.25  # Score removed for each red flag listed by the certainty expert
+CONTEXT_COMPACTION_ENABLED = True  # Compact oversized research reports before the treatment and final report calls
+CONTEXT_TOKEN_BUDGET = 30000  # Estimated prompt tokens allowed for the inputs of those calls
+COMPACTION_MIN_TOKENS = 2000  # Research reports at or below this size are never compacted
+PROMPT_CACHE_ENABLED = True  # Register the static system prompts as Gemini cached content
+PROMPT_CACHE_TTL = 3600  # Lifetime (s) of a cached prompt on the Gemini API, renewed on use after expiry
+OLLAMA_KEEP_ALIVE = "30m"  # Time Ollama keeps a model (and its prompt KV cache) loaded after a call
+LLM_CACHE_ENABLED = False  # Replay identical fast_model/pro_model calls from an on-disk cache
+LLM_CACHE_PATH = "database/llm_cache.sqlite"  # Path to the LLM response cache database
+LLM_CACHE_TTL = 7 * 24 * 3600  # Time (s) a cached response is replayed before it expires
+LLM_CACHE_MAX_ENTRIES = 20000  # Cached responses kept before the least recently used are evicted
+CHECKPOINTER = "sqlite"  # "sqlite" (persistent, evicting) or "memory" (MemorySaver, grows with every session)
+CHECKPOINT_PATH = "database/checkpoints.sqlite"  # Path to the checkpoint database
+CHECKPOINT_TTL = 24 * 3600  # Time (s) since its last use after which a chat or evaluation thread is deleted
+CHECKPOINT_MAX_THREADS = 1000  # Threads kept before the least recently used are evicted
+TELEMETRY_EXPORT_PATH = "evaluation/telemetry.jsonl"  # JSON lines file receiving the spans of each evaluation (None disables)
+WARMUP_ON_STARTUP = True  # Build the models, vector stores and graphs in the background when the web server starts
+CHUNKING_METHOD = "offset"  # "offset" (single-pass chunker) or "recursive" (LangChain splitter)
+DEDUP_ENABLED = True  # Skip near-duplicate chunks before embedding them
+DEDUP_THRESHOLD = 0.9  # Estimated Jaccard similarity from which two chunks are duplicates
+DEDUP_MODE = "merge"  # "skip" drops duplicates, "merge" records their sources on the kept chunk
+HTTP_CACHE_ENABLED = True  # Cache crawled pages and their extracted text on disk
+HTTP_CACHE_PATH = "database/http_cache.sqlite"  # Path to the HTTP cache database
+HTTP_CACHE_DEFAULT_TTL = 3600  # Freshness (s) of pages sent without Cache-Control/Expires/Last-Modified
+CRAWL_DEADLINE = 30  # Total time budget (s) of one web_crawl_medline call
+CRAWL_PER_DOMAIN_LIMIT = 2  # Maximum concurrent requests per website
+CRAWL_MAX_WORKERS = 8  # Maximum concurrent requests (and pooled connections) overall
+CRAWL_MIN_INTERVAL = 0.5  # Minimum time (s) between two requests to the same website
+CRAWL_STATS_WINDOW = 20  # Number of recent requests per website kept for error/latency statistics
+CRAWL_BREAKER_ERROR_RATE = 0.5  # Error rate over the window that opens a website's circuit breaker
+CRAWL_BREAKER_MIN_REQUESTS = 4  # Requests in the window before the error rate is considered
+CRAWL_BREAKER_CONSECUTIVE_FAILURES = 2  # Consecutive failures that open the breaker right away
+CRAWL_BREAKER_COOLDOWN = 120  # Time (s) requests to an unhealthy website fail fast before a trial request
+CRAWL_SNAPSHOT_MODE = None  # None (live web), "record" (archive every response) or "replay" (serve the archive)
+CRAWL_SNAPSHOT_PATH = "database/crawl_snapshots.warc.gz"  # Path to the crawl snapshot archive
+CRAWL_SNAPSHOT_SERVER = None  # URL of a running stand-in server for replay (None starts one in-process)
+MAX_PAGE_BYTES = 2 * 2**20  # Maximum bytes downloaded per crawled page
+HTML_EXTRACTION_BACKEND = "lxml"  # "lxml" (single-pass, needs the crawl extra, else falls back to bs4) or "bs4" (BeautifulSoup html.parser)
+WEB_KB_ENABLED = False  # Index crawled pages into a secondary collection searched by retrieve_documents (embeds every crawled page)
+WEB_KB_COLLECTION = "web_knowledge_base"  # Collection name of the crawled pages
+WEB_KB_TTL = 30 * 24 * 3600  # Time (s) an indexed page is used before it must be crawled again
 #########################################
+# The log file is opened by the first record, not on import. Its path is resolved from the
+# package location, so scripts run from any directory log to the project's evaluation folder
+LOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "evaluation", "blackwell.log")
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s',
-                    filename='evaluation/blackwell.log',
-                    filemode='a')
+                    handlers=[logging.FileHandler(LOG_PATH, mode='a', delay=True)])
 logger = logging.getLogger("blackwell")
 ACCEPTED_EXTENSIONS = [
     "pdf",
@@ -25,47 +85,84 @@ ACCEPTED_EXTENSIONS = [
 
 load_dotenv()
 
-# Gemini LLM
-if LOCAL_LLMS:
-    # Ollama LLM
-    fast_model = ChatOllama(
-        model="qwen3:4b",
-        temperature=0,
-        max_tokens=128000,
-        streaming=True,
-        callbacks=[],
-    )
+# Opt-in response cache shared by fast_model and pro_model (None leaves the models uncached)
+llm_cache = get_llm_cache(LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES) if LLM_CACHE_ENABLED else None
+
+# Static system prompts go through the provider prompt cache. The agents keep their prompts
+# inline: Gemini refuses tools next to cached content, they rely on its implicit prefix caching
+prompt_cache = PromptCache(PROMPT_CACHE_TTL) if PROMPT_CACHE_ENABLED and not LOCAL_LLMS else None  # Ollama: prefix ordering only
 
-else:
-    fast_model = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.1,
-        max_tokens=900000,
-        timeout=None,
-        max_retries=1,
-    )
 
-    pro_model = ChatGoogleGenerativeAI(
+# Model clients are built on first use (see blackwell.registry), the provider packages are
+# imported by their factories
+def _build_fast_model():
+    if LOCAL_LLMS:
+        # Ollama LLM
+        from langchain_ollama import ChatOllama
+        model = ChatOllama(
+            model="qwen3:4b",
+            temperature=0,
+            max_tokens=128000,
+            streaming=True,
+            callbacks=[],
+            cache=llm_cache,
+            keep_alive=OLLAMA_KEEP_ALIVE,
+        )
+    else:
+        # Gemini LLM
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        model = ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
+            temperature=0.1,
+            max_tokens=900000,
+            timeout=None,
+            max_retries=1,
+            cache=llm_cache,
+            **rate_limited("fast_model", backoff=QUOTA_BACKOFF, **MODEL_RATE_LIMITS["fast_model"]),
+        )
+    return with_prompt_cache(model, prompt_cache, STATIC_PROMPTS) if PROMPT_CACHE_ENABLED else model
+
+
+def _build_pro_model():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    model = ChatGoogleGenerativeAI(
         model="gemini-2.5-pro",
         temperature=0,
         max_tokens=900000,
         timeout=None,
         max_retries=1,
+        cache=llm_cache,
+        **rate_limited("pro_model", backoff=QUOTA_BACKOFF, **MODEL_RATE_LIMITS["pro_model"]),
     )
+    return with_prompt_cache(model, prompt_cache, STATIC_PROMPTS) if PROMPT_CACHE_ENABLED else model
+
 
-    agent_model = ChatGoogleGenerativeAI(
+def _build_agent_model():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
         model="gemini-2.5-flash",
         temperature=0.2,
         max_tokens=900000,
         timeout=None,
         max_retries=1,
+        **rate_limited("agent_model", backoff=QUOTA_BACKOFF, **MODEL_RATE_LIMITS["agent_model"]),
     )
 
-# Gemini Embeddings
-embeddings_model = GoogleGenerativeAIEmbeddings(
-    model="models/gemini-embedding-001",
-    temperature=0,
-    max_tokens=2048,
-    max_retries=2,
-    timeout=None,
-)
\ No newline at end of file
+
+def _build_embeddings_model():
+    # Gemini Embeddings
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    return GoogleGenerativeAIEmbeddings(
+        model="models/gemini-embedding-001",
+        temperature=0,
+        max_tokens=2048,
+        max_retries=2,
+        timeout=None,
+    )
+
+
+fast_model = registry.register("fast_model", _build_fast_model)
+if not LOCAL_LLMS:
+    pro_model = registry.register("pro_model", _build_pro_model)
+    agent_model = registry.register("agent_model", _build_agent_model)
+embeddings_model = registry.register("embeddings_model", _build_embeddings_model)
@@ -0,0 +1,313 @@
+"""
+Crawl Snapshot Store
+
+Record/replay of the HTTP responses behind fetch_medical_website_content, so crawl-heavy
+evaluation runs and benchmarks are reproducible and work without network access.
+
+Responses are archived as WARC/1.1 response records, each compressed as its own gzip
+member so the archive can be appended to. In "record" mode the shared crawl session stores
+every response it receives; in "replay" mode its requests are rewritten to a local stand-in
+server (SnapshotServer) that serves the archived responses at /<original-url>. The HTTP
+cache is bypassed while recording, so cached pages are archived too. The same archive can
+pre-warm the HTTP cache of a deployment (prewarm_cache).
+
+Usage (from the project root):
+    python -m blackwell.crawl_snapshots record archive.warc.gz https://medlineplus.gov/flu.html
+    python -m blackwell.crawl_snapshots serve archive.warc.gz --port 8765
+    python -m blackwell.crawl_snapshots prewarm archive.warc.gz
+"""
+
+import os
+import gzip
+import uuid
+import argparse
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional
+from urllib.parse import urljoin
+
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from blackwell.config import logger, CRAWL_SNAPSHOT_PATH
+from blackwell.http_cache import HttpCache, get_http_cache, hash_content
+from blackwell.html_extraction import get_extractor
+
+# Headers describing the transfer rather than the content: bodies are stored decoded
+_TRANSFER_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive'}
+
+
+@dataclass
+class SnapshotRecord:
+    """An archived HTTP response."""
+    url: str
+    status: int
+    reason: str
+    headers: CaseInsensitiveDict
+    body: bytes
+    date: str = field(default_factory=lambda: datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"))
+
+    def to_warc(self) -> bytes:
+        """Serialize the response as a WARC/1.1 response record."""
+        http_head = f"HTTP/1.1 {self.status} {self.reason}\r\n"
+        http_head += "".join(f"{name}: {value}\r\n" for name, value in self.headers.items())
+        block = http_head.encode("latin-1", "replace") + b"\r\n" + self.body
+        warc_head = (
+            "WARC/1.1\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {self.date}\r\n"
+            f"WARC-Target-URI: {self.url}\r\n"
+            "Content-Type: application/http; msgtype=response\r\n"
+            f"Content-Length: {len(block)}\r\n"
+            "\r\n"
+        )
+        return warc_head.encode("utf-8") + block + b"\r\n\r\n"
+
+
+def _parse_http_block(url: str, date: str, block: bytes) -> SnapshotRecord:
+    head, _, body = block.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    _, status, reason = (lines[0].split(" ", 2) + [""])[:3]
+    headers = CaseInsensitiveDict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+    return SnapshotRecord(url=url, status=int(status), reason=reason, headers=headers, body=body, date=date)
+
+
+class SnapshotArchive:
+    """Append-only archive of gzip-compressed WARC response records."""
+
+    def __init__(self, path: str = CRAWL_SNAPSHOT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record: SnapshotRecord) -> None:
+        """Add a response to the archive (one gzip member per record)."""
+        data = gzip.compress(record.to_warc())
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(data)
+
+    def __iter__(self) -> Iterator[SnapshotRecord]:
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, "rb") as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                if not line.startswith(b"WARC/"):
+                    continue
+                fields = {}
+                line = f.readline()
+                while line not in (b"\r\n", b""):
+                    name, _, value = line.decode("utf-8").partition(":")
+                    fields[name.strip().lower()] = value.strip()
+                    line = f.readline()
+                block = f.read(int(fields["content-length"]))
+                f.read(4)  # Record separator
+                if fields.get("warc-type") == "response":
+                    yield _parse_http_block(fields["warc-target-uri"], fields.get("warc-date", ""), block)
+
+    def load(self) -> Dict[str, SnapshotRecord]:
+        """Index the archive by URL, keeping the most recent 200 response of each (else the most recent one)."""
+        records: Dict[str, SnapshotRecord] = {}
+        for record in self:
+            previous = records.get(record.url)
+            if previous is None or record.status == 200 or previous.status != 200:
+                records[record.url] = record
+        return records
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter that archives every response it receives (HTML bodies only, no 304s)."""
+
+    def __init__(self, archive: SnapshotArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 304:
+            return response  # Revalidations carry no body and would hide the archived page
+        if "html" in response.headers.get("Content-Type", "text/html"):
+            body = response.content  # Read the whole body, streaming callers then iterate over it
+        else:
+            body = b""  # The crawler rejects non-HTML responses from their headers alone
+        headers = CaseInsensitiveDict(
+            (name, value) for name, value in response.headers.items() if name.lower() not in _TRANSFER_HEADERS
+        )
+        if "Location" in headers:
+            # Absolute redirects keep working when replayed from the stand-in server
+            headers["Location"] = urljoin(request.url, headers["Location"])
+        self.archive.append(SnapshotRecord(
+            url=request.url, status=response.status_code, reason=response.reason or "",
+            headers=headers, body=body,
+        ))
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter that sends every request to a stand-in server instead of the web."""
+
+    def __init__(self, server_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.server_url = server_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        if not request.url.startswith(self.server_url + "/"):
+            request.url = f"{self.server_url}/{request.url}"
+        return super().send(request, **kwargs)
+
+
+class _SnapshotHandler(BaseHTTPRequestHandler):
+    records: Dict[str, SnapshotRecord] = {}
+
+    def log_message(self, format, *args):
+        logger.debug(f"Snapshot server: {format % args}")
+
+    def do_GET(self):
+        record = self.records.get(self.path[1:])
+        if record is None:
+            self.send_response(404)
+            self.send_header("X-Snapshot-Miss", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = record.headers.get("ETag")
+        if etag and self.headers.get("If-None-Match") == etag and record.status == 200:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(record.status, record.reason)
+        for name, value in record.headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(record.body)))
+        self.end_headers()
+        self.wfile.write(record.body)
+
+
+class SnapshotServer:
+    """Local HTTP stand-in serving archived responses at /<original-url>."""
+
+    def __init__(self, archive: SnapshotArchive, host: str = "127.0.0.1", port: int = 0):
+        """
+        Load the archive and bind the server.
+
+        Args:
+            archive: The snapshot archive to serve
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+        """
+        handler = type("SnapshotHandler", (_SnapshotHandler,), {"records": archive.load()})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        logger.info(f"Snapshot server loaded {len(handler.records)} responses from {archive.path}")
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SnapshotServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="snapshot-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the current thread (blocking)."""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def snapshot_adapter(mode: str, path: str = CRAWL_SNAPSHOT_PATH, server_url: Optional[str] = None,
+                     **adapter_kwargs) -> HTTPAdapter:
+    """
+    Create the transport adapter of a snapshot mode for the crawl session.
+
+    Args:
+        mode: "record" or "replay"
+        path: Path to the snapshot archive
+        server_url: Stand-in server to replay from (None starts one in-process)
+        adapter_kwargs: Connection pool settings passed to HTTPAdapter
+
+    Returns:
+        A RecordingAdapter or a ReplayAdapter
+    """
+    archive = SnapshotArchive(path)
+    if mode == "record":
+        logger.info(f"Recording crawl responses into {path}")
+        return RecordingAdapter(archive, **adapter_kwargs)
+    if mode == "replay":
+        server_url = server_url or SnapshotServer(archive).start().url
+        logger.info(f"Replaying crawl responses from {server_url}")
+        return ReplayAdapter(server_url, **adapter_kwargs)
+    raise ValueError(f"Unknown snapshot mode '{mode}', choose 'record' or 'replay'")
+
+
+def prewarm_cache(path: str = CRAWL_SNAPSHOT_PATH, cache: Optional[HttpCache] = None) -> int:
+    """
+    Extract the archived HTML pages into the HTTP cache.
+
+    Args:
+        path: Path to the snapshot archive
+        cache: The cache to fill (defaults to get_http_cache())
+
+    Returns:
+        Number of pages stored
+    """
+    cache = cache or get_http_cache()
+    extract = get_extractor()
+    stored = 0
+    for url, record in SnapshotArchive(path).load().items():
+        content_type = record.headers.get("Content-Type", "text/html")
+        if record.status != 200 or "html" not in content_type:
+            continue
+        cache.store(url, record.headers, hash_content(record.body), extract(record.body, url))
+        stored += 1
+    logger.info(f"Pre-warmed the HTTP cache with {stored} pages from {path}")
+    return stored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record, serve or pre-warm crawl snapshots.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Fetch URLs and archive their responses")
+    record_parser.add_argument("archive")
+    record_parser.add_argument("urls", nargs="+")
+    serve_parser = subparsers.add_parser("serve", help="Serve an archive as a stand-in server")
+    serve_parser.add_argument("archive")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    prewarm_parser = subparsers.add_parser("prewarm", help="Fill the HTTP cache from an archive")
+    prewarm_parser.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        import requests
+        from blackwell.utils import BROWSER_HEADERS
+
+        session = requests.Session()
+        session.headers.update(BROWSER_HEADERS)
+        adapter = RecordingAdapter(SnapshotArchive(args.archive))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        for url in args.urls:
+            response = session.get(url, timeout=15)
+            print(f"{response.status_code} {url}")
+    elif args.command == "serve":
+        server = SnapshotServer(SnapshotArchive(args.archive), host=args.host, port=args.port)
+        print(f"Serving {args.archive} at {server.url}/<original-url>")
+        server.serve_forever()
+    else:
+        print(f"Stored {prewarm_cache(args.archive)} pages")
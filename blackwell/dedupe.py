@@ -0,0 +1,162 @@
+"""
+Near-Duplicate Chunk Elimination
+
+MinHash signatures over word shingles, indexed with LSH banding, are used to find chunks
+whose estimated Jaccard similarity reaches a configurable threshold before they are embedded.
+Duplicates are either skipped or collapsed into the first occurrence, whose metadata then
+lists the sources of every merged chunk.
+"""
+
+import re
+import json
+import hashlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from blackwell.config import logger, DEDUP_THRESHOLD, DEDUP_MODE
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_MAX_MULTIPLIER = 1 << 29  # keeps (a*x + b) for 32-bit x within uint64
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    """Hash the word shingles of a text into 32-bit integers."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    )
+
+
+def _lsh_params(threshold: float, num_perm: int, recall: float = 0.99) -> Tuple[int, int]:
+    """
+    Pick the (bands, rows) split with the fewest candidate pairs that still surfaces
+    pairs at the threshold similarity with the requested probability.
+    """
+    candidates = [(num_perm // r, r) for r in range(num_perm, 0, -1) if num_perm % r == 0]
+    for bands, rows in candidates:
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return candidates[-1]
+
+
+class MinHashDeduplicator:
+    """Streaming near-duplicate detector based on MinHash signatures and LSH banding."""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = 128,
+                 shingle_size: int = 5, seed: int = 1):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            threshold: Estimated Jaccard similarity from which two chunks are duplicates
+            num_perm: Number of hash permutations in each signature
+            shingle_size: Number of words per shingle
+            seed: Seed of the hash permutations
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MAX_MULTIPLIER, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a text."""
+        hashes = _shingle_hashes(text, self.shingle_size)
+        # Universal hashing (a*x + b) mod p, one column per permutation
+        permuted = (np.outer(hashes, self._a) + self._b) % np.uint64(_MERSENNE_PRIME)
+        return (permuted & np.uint64(_MAX_HASH)).min(axis=0)
+
+    def find_duplicate(self, text: str) -> Tuple[int, np.ndarray]:
+        """
+        Look up a previously added text that is a near duplicate of this one.
+
+        Returns:
+            Tuple of (index of the duplicate or -1, signature of the text)
+        """
+        sig = self.signature(text)
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            key = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+            candidates.update(buckets.get(key, ()))
+
+        for idx in sorted(candidates):
+            if np.mean(self._signatures[idx] == sig) >= self.threshold:
+                return idx, sig
+        return -1, sig
+
+    def add(self, sig: np.ndarray) -> int:
+        """Index a signature and return its position."""
+        idx = len(self._signatures)
+        self._signatures.append(sig)
+        for band, buckets in enumerate(self._buckets):
+            key = sig[band * self.rows:(band + 1) * self.rows].tobytes()
+            buckets.setdefault(key, []).append(idx)
+        return idx
+
+
+def _chunk_source(chunk) -> str:
+    """Most specific source of a chunk (the topic URL for Medline chunks)."""
+    return chunk.metadata.get("topic_url") or chunk.metadata.get("source", "")
+
+
+def deduplicate_chunks(
+    chunks: List, threshold: float = DEDUP_THRESHOLD, mode: str = DEDUP_MODE
+) -> Tuple[List, Dict[str, int]]:
+    """
+    Remove near-duplicate chunks before they are embedded.
+
+    Args:
+        chunks: List of document chunks
+        threshold: Estimated Jaccard similarity from which two chunks are duplicates
+        mode: "skip" drops duplicates, "merge" collapses them into the first occurrence and
+              records the merged sources in its 'duplicate_sources' metadata (JSON list).
+              In both modes, the topic IDs of dropped duplicates from other Medline topics
+              are recorded in the kept chunk's 'duplicate_topic_ids' metadata (JSON list)
+
+    Returns:
+        Tuple of (unique chunks, report with the number of input, kept and saved chunks)
+    """
+    deduplicator = MinHashDeduplicator(threshold=threshold)
+    kept = []
+    merged_sources: Dict[int, List[str]] = {}
+    dropped_topics: Dict[int, set] = {}
+
+    for chunk in chunks:
+        idx, sig = deduplicator.find_duplicate(chunk.page_content)
+        if idx >= 0:
+            if mode == "merge":
+                merged_sources.setdefault(idx, [_chunk_source(kept[idx])]).append(_chunk_source(chunk))
+            topic_id = chunk.metadata.get("topic_id")
+            if topic_id and topic_id != kept[idx].metadata.get("topic_id"):
+                dropped_topics.setdefault(idx, set()).add(topic_id)
+            continue
+        deduplicator.add(sig)
+        kept.append(chunk)
+
+    for idx, sources in merged_sources.items():
+        kept[idx].metadata["duplicate_sources"] = json.dumps(sorted(set(sources)))
+    # Topics whose content now lives only in the kept chunk, re-indexed if it is ever deleted
+    for idx, topic_ids in dropped_topics.items():
+        kept[idx].metadata["duplicate_topic_ids"] = json.dumps(sorted(topic_ids))
+
+    report = {
+        "input_chunks": len(chunks),
+        "kept_chunks": len(kept),
+        "saved_chunks": len(chunks) - len(kept),
+    }
+    saved_pct = 100 * report["saved_chunks"] / len(chunks) if chunks else 0
+    print(f"Deduplication saved {report['saved_chunks']} of {len(chunks)} chunks ({saved_pct:.1f}%)")
+    logger.info(f"Chunk deduplication (threshold={threshold}, mode={mode}): {report}")
+    return kept, report
@@ -1,5 +1,7 @@
+import os
+import json
 import time
-from typing import List
+from typing import Dict, List, Set
 from langchain_community.document_loaders import (
     PyPDFLoader,
     TextLoader,
@@ -14,9 +16,13 @@ from blackwell.config import (
     ACCEPTED_EXTENSIONS as AC,
     DB_PATH,
     DB_COLLECTION,
-    DATA_FOLDER
+    DATA_FOLDER,
+    CHUNKING_METHOD,
+    DEDUP_ENABLED
 )
 from blackwell.utils import get_available_docs
+from blackwell.chunker import split_documents
+from blackwell.dedupe import deduplicate_chunks
 
 
 def load_documents(docs_paths) -> List:
@@ -56,7 +62,11 @@ def load_documents(docs_paths) -> List:
 
 
 def process_documents(
-    documents: List, chunk_size: int = 1536, chunk_overlap: int = 256
+    documents: List,
+    chunk_size: int = 1536,
+    chunk_overlap: int = 256,
+    method: str = CHUNKING_METHOD,
+    token_offsets=None,
 ) -> List:
     """
     Process documents by splitting them into chunks for better handling by LLMs
@@ -65,6 +75,9 @@ def process_documents(
         documents: List of documents to process
         chunk_size: Size of each text chunk
         chunk_overlap: Overlap between chunks
+        method: "offset" for the single-pass chunker, "recursive" for RecursiveCharacterTextSplitter
+        token_offsets: Optional token offset function (offset method only) to size chunks in tokens,
+                       e.g. blackwell.chunker.regex_token_offsets
 
     Returns:
         List of processed document chunks
@@ -78,14 +91,16 @@ def process_documents(
         chunk_overlap = chunk_size // 4
         print(f"Adjusting chunk size to {chunk_size} due to small document")
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-    )
-
     print("Processing and chunking documents...")
-    chunks = text_splitter.split_documents(documents)
+    if method == "offset":
+        chunks = split_documents(documents, chunk_size, chunk_overlap, token_offsets=token_offsets)
+    else:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+        )
+        chunks = text_splitter.split_documents(documents)
 
     # Using all document as a 1 chunk if its less then minimum chunk size
     if not chunks and documents:
@@ -96,6 +111,23 @@ def process_documents(
     return chunks
 
 
+def _duplicate_sources(metadata: Dict) -> Set[str]:
+    """Sources whose duplicate chunks were merged into a stored chunk ("merge" dedup mode)."""
+    return set(json.loads(metadata.get("duplicate_sources") or "[]"))
+
+
+def _indexed_sources(metadatas: List[Dict]) -> Set[str]:
+    """
+    Files indexed in the vector store, including files whose chunks were all merged
+    into chunks of other files by deduplication.
+    """
+    sources = set()
+    for metadata in metadatas:
+        sources.add(metadata["source"])
+        sources |= _duplicate_sources(metadata)
+    return sources
+
+
 def build_retriever(add_new_docs: bool = False):
     """
     Build a retriever for document chunks using embeddings and vector store
@@ -114,7 +146,7 @@ def build_retriever(add_new_docs: bool = False):
         return vector_store
     # Add new documents to the vector store if they are not already present
     docs = vector_store.get()["metadatas"]
-    stored_docs = set([doc["source"] for doc in docs])
+    stored_docs = _indexed_sources(docs)
     available_docs = set(get_available_docs(folder_path=DATA_FOLDER+"/", extensions=AC))
     docs_to_load = list(available_docs - stored_docs)
 
@@ -122,16 +154,84 @@ def build_retriever(add_new_docs: bool = False):
         print("Updating vector store with new documents...")
         documents = load_documents(docs_to_load)  # Load PDFs from paths
         chunks = process_documents(documents)  # Process documents into chunks
-        if len(chunks) > 3000:
-            for i in range(0, len(chunks), 3000):
-                print(f"importing chunks {i} to {i + 2999}")
-                if (i+2999) < len(chunks):
-                    c = chunks[i:i + 2999]
-                else:
-                    c = chunks[i:]
-                vector_store.add_documents(c)  # Add documents to the vector store
-                time.sleep(60)  # Pause to avoid rate limits
-        else:
-            vector_store.add_documents(chunks)  # Add documents to the vector store
+        if DEDUP_ENABLED:
+            chunks, _ = deduplicate_chunks(chunks)  # Skip near-duplicate chunks
+        add_documents_in_batches(vector_store, chunks)  # Add documents to the vector store
 
     return vector_store
+
+
+def add_documents_in_batches(
+    vector_store, chunks: List, batch_size: int = 3000, pause: float = 60
+) -> int:
+    """
+    Add document chunks to the vector store in batches, pausing between batches
+    to stay within the embedding API rate limits.
+
+    Args:
+        vector_store: The vector store to add the chunks to
+        chunks: List of document chunks to embed and store
+        batch_size: Number of chunks per batch
+        pause: Seconds to wait between batches
+
+    Returns:
+        Number of chunks added
+    """
+    for i in range(0, len(chunks), batch_size):
+        batch = chunks[i:i + batch_size]
+        if len(chunks) > batch_size:
+            print(f"importing chunks {i} to {i + len(batch) - 1}")
+        vector_store.add_documents(batch)  # Add documents to the vector store
+        if i + batch_size < len(chunks):
+            time.sleep(pause)  # Pause to avoid rate limits
+
+    return len(chunks)
+
+
+def sync_documents(vector_store, changed: List[str], deleted: List[str]) -> int:
+    """
+    Bring the vector store up to date with a set of changed and deleted files.
+
+    Chunks previously indexed from any of these files are removed, then the changed
+    files are loaded, chunked and embedded again. Unchanged files whose duplicate chunks
+    were merged into a removed chunk are re-indexed with them.
+
+    Args:
+        vector_store: The ChromaDB vector store instance
+        changed: Paths of files that were created or modified
+        deleted: Paths of files that were removed
+
+    Returns:
+        Number of chunks added
+    """
+    # Unchanged files whose duplicates were kept only in a chunk about to be deleted would lose
+    # that content: they are re-indexed too (which may delete further chunks)
+    removed = set(changed) | set(deleted)
+    reindexed: Set[str] = set()
+    stale_ids = []
+    pending = removed
+    while pending:
+        stale = vector_store.get(where={"source": {"$in": sorted(pending)}}, include=["metadatas"])
+        stale_ids += stale["ids"]
+        dependents = {source
+                      for metadata in stale["metadatas"]
+                      for source in _duplicate_sources(metadata)
+                      if source not in removed | reindexed and os.path.isfile(source)}
+        reindexed |= dependents
+        pending = dependents
+
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+        print(f"Removed {len(stale_ids)} outdated chunks")
+    if reindexed:
+        print(f"Re-indexing {len(reindexed)} unchanged files whose duplicates were kept in removed chunks")
+
+    to_load = list(changed) + sorted(reindexed)
+    if not to_load:
+        return 0
+
+    documents = load_documents(to_load)
+    chunks = process_documents(documents)
+    if DEDUP_ENABLED:
+        chunks, _ = deduplicate_chunks(chunks)
+    return add_documents_in_batches(vector_store, chunks)
@@ -1,271 +1,593 @@
-from typing import List, TypedDict, Dict
+from typing import Annotated, Callable, List, Optional, TypedDict, Dict
 import os
 import time
+import threading
 
 # LangChain imports
 from langsmith import traceable, uuid7
 from langchain.agents import create_agent
 from langchain_core.messages import (
+    AIMessage,
     HumanMessage,
     AnyMessage
 )
+from langchain_core.runnables import RunnableLambda
 
 # LangGraph imports
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.runtime import get_runtime
+from langgraph.types import RetryPolicy
 
 # Local imports
 from blackwell.config import *
 from blackwell.prompts import *
 from blackwell.utils import format_references
+from blackwell.registry import registry, resolve
+from blackwell.checkpointer import build_checkpointer
+from blackwell.rate_limiter import is_quota_error
+from blackwell.telemetry import instrument_node, add_metrics
+from blackwell.model_routing import FAST_MODEL, route_final_report
+from blackwell.token_budget import ContextBudget, compaction_messages, compacted_report, log_savings, message_text
 from blackwell.document_processer import build_retriever
+from blackwell.web_kb import build_web_store, purge_expired_pages
 from blackwell.pubmed_tools import PUBMED_TOOLS, initialize_pubmed_tools
 from blackwell.rag_tools import RAG_TOOLS, initialize_rag_tools
 
 id = uuid7()
+context_budget = ContextBudget()  # Fits the research reports sent to the treatment and final report calls
+FINAL_REPORT_TAG = "final_report"  # Tags the final report call (fast_model or pro_model, see _final_model) whose tokens are streamed to the client
 ##################### Graph Compiling Script #####################
 # This script compiles the LangGraph graph, the sub-agents and their tools.
+def merge_reports(current: Dict[str, AnyMessage], update: Optional[Dict[str, AnyMessage]]) -> Dict[str, AnyMessage]:
+    # Reports written by parallel branches are merged, None (initial state of a new evaluation) resets them
+    if update is None:
+        return {}
+    return {**(current or {}), **update}
+
+
+def add_references(current: List[Dict], update: Optional[List[Dict]]) -> List[Dict]:
+    # References found by parallel branches are concatenated, None (initial state of a new evaluation) resets them
+    if update is None:
+        return []
+    return (current or []) + update
+
+
 class GraphState(TypedDict):
     # Type for the state of the retrieval and query graph
     next_node: str
     anamnesis_report: AnyMessage
     query: AnyMessage  # Improved query for vector similarity search
-    reports: Dict[str, AnyMessage]
+    reports: Annotated[Dict[str, AnyMessage], merge_reports]
     final_report: str
-    references: List[Dict]  # Track all references from RAG and PubMed
+    routing: Dict  # Model chosen for the final report (see blackwell.model_routing)
+    references: Annotated[List[Dict], add_references]  # Track all references from RAG and PubMed
+    metrics: Annotated[List[Dict], add_metrics]  # Telemetry spans of the node attempts (see blackwell.telemetry)
+
+
+class ResearchError(Exception):
+    """A node's model or agent output can't be used, retried by the node retry policy."""
+
+
+class ReportParseError(ResearchError):
+    """Empty, truncated or incomplete model or agent output."""
+
+
+class EmptyReferencesError(ResearchError):
+    """A research report without its **References:** section."""
+
+
+def classify_error(error: BaseException) -> str:
+    # Error classes of the node retry policies, "fatal" errors are not retried
+    if isinstance(error, EmptyReferencesError):
+        return "references"
+    if isinstance(error, ReportParseError):
+        return "parse"
+    if is_quota_error(error):
+        return "quota"
+    return "fatal"
+
+
+def _retry_policy(initial_interval: float, retry_on) -> RetryPolicy:
+    return RetryPolicy(
+        initial_interval=initial_interval,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        max_interval=RETRY_MAX_INTERVAL,
+        max_attempts=RETRY_MAX_ATTEMPTS,
+        jitter=True,
+        retry_on=retry_on,
+    )
+
+
+# Quota errors wait for the API quota to recover, parse and empty references errors retry sooner
+NODE_RETRY_POLICY = [
+    _retry_policy(QUOTA_BACKOFF, lambda error: classify_error(error) == "quota"),
+    _retry_policy(RETRY_INITIAL_INTERVAL, (ReportParseError, EmptyReferencesError)),
+]
+
+
+def _node_attempt():
+    # Execution info of the running graph task (None when a node is called outside the graph)
+    try:
+        return get_runtime().execution_info
+    except RuntimeError:
+        return None
+
+
+def _log_failure(node: str, e: Exception) -> None:
+    info = _node_attempt()
+    attempt = info.node_attempt if info else 1
+    logger.error(f"Error in {node} node (attempt {attempt}/{RETRY_MAX_ATTEMPTS}, {classify_error(e)}): {e}")
+
+
+# Partial results of failed node attempts, by graph task. The task id is kept across the
+# retries of a node, so a retry resumes from what the failed attempt already produced
+# (agent messages with their tool results, expert reports) instead of starting over.
+# A retry starts at most RETRY_MAX_INTERVAL (plus jitter) after the failure, older entries
+# belong to runs cancelled between attempts and are dropped.
+PARTIAL_RESULTS_TTL = 2 * RETRY_MAX_INTERVAL
+_partial_results: Dict[str, tuple] = {}
+_partial_results_lock = threading.Lock()
+
+def _task_id() -> Optional[str]:
+    info = _node_attempt()
+    return info.task_id if info else None
+
+def _drop_expired_partials() -> None:
+    # Called with _partial_results_lock held
+    expired_before = time.monotonic() - PARTIAL_RESULTS_TTL
+    for task_id in [task_id for task_id, (kept_at, _) in _partial_results.items() if kept_at < expired_before]:
+        del _partial_results[task_id]
 
+def _take_partial(task_id: Optional[str]):
+    if task_id is None:
+        return None
+    with _partial_results_lock:
+        _drop_expired_partials()
+        return _partial_results.pop(task_id, (None, None))[1]
 
+def _keep_partial(task_id: Optional[str], partial, e: Exception) -> None:
+    # Only attempts that will be retried keep their partial results
+    info = _node_attempt()
+    if task_id and partial and classify_error(e) != "fatal" and info.node_attempt < RETRY_MAX_ATTEMPTS:
+        with _partial_results_lock:
+            _drop_expired_partials()
+            _partial_results[task_id] = (time.monotonic(), partial)
+
+
+def extract_references(research_content: str, ref_type: str) -> List[Dict]:
+    # Parse the references listed after "**References:**" in a research report
+    if "**References:**" not in research_content:
+        logger.debug(f"{ref_type} research report without references:\n{research_content}")
+        raise EmptyReferencesError(f"No references found in {ref_type} research report ({len(research_content)} chars)")
+    references = []
+    for ref in research_content.split("**References:**")[1].split("\n"):
+        if ref.strip() != "" and ref != "---":
+            references.append({
+                "type": ref_type,
+                "reference": ref.strip("* ")
+            })
+    return references
+
+
+# Each node has a sync and an async implementation sharing the message building and result
+# parsing, so the graph serves both EvaluatorAgent.invoke and EvaluatorAgent.ainvoke
+
+def _analysis_messages(state: GraphState) -> List[AnyMessage]:
+    if state["reports"].get("hypothesis_report") is None:
+        print("Proposing Hypothesis query...")
+        return [h_analyze_query_prompt, state["anamnesis_report"]]
+    print("Proposing Treatment query...")
+    return [t_analyze_query_prompt, state["reports"]["hypothesis_report"], state["anamnesis_report"]]
+
+def _analysis_update(query: AnyMessage) -> Dict:
+    if query is None or query.content == "":
+        raise ReportParseError("No query returned from analysis.")
+    return {"query": query, "next_node": "rag_research"}
+
+@instrument_node("analyze")
 @traceable(run_type="llm")
-def analyze_query(state: GraphState) -> GraphState:
-    # Analyze user query to improve research
+def analyze_query(state: GraphState) -> Dict:
+    # Analyze user query to improve research, errors are retried by the node retry policy
     try:
-        if state["reports"].get("hypothesis_report") is None:
-            print("Proposing Hypothesis query...")
-            state["query"] = fast_model.invoke([h_analyze_query_prompt, 
-                                                state["anamnesis_report"]])
-        else:
-            print("Proposing Treatment query...")
-            state["query"] = fast_model.invoke([t_analyze_query_prompt, 
-                                                state["reports"]["hypothesis_report"], 
-                                                state["anamnesis_report"]])
-        time.sleep(QUOTA_RATE*0.6)
-        return state
-    
+        return _analysis_update(fast_model.invoke(_analysis_messages(state)))
     except Exception as e:
-        logger.error(f"Error in query analysis: {e}")
-        logger.error(f"Result:\n{state['query']}")
-        state["next_node"] = "analyze"  # Retry analysis on error
-        return state
+        _log_failure("analyze", e)
+        raise
 
+@instrument_node("analyze")
 @traceable(run_type="llm")
-def rag_research(state: GraphState) -> GraphState:
-    # Use RAG agent to retrieve documents and crawl web if needed
+async def aanalyze_query(state: GraphState) -> Dict:
+    try:
+        return _analysis_update(await fast_model.ainvoke(_analysis_messages(state)))
+    except Exception as e:
+        _log_failure("analyze", e)
+        raise
+
+
+def _rag_agent(state: GraphState):
     print("RAG Agent researching...")
+    if state["reports"].get("hypothesis_report") is None:
+        return rag_agent_diagnosis, "hypothesis"  # Diagnostic Pipeline
+    return rag_agent_treatment, "treatment"  # Therapeutic Pipeline, runs in parallel with the PubMed research
+
+def _agent_input(state: GraphState) -> Dict:
+    return {"messages": [{"role": "user", "content": state["query"].content}]}
+
+def _resume_input(state: GraphState, task_id: Optional[str]) -> Dict:
+    # Agent input of a research attempt, continuing the messages of a failed one if any
+    messages = _take_partial(task_id)
+    if not messages:
+        return _agent_input(state)
+    if isinstance(messages[-1], AIMessage) and messages[-1].tool_calls:
+        messages = messages[:-1]  # Tool calls left without results are made again
+    if messages and isinstance(messages[-1], AIMessage):
+        messages = messages + [research_resume_prompt]  # The final answer was rejected, rewrite it
+    logger.info(f"Resuming research from {len(messages)} messages of the failed attempt")
+    return {"messages": messages}
+
+def _run_agent(agent, state: GraphState, parse: Callable[[Dict], Dict]) -> Dict:
+    # Stream the agent's state so the messages gathered before a failure (the agent's, or
+    # parse rejecting its report) are kept for the retry
+    task_id = _task_id()
+    agent_input = _resume_input(state, task_id)
+    messages = agent_input["messages"]
+    try:
+        for values in agent.stream(agent_input, stream_mode="values"):
+            messages = values["messages"]
+        return parse({"messages": messages})
+    except Exception as e:
+        _keep_partial(task_id, messages, e)
+        raise
+
+async def _arun_agent(agent, state: GraphState, parse: Callable[[Dict], Dict]) -> Dict:
+    task_id = _task_id()
+    agent_input = _resume_input(state, task_id)
+    messages = agent_input["messages"]
+    try:
+        async for values in agent.astream(agent_input, stream_mode="values"):
+            messages = values["messages"]
+        return parse({"messages": messages})
+    except Exception as e:
+        _keep_partial(task_id, messages, e)
+        raise
+
+def _agent_report(result: Dict, agent_name: str) -> str:
+    print(f"{agent_name} completed research with {len(result['messages'])} messages")
+    content = result['messages'][-1].content
+    # Hardwiring fix for list response
+    if type(content) == list:
+        content = content[0]["text"]
+    return content
+
+def _rag_update(result: Dict, next_node: str) -> Dict:
+    if len(result['messages']) < 3:
+        raise ReportParseError("RAG Agent returned insufficient messages")
+    research_content = _agent_report(result, "RAG Agent")
+    # Extract RAG references from tool calls in final report
+    return {
+        "reports": {"research_report": HumanMessage(content=research_content)},
+        "references": extract_references(research_content, "RAG"),
+        "next_node": next_node,
+    }
+
+@instrument_node("rag_research")
+@traceable(run_type="llm")
+def rag_research(state: GraphState) -> Dict:
+    # Use RAG agent to retrieve documents and crawl web if needed
     try:
-        if state["query"] is None or state["query"].content == "":
-            raise Exception("No query returned from analysis.")
-        
-        if state["reports"].get("hypothesis_report") is None:
-            # Diagnostic Pipeline
-            result = rag_agent_diagnosis.invoke({"messages": [{"role": "user", "content": state["query"].content}]})
-            state["next_node"] = "hypothesis"
-        else:
-            # Therapeutic Pipeline
-            result = rag_agent_treatment.invoke({"messages": [{"role": "user", "content": state["query"].content}]})
-            state["next_node"] = "pubmed"
-        
-        if len(result['messages']) < 3:
-            # Retry if insufficient messages
-            raise Exception("RAG Agent returned insufficient messages, retrying...")
-        
-        research_content = result['messages'][-1].content
-        print(f"RAG Agent completed research with {len(result['messages'])} messages")
-        
-        # Hardwiring fix for list response
-        if type(research_content) == list:
-            research_content = research_content[0]["text"]
-
-        state["reports"]["research_report"] = HumanMessage(content=research_content)
-
-        time.sleep(QUOTA_RATE*5)  # Pause to avoid rate limits
-        if ("**References:**" in research_content):
-            references = research_content.split("**References:**")[1]
-            # Extract RAG references from tool calls in final report
-            for ref in references.split("\n"):
-                #print(f"RAG Reference found: {ref}")
-                if ref.strip() != "":
-                    if ref != "---":
-                        state["references"].append({
-                            "type": "RAG",
-                            "reference": ref.strip("* ")
-                        })
-        else:
-            raise Exception("No references found in RAG research report:\n", research_content)
- 
+        agent, next_node = _rag_agent(state)
+        return _run_agent(agent, state, lambda result: _rag_update(result, next_node))
     except Exception as e:
-        logger.error(f"Error in RAG research: {e}")
-        state["next_node"] = "analyze"  # Retry analysis on error
+        _log_failure("rag_research", e)
+        raise
+
+@instrument_node("rag_research")
+@traceable(run_type="llm")
+async def arag_research(state: GraphState) -> Dict:
+    try:
+        agent, next_node = _rag_agent(state)
+        return await _arun_agent(agent, state, lambda result: _rag_update(result, next_node))
+    except Exception as e:
+        _log_failure("rag_research", e)
+        raise
 
-    return state
 
+def _pubmed_update(result: Dict) -> Dict:
+    pubmed_research = _agent_report(result, "PubMed Agent")
+    # Kept apart from the RAG report, the treatment node combines both
+    return {
+        "reports": {"pubmed_report": HumanMessage(content=pubmed_research)},
+        "references": extract_references(pubmed_research, "PubMed"),
+    }
+
+def _pubmed_error(e: Exception) -> Dict:
+    # The PubMed research is optional: retried like the others, then the treatment goes on without it
+    _log_failure("pubmed", e)
+    info = _node_attempt()
+    if classify_error(e) != "fatal" and info is not None and info.node_attempt < RETRY_MAX_ATTEMPTS:
+        raise e
+    logger.error("PubMed research abandoned, continuing without it")
+    return {}
+
+@instrument_node("pubmed")
 @traceable(run_type="llm")
-def pubmed_research(state: GraphState) -> GraphState:
-    # Placeholder for PubMed search node
+def pubmed_research(state: GraphState) -> Dict:
+    # PubMed search, runs in parallel with the therapeutic RAG research
     print("Performing PubMed search for additional context...")
     try:
-        result = pubmed_agent.invoke({"messages": [{"role": "user", "content": state["query"].content}]})
-        pubmed_research = result['messages'][-1].content
-
-        print(f"PubMed Agent completed research with {len(result['messages'])} messages")
-        # Hardwiring fix for list response
-        if type(pubmed_research) == list:
-            pubmed_research = pubmed_research[0]["text"]
-
-        # Append PubMed research to existing RAG research report    
-        combined_report = state["reports"]["research_report"].content + "\n\n" + pubmed_research
-        state["reports"]["research_report"] = HumanMessage(content=combined_report)
-
-        if ("**References:**" in pubmed_research):
-            references = pubmed_research.split("**References:**")[1]
-            # Extract PubMed references
-            for ref in references.split("\n"):
-                if ref.strip() != "":
-                    if ref != "---":
-                        state["references"].append({
-                            "type": "PubMed",
-                            "reference": ref.strip("* ")
-                        })
-        else:
-            raise Exception("No references found in PubMed research report:\n", pubmed_research)
-
-        time.sleep(QUOTA_RATE*5)  # Pause to avoid rate limits
-        return state
+        return _run_agent(pubmed_agent, state, _pubmed_update)
+    except Exception as e:
+        return _pubmed_error(e)
 
+@instrument_node("pubmed")
+@traceable(run_type="llm")
+async def apubmed_research(state: GraphState) -> Dict:
+    print("Performing PubMed search for additional context...")
+    try:
+        return await _arun_agent(pubmed_agent, state, _pubmed_update)
     except Exception as e:
-        logger.error(f"Error in PubMed research: {e}")
-        if 'result' in locals():
-            logger.error(f"Result:\n{result}")
-        return state
+        return _pubmed_error(e)
+
+
+def _expert_inputs(state: GraphState) -> List[List[AnyMessage]]:
+    # The experts are independent, so both calls run concurrently
+    print("Running clinical certainty and investigator experts...")
+    expert_prompts = [clinical_certainty_prompt, investigative_workup_prompt]
+    return [[prompt] + 
+            [state["anamnesis_report"]] + 
+            [state["reports"]["research_report"]] for prompt in expert_prompts]
+
+def _hypothesis_messages(state: GraphState, reports: Dict[str, AnyMessage]) -> List[AnyMessage]:
+    print("Generating hypothesis report...")
+    return ([hypothesis_synthesis_prompt] + 
+            [state["anamnesis_report"]] + 
+            [reports["certainty_report"]] + 
+            [reports["investigator_report"]] +
+            [state["reports"]["research_report"]])
 
+def _hypothesis_error(state: GraphState, e: Exception, task_id: Optional[str], reports: Dict[str, AnyMessage]) -> None:
+    # The expert reports already written are reused by the retry
+    _keep_partial(task_id, reports, e)
+    _log_failure("hypothesis", e)
+    logger.error(f"Reports:\n{state['reports']}")
+
+@instrument_node("hypothesis")
 @traceable(run_type="llm")
-def generate_hypothesis(state: GraphState) -> GraphState:
+def generate_hypothesis(state: GraphState) -> Dict:
     # Generate a hypothesis using retrieved context
     # Generate reports from clinical certainty and investigative workup experts
     # Then synthesize a hypothesis report
-    print("Assessing clinical certainty expert...")
+    task_id = _task_id()
+    reports = _take_partial(task_id) or {}
     try:
-        state["reports"]["certainty_report"] = fast_model.invoke(
-                                    [clinical_certainty_prompt] + 
-                                    [state["anamnesis_report"]] + 
-                                    [state["reports"]["research_report"]])
-        
-        print("Running investigator expert...")
-        state["reports"]["investigator_report"] = fast_model.invoke(
-                                    [investigative_workup_prompt] + 
-                                    [state["anamnesis_report"]] + 
-                                    [state["reports"]["research_report"]])
-        
-        print("Generating hypothesis report...")
-        state["reports"]["hypothesis_report"] = fast_model.invoke(
-                                    [hypothesis_synthesis_prompt] + 
-                                    [state["anamnesis_report"]] + 
-                                    [state["reports"]["certainty_report"]] + 
-                                    [state["reports"]["investigator_report"]] +
-                                    [state["reports"]["research_report"]])
-
-        time.sleep(QUOTA_RATE*1.8)  # Pause to avoid rate limits
-        return state
+        if "certainty_report" not in reports:
+            reports["certainty_report"], reports["investigator_report"] = fast_model.batch(_expert_inputs(state))
+        reports["hypothesis_report"] = fast_model.invoke(_hypothesis_messages(state, reports))
+        return {"reports": reports}
     except Exception as e:
-        logger.error(f"Error in hypothesis node: {e}")
-        logger.error(f"Reports:\n{state['reports']}")
-        return state
+        _hypothesis_error(state, e, task_id, reports)
+        raise
 
+@instrument_node("hypothesis")
 @traceable(run_type="llm")
-def generate_treatment(state: GraphState) -> GraphState:
-    # Generate a treatment plan using retrieved context
+async def agenerate_hypothesis(state: GraphState) -> Dict:
+    task_id = _task_id()
+    reports = _take_partial(task_id) or {}
+    try:
+        if "certainty_report" not in reports:
+            reports["certainty_report"], reports["investigator_report"] = await fast_model.abatch(_expert_inputs(state))
+        reports["hypothesis_report"] = await fast_model.ainvoke(_hypothesis_messages(state, reports))
+        return {"reports": reports}
+    except Exception as e:
+        _hypothesis_error(state, e, task_id, reports)
+        raise
+
+
+def _research_reports(state: GraphState) -> Dict[str, AnyMessage]:
     print("Generating treatment plan...")
+    reports = {"research_report": state["reports"]["research_report"]}
+    if state["reports"].get("pubmed_report") is not None:
+        reports["pubmed_report"] = state["reports"]["pubmed_report"]
+    return reports
+
+def _compaction_plan(state: GraphState, reports: Dict[str, AnyMessage]) -> Dict[str, int]:
+    # Target sizes of the research reports that must be compacted to fit the context budget
+    if not CONTEXT_COMPACTION_ENABLED:
+        return {}
+    fixed = [final_report_prompt, state["anamnesis_report"], state["reports"]["hypothesis_report"]]
+    return context_budget.plan(fixed, reports)
+
+def _apply_compaction(reports: Dict[str, AnyMessage], targets: Dict[str, int], summaries: List) -> Dict[str, AnyMessage]:
+    compacted = dict(reports)
+    for name, summary in zip(targets, summaries):
+        if isinstance(summary, Exception):
+            logger.warning(f"Compaction of {name} failed, keeping it whole: {summary}")
+            continue
+        compacted[name] = compacted_report(reports[name], summary)
+    # The research is sent to both the treatment and the final report calls
+    log_savings({name: reports[name] for name in targets}, {name: compacted[name] for name in targets}, calls=2)
+    return compacted
+
+def _combined_research(reports: Dict[str, AnyMessage]) -> AnyMessage:
+    # Combine the therapeutic RAG research with the PubMed research
+    if len(reports) == 1:
+        return reports["research_report"]
+    return HumanMessage(content="\n\n".join(message_text(report) for report in reports.values()))
+
+def _treatment_messages(state: GraphState, research_report: AnyMessage) -> List[AnyMessage]:
+    return ([treatment_eval_prompt] + 
+            [state["reports"]["hypothesis_report"]] + 
+            [state["anamnesis_report"]] + 
+            [research_report])
+
+def _final_messages(state: GraphState, treatment_report: AnyMessage, research_report: AnyMessage) -> List[AnyMessage]:
+    print("Generating final report...")
+    return ([final_report_prompt] + 
+            [state["anamnesis_report"]] + 
+            [state["reports"]["hypothesis_report"]] + 
+            [treatment_report] + 
+            [research_report])
+
+def _final_model(state: GraphState):
+    # Straightforward cases (confident certainty expert) get their final report from fast_model
+    certainty_report = state["reports"].get("certainty_report")
+    decision = route_final_report(message_text(certainty_report) if certainty_report is not None else None)
+    return (fast_model if decision.model == FAST_MODEL else pro_model), decision
+
+def _treatment_update(state: GraphState, result, treatment_report: AnyMessage, research_report: AnyMessage,
+                      routing) -> Dict:
+    references_text = format_references(state["references"])
+    if type(result) == list:
+        final_report = result[0].content + f"\n\n{references_text}"
+    else:
+        final_report = result.content + f"\n\n{references_text}"
+    return {
+        "reports": {"research_report": research_report, "treatment_report": treatment_report},
+        "final_report": final_report,
+        "routing": routing.to_dict(),
+    }
+
+def _treatment_error(state: GraphState, e: Exception, result, task_id: Optional[str], partial: Dict[str, AnyMessage]) -> None:
+    # The (compacted) research and the treatment report already written are reused by the retry
+    _keep_partial(task_id, partial, e)
+    _log_failure("treatment", e)
+    logger.error(f"Reports:\n{state['reports']}")
+    if result is not None:
+        logger.error(f"Final report result:\n{result}")
+
+@instrument_node("treatment")
+@traceable(run_type="llm")
+def generate_treatment(state: GraphState) -> Dict:
+    # Generate a treatment plan and the final report using retrieved context
+    task_id = _task_id()
+    partial = _take_partial(task_id) or {}
+    result = None
+    try:
+        if "research_report" not in partial:
+            reports = _research_reports(state)
+            targets = _compaction_plan(state, reports)
+            if targets:
+                summaries = fast_model.batch([compaction_messages(reports[name], target)
+                                              for name, target in targets.items()], return_exceptions=True)
+                reports = _apply_compaction(reports, targets, summaries)
+            partial["research_report"] = _combined_research(reports)
+        if "treatment_report" not in partial:
+            partial["treatment_report"] = fast_model.invoke(_treatment_messages(state, partial["research_report"]))
+        final_model, routing = _final_model(state)
+        result = final_model.invoke(_final_messages(state, partial["treatment_report"], partial["research_report"]),
+                                    config={"tags": [FINAL_REPORT_TAG]})
+        return _treatment_update(state, result, partial["treatment_report"], partial["research_report"], routing)
+    except Exception as e:
+        _treatment_error(state, e, result, task_id, partial)
+        raise
+
+@instrument_node("treatment")
+@traceable(run_type="llm")
+async def agenerate_treatment(state: GraphState) -> Dict:
+    task_id = _task_id()
+    partial = _take_partial(task_id) or {}
+    result = None
     try:
-        state["reports"]["treatment_report"] = fast_model.invoke([treatment_eval_prompt] + 
-                                                    [state["reports"]["hypothesis_report"]] + 
-                                                    [state["anamnesis_report"]] + 
-                                                    [state["reports"]["research_report"]])
-        # Final report generation
-        print("Generating final report...")    
-        result = pro_model.invoke([final_report_prompt] + 
-                                [state["anamnesis_report"]] + 
-                                [state["reports"]["hypothesis_report"]] + 
-                                [state["reports"]["treatment_report"]] + 
-                                [state["reports"]["research_report"]])
-
-        references_text = format_references(state["references"])
-        if type(result) == list:
-            state["final_report"] = result[0].content + f"\n\n{references_text}"
-        else:
-            state["final_report"] = result.content + f"\n\n{references_text}"
-
-        return state
-    
+        if "research_report" not in partial:
+            reports = _research_reports(state)
+            targets = _compaction_plan(state, reports)
+            if targets:
+                summaries = await fast_model.abatch([compaction_messages(reports[name], target)
+                                                     for name, target in targets.items()], return_exceptions=True)
+                reports = _apply_compaction(reports, targets, summaries)
+            partial["research_report"] = _combined_research(reports)
+        if "treatment_report" not in partial:
+            partial["treatment_report"] = await fast_model.ainvoke(_treatment_messages(state, partial["research_report"]))
+        final_model, routing = _final_model(state)
+        result = await final_model.ainvoke(_final_messages(state, partial["treatment_report"], partial["research_report"]),
+                                           config={"tags": [FINAL_REPORT_TAG]})
+        return _treatment_update(state, result, partial["treatment_report"], partial["research_report"], routing)
     except Exception as e:
-        logger.error(f"Error in treatment node: {e}")
-        logger.error(f"Reports:\n{state['reports']}")
-        if 'result' in locals() and result is not None:
-            logger.error(f"Final report result:\n{result}")
-        return state
+        _treatment_error(state, e, result, task_id, partial)
+        raise
 
 def router(state: GraphState):
     return state["next_node"]
 
 
-# Build the vector store
-print("Building vector store for RAG...")
-vector_store = build_retriever(add_new_docs=False)
-
-# Initialize RAG tools with the vector store
-print("Initializing RAG tools...")
-initialize_rag_tools(vector_store)
-print("Creating RAG agents...")
-quoted_d_prompt = diagnostic_rag_prompt.content.format(quota=QUOTA_AGENT_LIMIT)
-quoted_t_prompt = therapeutic_rag_prompt.content.format(quota=QUOTA_AGENT_LIMIT)
-rag_agent_diagnosis = create_agent(
-    model=agent_model,
-    tools=RAG_TOOLS,
-    system_prompt=quoted_d_prompt
-)
-rag_agent_treatment = create_agent(
-    model=agent_model,
-    tools=RAG_TOOLS,
-    system_prompt=quoted_t_prompt
-)
-# Initialize PubMed tools
-print("Initializing PubMed tools...")
-initialize_pubmed_tools(api_key=os.getenv("PUBMED_API_KEY"))
-pubmed_agent = create_agent(
-    model=agent_model, 
-    tools=PUBMED_TOOLS,
-    system_prompt=pubmed_research_agent_prompt.content
-)
+def route_research(state: GraphState):
+    # After the query analysis: run the diagnostic RAG research,
+    # or run the therapeutic RAG and PubMed research in parallel
+    if state["reports"].get("hypothesis_report") is None:
+        return "rag_research"
+    return ["rag_research", "pubmed"]
+
+
+# The vector stores, agents and compiled graph are built on first use (see blackwell.registry)
+def _build_rag_stores():
+    # Build the vector store and initialize the RAG tools with it
+    print("Building vector store for RAG...")
+    vector_store = build_retriever(add_new_docs=False)
+    web_store = build_web_store() if WEB_KB_ENABLED else None
+    if web_store is not None:
+        purge_expired_pages(web_store)
+    print("Initializing RAG tools...")
+    initialize_rag_tools(vector_store, web_store)
+    return vector_store, web_store
+
+
+def _build_rag_agent(prompt: AnyMessage):
+    def build():
+        registry.get("rag_stores")
+        print("Creating RAG agent...")
+        return create_agent(
+            model=resolve(agent_model),
+            tools=RAG_TOOLS,
+            system_prompt=prompt.content.format(quota=QUOTA_AGENT_LIMIT)
+        )
+    return build
+
+
+def _build_pubmed_agent():
+    print("Initializing PubMed tools...")
+    initialize_pubmed_tools(api_key=os.getenv("PUBMED_API_KEY"))
+    return create_agent(
+        model=resolve(agent_model),
+        tools=PUBMED_TOOLS,
+        system_prompt=pubmed_research_agent_prompt.content
+    )
+
+
+EVALUATOR_NODES = ["analyze", "rag_research", "pubmed", "hypothesis", "treatment"]
+
+
+def _build_evaluator_agent():
+    # Create the graph
+    print("Compiling Evaluator Agent...")
+    workflow = StateGraph(GraphState)
+
+    # Add nodes (sync implementation for invoke, async one for ainvoke), failed nodes are retried
+    # by NODE_RETRY_POLICY
+    workflow.add_node("analyze", RunnableLambda(analyze_query, aanalyze_query), retry_policy=NODE_RETRY_POLICY)
+    workflow.add_node("rag_research", RunnableLambda(rag_research, arag_research), retry_policy=NODE_RETRY_POLICY)
+    workflow.add_node("hypothesis", RunnableLambda(generate_hypothesis, agenerate_hypothesis),
+                      retry_policy=NODE_RETRY_POLICY)
+    workflow.add_node("treatment", RunnableLambda(generate_treatment, agenerate_treatment),
+                      defer=True, retry_policy=NODE_RETRY_POLICY)  # Joins the parallel research branches
+    workflow.add_node("pubmed", RunnableLambda(pubmed_research, apubmed_research), retry_policy=NODE_RETRY_POLICY)
+
+    # Create edges
+    workflow.add_conditional_edges("analyze", route_research, ["rag_research", "pubmed"])
+    workflow.add_edge("hypothesis", "analyze")
+    workflow.add_conditional_edges("rag_research", router, ["hypothesis", "treatment"])
+    workflow.add_edge("pubmed", "treatment")
+    workflow.add_edge("treatment", END)
+
+    # Set the entry point
+    workflow.set_entry_point("analyze")
+
+    # Compile the graph (LangGraph inspects the node functions, which builds the models and
+    # agents they use)
+    return workflow.compile(checkpointer=build_checkpointer())
+
 
-# Create the graph
-print("Compiling Evaluator Agent...")
-workflow = StateGraph(GraphState)
-memory = MemorySaver()
-
-# Add nodes
-workflow.add_node("analyze", analyze_query)
-workflow.add_node("rag_research", rag_research)
-workflow.add_node("hypothesis", generate_hypothesis)
-workflow.add_node("treatment", generate_treatment)
-workflow.add_node("pubmed", pubmed_research)
-
-# Create edges
-workflow.add_edge("analyze", "rag_research")
-workflow.add_edge("hypothesis", "analyze")
-workflow.add_conditional_edges("rag_research", router)
-workflow.add_edge("pubmed", "treatment")
-workflow.add_edge("treatment", END)
-
-# Set the entry point
-workflow.set_entry_point("analyze")
-
-# Compile the graph
-EvaluatorAgent = workflow.compile(checkpointer=memory)
+rag_stores = registry.register("rag_stores", _build_rag_stores)
+rag_agent_diagnosis = registry.register("rag_agent_diagnosis", _build_rag_agent(diagnostic_rag_prompt))
+rag_agent_treatment = registry.register("rag_agent_treatment", _build_rag_agent(therapeutic_rag_prompt))
+pubmed_agent = registry.register("pubmed_agent", _build_pubmed_agent)
+EvaluatorAgent = registry.register("evaluator_agent", _build_evaluator_agent)
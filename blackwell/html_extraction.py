@@ -0,0 +1,416 @@
+"""
+HTML Extraction Backends
+
+Pluggable extraction of the title and main content text of medical web pages. The "bs4"
+backend is the reference BeautifulSoup (html.parser) implementation; the "lxml" backend
+parses with libxml2 and removes unwanted elements and resolves the per-domain content
+selectors in a single tree walk, producing the same text at a fraction of the CPU cost.
+Select the backend with HTML_EXTRACTION_BACKEND; lxml falls back to bs4 when not installed.
+With lxml, pages can also be extracted incrementally while they download (StreamingExtractor).
+"""
+
+import re
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+from blackwell.config import logger, HTML_EXTRACTION_BACKEND
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # Optional dependency: pip install blackwell[crawl]
+    lxml = None
+
+# Elements that typically contain navigation/ads rather than content
+UNWANTED_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside',
+                 'iframe', 'noscript', 'button', 'form']
+UNWANTED_SELECTORS = [
+    '.navigation', '.nav', '.menu', '.sidebar', '.advertisement',
+    '.ad', '.social-share', '.related-links', '.breadcrumb',
+    '#navigation', '#sidebar', '#comments', '.comments'
+]
+
+# Content selectors for different websites, in order of preference
+CONTENT_SELECTORS = {
+    'medlineplus.gov': [
+        '#mplus-content',
+        '#topic-summary',
+        '.main-content',
+        'article',
+        '#article'
+    ],
+    'mayoclinic.org': [
+        '.content',
+        'article',
+        '.main-content',
+        '[role="main"]',
+        '#main-content'
+    ],
+    'familydoctor.org': [
+        '.content-area',
+        'article',
+        '.post-content',
+        '.entry-content',
+        'main'
+    ],
+    'cdc.gov': [
+        '#content',
+        'article',
+        '.syndicate',
+        '.content-area',
+        'main'
+    ],
+    'nih.gov': [
+        '#content',
+        'article',
+        '.main-content',
+        '[role="main"]',
+        'main'
+    ],
+    'webmd.com': [
+        'article',
+        '.article-body',
+        '.content',
+        'main'
+    ],
+    'kidshealth.org': [
+        'article',
+        '.article-body',
+        '#content',
+        'main'
+    ],
+    'healthline.com': [
+        'article',
+        '.article-body',
+        '#article-content',
+        'main'
+    ]
+}
+GENERIC_SELECTORS = ['article', 'main', '[role="main"]', '.content', '#content', '.main-content']
+
+
+def get_content_selectors(domain: str) -> List[str]:
+    """Return the content selectors for a domain, falling back to generic ones."""
+    for site_domain, site_selectors in CONTENT_SELECTORS.items():
+        if site_domain in domain:
+            return site_selectors
+    return GENERIC_SELECTORS
+
+
+def clean_extracted_text(text: str) -> str:
+    """Strip blank lines and drop repeated short lines (common in web scraping)."""
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    seen_lines = set()
+    unique_lines = []
+    for line in lines:
+        if line not in seen_lines or len(line) > 100:  # Keep long lines even if duplicate
+            unique_lines.append(line)
+            seen_lines.add(line)
+    return '\n'.join(unique_lines)
+
+
+# Matchers for the simple selectors used above: tag, .class, #id and [attr="value"]
+_ATTR_SELECTOR = re.compile(r'\[([\w-]+)="([^"]*)"\]')
+
+
+def _compile_selector(selector: str) -> Callable:
+    if selector.startswith('#'):
+        value = selector[1:]
+        return lambda el: el.get('id') == value
+    if selector.startswith('.'):
+        value = selector[1:]
+        return lambda el: value in (el.get('class') or '').split()
+    match = _ATTR_SELECTOR.fullmatch(selector)
+    if match:
+        name, value = match.groups()
+        return lambda el: el.get(name) == value
+    return lambda el: el.tag == selector
+
+
+_UNWANTED_TAG_SET = frozenset(UNWANTED_TAGS)
+_UNWANTED_MATCHERS = [_compile_selector(selector) for selector in UNWANTED_SELECTORS]
+_SELECTOR_CACHE: Dict[str, Callable] = {}
+
+
+def _is_unwanted(el) -> bool:
+    return el.tag in _UNWANTED_TAG_SET or any(match(el) for match in _UNWANTED_MATCHERS)
+
+
+def _iter_strings(root):
+    """Yield the text strings of an element in document order, skipping unwanted subtrees."""
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        if item.text and isinstance(item.tag, str):
+            yield item.text
+        for child in reversed(item):
+            # Text following a removed element or a comment still belongs to the parent
+            if child.tail:
+                stack.append(child.tail)
+            if isinstance(child.tag, str) and not _is_unwanted(child):
+                stack.append(child)
+
+
+def extract_with_bs4(html, url: str) -> dict:
+    """
+    Extract the title and main content text of a page with BeautifulSoup (html.parser).
+
+    Args:
+        html: Raw page content (bytes or str)
+        url: The page URL, used to pick the site-specific content selectors
+
+    Returns:
+        dict with 'title', 'content' (cleaned, not truncated) and 'source' (the domain)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Extract domain for identification
+    domain = urlparse(url).netloc.lower()
+
+    # Extract title
+    title_tag = soup.find('title')
+    title = title_tag.get_text().strip() if title_tag else "Untitled"
+
+    # Remove unwanted elements
+    for element in soup(UNWANTED_TAGS):
+        element.decompose()
+    for selector in UNWANTED_SELECTORS:
+        for element in soup.select(selector):
+            element.decompose()
+
+    # Try to find main content area
+    main_content = None
+    for selector in get_content_selectors(domain):
+        main_content = soup.select_one(selector)
+        if main_content:
+            break
+
+    # Use full body if no main content found
+    if not main_content:
+        main_content = soup.find('body')
+
+    if main_content:
+        text = main_content.get_text(separator='\n', strip=True)
+    else:
+        text = soup.get_text(separator='\n', strip=True)
+
+    return {'title': title, 'content': clean_extracted_text(text), 'source': domain}
+
+
+def _get_matchers(selectors: List[str]) -> List[Callable]:
+    matchers = []
+    for selector in selectors:
+        if selector not in _SELECTOR_CACHE:
+            _SELECTOR_CACHE[selector] = _compile_selector(selector)
+        matchers.append(_SELECTOR_CACHE[selector])
+    return matchers
+
+
+def _extract_from_tree(root, domain: str) -> dict:
+    """Extract the title and main content text from a parsed lxml tree."""
+    title_tag = root.find('.//title')
+    title = ''.join(title_tag.itertext()).strip() if title_tag is not None else "Untitled"
+
+    matchers = _get_matchers(get_content_selectors(domain))
+
+    # One pre-order walk: skip unwanted subtrees, remember the first match of each selector
+    found: List[Optional[object]] = [None] * len(matchers)
+    body = None
+    stack = [root]
+    while stack and found[0] is None:
+        el = stack.pop()
+        if el.tag == 'body' and body is None:
+            body = el
+        for i, match in enumerate(matchers):
+            if found[i] is None and match(el):
+                found[i] = el
+        stack.extend(child for child in reversed(el)
+                     if isinstance(child.tag, str) and not _is_unwanted(child))
+
+    main_content = next((el for el in found if el is not None), None)
+    if main_content is None:
+        main_content = body if body is not None else root.find('.//body')
+    if main_content is None:
+        main_content = root
+
+    strings = (s.strip() for s in _iter_strings(main_content))
+    text = '\n'.join(s for s in strings if s)
+    return {'title': title, 'content': clean_extracted_text(text), 'source': domain}
+
+
+def extract_with_lxml(html, url: str) -> dict:
+    """
+    Extract the title and main content text of a page with lxml in a single tree walk.
+
+    Unwanted subtrees are skipped rather than removed, and every content selector of the
+    domain is matched during the same walk, keeping the first match of each (as select_one).
+
+    Args:
+        html: Raw page content (bytes or str)
+        url: The page URL, used to pick the site-specific content selectors
+
+    Returns:
+        dict with 'title', 'content' (cleaned, not truncated) and 'source' (the domain)
+    """
+    domain = urlparse(url).netloc.lower()
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return {'title': "Untitled", 'content': '', 'source': domain}
+    return _extract_from_tree(root, domain)
+
+
+class StreamingExtractor:
+    """
+    Incremental lxml extraction of a page fed chunk by chunk while it downloads.
+
+    The page is parsed as it arrives. Once the title and the element matching the
+    domain's top-priority content selector have been seen, feed() reports completion as
+    soon as that element is closed or more than max_chars characters of its cleaned text
+    are known, so the rest of the page does not need to be downloaded. The result is the
+    same as extract_with_lxml() on the full page, up to the first max_chars characters.
+    """
+
+    def __init__(self, url: str, max_chars: int, encoding: Optional[str] = None):
+        """
+        Initialize the extractor.
+
+        Args:
+            url: The page URL, used to pick the site-specific content selectors
+            max_chars: Content characters needed before the download can stop
+            encoding: Charset announced by the server (detected from the page if None)
+        """
+        self.domain = urlparse(url).netloc.lower()
+        self.max_chars = max_chars
+        self.done = False
+        try:
+            self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        except LookupError:  # Unknown charset, let libxml2 detect it
+            self._parser = etree.HTMLPullParser(events=('start', 'end'))
+        self._top_selector = _get_matchers(get_content_selectors(self.domain))[0]
+        self._unwanted_depth = 0
+        self._main = None
+        self._main_closed = False
+        self._title_seen = False
+        self._seen_lines = set()
+        self._chars = 0
+
+    def _count(self, el) -> None:
+        # Text of an element and the tails of its children are complete once it ends
+        for text in [el.text] + [child.tail for child in el]:
+            for line in (text or '').split('\n'):
+                line = line.strip()
+                if line and (line not in self._seen_lines or len(line) > 100):
+                    self._seen_lines.add(line)
+                    self._chars += len(line)
+
+    def feed(self, data: bytes) -> bool:
+        """
+        Parse the next chunk of the page.
+
+        Returns:
+            True once enough content was extracted to stop downloading
+        """
+        self._parser.feed(data)
+        for event, el in self._parser.read_events():
+            if event == 'start':
+                if self._unwanted_depth or _is_unwanted(el):
+                    self._unwanted_depth += 1
+                elif self._main is None and self._top_selector(el):
+                    self._main = el
+                continue
+
+            if el.tag == 'title':
+                self._title_seen = True
+            if self._unwanted_depth:
+                self._unwanted_depth -= 1
+            elif self._main is not None and not self._main_closed:
+                self._count(el)
+                self._main_closed = el is self._main
+
+        self.done = self._title_seen and (self._main_closed or self._chars > self.max_chars)
+        return self.done
+
+    def close(self) -> dict:
+        """Finish parsing and extract the page from the content received so far."""
+        try:
+            root = self._parser.close()
+        except etree.LxmlError:
+            root = None
+        if root is None:
+            return {'title': "Untitled", 'content': '', 'source': self.domain}
+        return _extract_from_tree(root, self.domain)
+
+
+class BufferedExtractor:
+    """Fallback for backends without incremental parsing: buffers the page and extracts it at the end."""
+
+    def __init__(self, url: str, extract: Callable):
+        self.url = url
+        self.done = False
+        self._extract = extract
+        self._chunks: List[bytes] = []
+
+    def feed(self, data: bytes) -> bool:
+        self._chunks.append(data)
+        return False
+
+    def close(self) -> dict:
+        return self._extract(b''.join(self._chunks), self.url)
+
+
+EXTRACTION_BACKENDS = {
+    'bs4': extract_with_bs4,
+    'lxml': extract_with_lxml,
+}
+
+# The missing lxml fallback is logged on the first page only
+_lxml_fallback_logged = False
+
+
+def get_extractor(backend: Optional[str] = None) -> Callable:
+    """
+    Return the extraction function of a backend.
+
+    Args:
+        backend: Backend name ('bs4' or 'lxml', defaults to HTML_EXTRACTION_BACKEND)
+
+    Returns:
+        Function (html, url) -> {'title', 'content', 'source'}
+    """
+    global _lxml_fallback_logged
+    backend = backend or HTML_EXTRACTION_BACKEND
+    if backend == 'lxml' and lxml is None:
+        if not _lxml_fallback_logged:
+            logger.warning("lxml is not installed (pip install blackwell[crawl]), "
+                           "falling back to the bs4 extraction backend")
+            _lxml_fallback_logged = True
+        backend = 'bs4'
+    if backend not in EXTRACTION_BACKENDS:
+        raise ValueError(f"Unknown extraction backend '{backend}', choose from {list(EXTRACTION_BACKENDS)}")
+    return EXTRACTION_BACKENDS[backend]
+
+
+def get_streaming_extractor(url: str, max_chars: int, encoding: Optional[str] = None,
+                            backend: Optional[str] = None):
+    """
+    Return an incremental extractor (feed(chunk) -> done, close() -> page) for a download.
+
+    Args:
+        url: The page URL
+        max_chars: Content characters needed before the download can stop
+        encoding: Charset announced by the server
+        backend: Backend name (defaults to HTML_EXTRACTION_BACKEND)
+
+    Returns:
+        A StreamingExtractor with the lxml backend, otherwise a BufferedExtractor
+    """
+    extract = get_extractor(backend)
+    if extract is extract_with_lxml:
+        return StreamingExtractor(url, max_chars, encoding)
+    return BufferedExtractor(url, extract)
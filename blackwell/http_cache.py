@@ -0,0 +1,225 @@
+"""
+HTTP Cache for Crawled Medical Pages
+
+An on-disk (SQLite) cache in front of fetch_medical_website_content. It follows the
+Cache-Control, Expires and Last-Modified response headers to decide how long a page stays
+fresh, revalidates stale pages with ETag/Last-Modified conditional GETs, and stores the
+extracted clean text together with the hash of the page body, so a hit skips both the
+network and the HTML parsing.
+"""
+
+import os
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from blackwell.config import logger, HTTP_CACHE_PATH, HTTP_CACHE_DEFAULT_TTL
+
+MAX_HEURISTIC_TTL = 24 * 3600  # Upper bound of the Last-Modified freshness heuristic
+
+
+def hash_content(content: bytes) -> str:
+    """Hash a response body to detect unchanged pages."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_age(value: Optional[str]) -> float:
+    # Age is a non-negative delta-seconds (RFC 9111), an invalid value counts as 0
+    try:
+        age = float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return age if 0 <= age < float("inf") else 0.0
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into a {directive: argument} dictionary."""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers, now: Optional[float] = None) -> Optional[float]:
+    """
+    Compute how many seconds a response stays fresh (RFC 9111).
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        now: Current timestamp
+
+    Returns:
+        Freshness lifetime in seconds, or None if the response must not be stored
+    """
+    now = now or time.time()
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+
+    age = _parse_age(headers.get("Age"))
+    for directive in ("s-maxage", "max-age"):
+        if directives.get(directive) is not None:
+            try:
+                return max(0.0, int(directives[directive]) - age)
+            except ValueError:
+                return 0
+
+    expires = _parse_http_date(headers.get("Expires"))
+    if headers.get("Expires") is not None:
+        date = _parse_http_date(headers.get("Date")) or now
+        return max(0.0, expires - date) if expires is not None else 0
+
+    # Heuristic freshness: 10% of the time since the last modification
+    last_modified = _parse_http_date(headers.get("Last-Modified"))
+    if last_modified is not None:
+        date = _parse_http_date(headers.get("Date")) or now
+        return min(max(0.0, (date - last_modified) * 0.1), MAX_HEURISTIC_TTL)
+
+    return HTTP_CACHE_DEFAULT_TTL
+
+
+@dataclass
+class CacheEntry:
+    """A cached page with its validators and extracted content."""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: float
+    content_hash: str
+    page: Dict[str, str]
+
+    def is_fresh(self) -> bool:
+        """Whether the entry can be served without contacting the server."""
+        return time.time() < self.fresh_until
+
+    def covers(self, max_chars: int) -> bool:
+        """Whether the cached content holds the first max_chars characters of the page."""
+        truncated_at = self.page.get("truncated_at")
+        return truncated_at is None or truncated_at >= max_chars
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Validators for a conditional GET revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """SQLite-backed page cache shared by all crawling threads."""
+
+    def __init__(self, path: str = HTTP_CACHE_PATH):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path to the SQLite file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fresh_until REAL NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    page TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )"""
+            )
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Return the cached entry for a URL, fresh or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, etag, last_modified, fresh_until, content_hash, page FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return CacheEntry(*row[:5], page=json.loads(row[5]))
+        except json.JSONDecodeError:
+            logger.warning(f"Dropping unreadable HTTP cache entry for {url}")
+            self.delete(url)
+            return None
+
+    def store(self, url: str, headers, content_hash: str, page: Dict[str, str]) -> None:
+        """
+        Store an extracted page, unless the response forbids it (Cache-Control: no-store).
+
+        Args:
+            url: The requested URL
+            headers: Response headers
+            content_hash: Hash of the response body
+            page: Extracted page ('title', 'content', 'source', optionally 'truncated_at')
+        """
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        if lifetime is None:
+            self.delete(url)
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get("ETag"), headers.get("Last-Modified"), now + lifetime,
+                 content_hash, json.dumps(page), now),
+            )
+
+    def refresh(self, url: str, headers) -> None:
+        """Extend the freshness of a revalidated entry (304 or unchanged body)."""
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None:
+            self.delete(url)
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                """UPDATE pages SET fresh_until = ?,
+                       etag = COALESCE(?, etag),
+                       last_modified = COALESCE(?, last_modified)
+                   WHERE url = ?""",
+                (time.time() + lifetime, headers.get("ETag"), headers.get("Last-Modified"), url),
+            )
+
+    def delete(self, url: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+
+
+# Global cache instance
+_http_cache: Optional[HttpCache] = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Get or create the global HTTP cache instance."""
+    global _http_cache
+    with _http_cache_lock:
+        if _http_cache is None:
+            _http_cache = HttpCache()
+            logger.info(f"HTTP cache opened at {HTTP_CACHE_PATH}")
+    return _http_cache
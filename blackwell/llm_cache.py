@@ -0,0 +1,223 @@
+"""
+Persistent LLM Response Cache
+
+An opt-in SQLite cache (LangChain BaseCache) for the chat models built in blackwell.config.
+Entries are keyed on the hash of the model string (model name and parameters) and the hash
+of the serialized messages, so rerunning an evaluation over the same anamnesis report
+replays identical fast_model/pro_model calls from disk instead of calling the API. Each
+entry expires after a TTL, and the least recently used entries are evicted once the cache
+holds more than a maximum number of entries.
+
+Usage (from the project root):
+    python -m blackwell.llm_cache stats
+    python -m blackwell.llm_cache purge
+    python -m blackwell.llm_cache clear
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+import warnings
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation, GenerationChunk
+
+# blackwell.config builds the models with this cache, so its logger is fetched by name
+logger = logging.getLogger("blackwell")
+
+# Classes a cached response may deserialize to
+_ALLOWED_OBJECTS = [Generation, GenerationChunk, ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk]
+_ZERO_USAGE = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _loads(text: str) -> Any:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # loads() is flagged as beta
+        return loads(text, allowed_objects=_ALLOWED_OBJECTS)
+
+
+def _replayed(generation: Generation) -> Generation:
+    # A replayed response costs no tokens, so it must not count against the TPM budgets
+    message = getattr(generation, "message", None)
+    if isinstance(message, AIMessage) and message.usage_metadata:
+        generation.message = message.model_copy(update={"usage_metadata": dict(_ZERO_USAGE)})
+    return generation
+
+
+class SQLiteLLMCache(BaseCache):
+    """SQLite-backed LLM response cache with per-entry TTL and LRU eviction."""
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: Path to the SQLite file
+            ttl: Time (s) an entry is served before it expires (None never expires)
+            max_entries: Entries kept before the least recently used are evicted (None is unbounded)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    llm_hash TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (llm_hash, prompt_hash)
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_lru ON llm_cache (last_access)")
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return the cached generations of a call, or None on a miss or an expired entry."""
+        key = (_hash(llm_string), _hash(prompt))
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE llm_hash = ? AND prompt_hash = ?", key
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                self._conn.execute("DELETE FROM llm_cache WHERE llm_hash = ? AND prompt_hash = ?", key)
+                row = None
+            if row is None:
+                self._misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE llm_hash = ? AND prompt_hash = ?",
+                (now, *key),
+            )
+            self._hits += 1
+
+        try:
+            return [_replayed(generation) for generation in _loads(row[0])]
+        except Exception as e:
+            logger.warning(f"LLM cache: unreadable entry dropped ({e})")
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM llm_cache WHERE llm_hash = ? AND prompt_hash = ?", key)
+            return None
+
+    def contains(self, prompt: str, llm_string: str) -> bool:
+        """
+        Whether a call has an unexpired entry, without serving it.
+
+        A miss is counted here, a hit when the entry is served by lookup().
+        """
+        key = (_hash(llm_string), _hash(prompt))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at FROM llm_cache WHERE llm_hash = ? AND prompt_hash = ?", key
+            ).fetchone()
+            found = row is not None and (row[0] is None or row[0] > time.time())
+            if not found:
+                self._misses += 1
+        return found
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store the generations of a call and evict the least recently used entries."""
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (_hash(llm_string), _hash(prompt), dumps(list(return_val)), now, expires_at, now),
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    """DELETE FROM llm_cache WHERE rowid IN (
+                           SELECT rowid FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_entries,),
+                )
+
+    def clear(self, **kwargs: Any) -> None:
+        """Delete every entry."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def purge_expired(self) -> int:
+        """
+        Delete the expired entries.
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits and misses of this process, and the size of the cache."""
+        with self._lock:
+            entries, replayed = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM llm_cache"
+            ).fetchone()
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "replayed_total": replayed,  # Hits of the stored entries over every run
+            }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logger.info(f"LLM cache: {stats['hits']} hits / {stats['misses']} misses "
+                    f"(hit rate {stats['hit_rate']:.0%}), {stats['entries']} entries")
+
+
+# Global cache instance
+_llm_cache: Optional[SQLiteLLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache(path: str, ttl: Optional[float] = None, max_entries: Optional[int] = None) -> SQLiteLLMCache:
+    """Get or create the global LLM cache instance."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = SQLiteLLMCache(path, ttl=ttl, max_entries=max_entries)
+            logger.info(f"LLM cache opened at {path}")
+    return _llm_cache
+
+
+if __name__ == "__main__":
+    from blackwell.config import LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the LLM response cache.")
+    parser.add_argument("command", choices=["stats", "purge", "clear"])
+    args = parser.parse_args()
+
+    cache = get_llm_cache(LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+    if args.command == "stats":
+        print(cache.stats())
+    elif args.command == "purge":
+        print(f"Purged {cache.purge_expired()} expired entries")
+    else:
+        cache.clear()
+        print("Cache cleared")
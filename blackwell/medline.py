@@ -0,0 +1,321 @@
+"""
+MedlinePlus XML Indexing Module
+
+Streams a MedlinePlus health topics release (mplus_topics_*.xml) into the vector store.
+Releases are read from a local file and parsed incrementally with iterparse, so the
+~30MB XML never has to be held in memory. When a store has already been indexed,
+only topics that are new or whose date-created changed are re-embedded.
+"""
+
+import re
+import json
+import argparse
+from typing import Dict, Iterator, List, Optional, Set
+from xml.etree import ElementTree as ET
+
+from langchain_core.documents import Document
+
+from blackwell.config import logger, DEDUP_ENABLED
+from blackwell.document_processer import (
+    build_retriever,
+    process_documents,
+    add_documents_in_batches,
+)
+from blackwell.dedupe import deduplicate_chunks
+
+MEDLINE_DOC_TYPE = "medlineplus_topic"
+
+
+def parse_health_topic(topic_elem, source_url: str) -> Dict:
+    """
+    Parse a single health-topic XML element into ONE document dictionary.
+    Matches the exact format of the original database.
+    """
+    # Extract attributes
+    topic_id = topic_elem.get('id', '')
+    title = topic_elem.get('title', '')
+    url = topic_elem.get('url', '')
+    date_created = topic_elem.get('date-created', '')
+    language = topic_elem.get('language', 'English')
+    meta_desc = topic_elem.get('meta-desc', '')
+
+    # Extract 'also-called' elements
+    also_called_list = [ac.text.strip() for ac in topic_elem.findall('also-called') if ac.text]
+    also_called_text = ', '.join(also_called_list)
+
+    # Extract full summary and clean HTML
+    full_summary = topic_elem.find('full-summary')
+    full_summary_text = full_summary.text if full_summary is not None and full_summary.text else ''
+    full_summary_clean = re.sub(r'<[^>]+>', '', full_summary_text)
+
+    # Extract primary institute
+    primary_inst = topic_elem.find('primary-institute')
+    primary_inst_text = primary_inst.text.strip() if primary_inst is not None and primary_inst.text else ''
+
+    # Extract see-reference
+    see_refs = [sr.text.strip() for sr in topic_elem.findall('see-reference') if sr.text]
+    see_also_text = ', '.join(see_refs)
+
+    # Extract groups (categories)
+    groups = [g.text.strip() for g in topic_elem.findall('group') if g.text]
+    categories_text = ', '.join(groups)
+
+    # Extract mesh headings
+    mesh_headings = [m.find('descriptor').text.strip()
+                     for m in topic_elem.findall('mesh-heading')
+                     if m.find('descriptor') is not None and m.find('descriptor').text]
+    mesh_text = ', '.join(mesh_headings)
+
+    # Extract site links grouped by category
+    links_by_category = {}
+    for site in topic_elem.findall('site'):
+        site_title = site.get('title', '')
+        site_url = site.get('url', '')
+        info_cat = site.find('information-category')
+        category = info_cat.text.strip() if info_cat is not None and info_cat.text else 'General'
+
+        if category not in links_by_category:
+            links_by_category[category] = []
+        links_by_category[category].append({'title': site_title, 'url': site_url})
+
+    # Build content
+    content_parts = []
+
+    if title:
+        content_parts.append(f"Title: {title}")
+    if meta_desc:
+        content_parts.append(f"\nDescription: {meta_desc}")
+    if also_called_text:
+        content_parts.append(f"\nAlso Called: {also_called_text}")
+    if full_summary_clean:
+        content_parts.append(f"\nFull Summary:\n{full_summary_clean}")
+    if primary_inst_text:
+        content_parts.append(f"\nPrimary Institute: {primary_inst_text}")
+    if see_also_text:
+        content_parts.append(f"\nSee Also: {see_also_text}")
+    if categories_text:
+        content_parts.append(f"\nCategories: {categories_text}")
+    if mesh_text:
+        content_parts.append(f"\nMedical Subject Headings: {mesh_text}")
+
+    # Add links grouped by category
+    if links_by_category:
+        content_parts.append("\n\nAdditional Resources:\n")
+        for category, links in links_by_category.items():
+            content_parts.append(f"\n{category}:\n")
+            for link in links:
+                content_parts.append(f"  - {link['title']}: {link['url']}\n")
+
+    content = "".join(content_parts)
+
+    # Build metadata
+    metadata = {
+        'source': source_url,
+        'topic_title': title,
+        'topic_url': url,
+        'topic_id': topic_id,
+        'date_created': date_created,
+        'num_site_links': sum(len(v) for v in links_by_category.values()),
+        'language': language,
+        'site_links': json.dumps([
+            {'title': l['title'], 'url': l['url'], 'category': cat}
+            for cat, links in links_by_category.items() for l in links
+        ]),
+        'type': MEDLINE_DOC_TYPE
+    }
+
+    return {'content': content, 'metadata': metadata}
+
+
+def iter_health_topics(xml_path: str) -> Iterator[ET.Element]:
+    """
+    Stream health-topic elements from a MedlinePlus XML release.
+
+    Each yielded element is complete (all children parsed) and is cleared as soon as
+    the caller moves on, so memory stays flat regardless of the release size.
+
+    Args:
+        xml_path: Path (or binary file object) of the mplus_topics_*.xml release
+
+    Yields:
+        health-topic XML elements
+    """
+    context = ET.iterparse(xml_path, events=("start", "end"))
+    root = None
+    for event, elem in context:
+        if root is None and event == "start":
+            root = elem
+        if event == "end" and elem.tag == "health-topic":
+            yield elem
+            # Drop the processed topic from the tree to keep memory flat
+            root.clear()
+
+
+def load_medline_documents(
+    xml_path: str, source_url: str, topic_ids: Optional[Set[str]] = None
+) -> List[Document]:
+    """
+    Parse a MedlinePlus XML release into one Document per health topic.
+
+    Args:
+        xml_path: Path of the mplus_topics_*.xml release
+        source_url: Value stored as the 'source' metadata (usually the release URL)
+        topic_ids: Only parse these topic IDs (None parses every topic)
+
+    Returns:
+        List of Documents in the format of the original database
+    """
+    documents = []
+    for topic in iter_health_topics(xml_path):
+        if topic_ids is not None and topic.get('id', '') not in topic_ids:
+            continue
+        parsed = parse_health_topic(topic, source_url)
+        documents.append(Document(page_content=parsed['content'], metadata=parsed['metadata']))
+
+    return documents
+
+
+def get_indexed_topics(vector_store) -> Dict[str, Dict]:
+    """
+    Collect the MedlinePlus topics already present in the vector store.
+
+    Args:
+        vector_store: The ChromaDB vector store instance
+
+    Returns:
+        Dictionary mapping topic_id to its 'date_created', the IDs of its chunks and the
+        topics whose duplicate chunks were dropped in favour of its chunks
+    """
+    stored = vector_store.get(where={"type": MEDLINE_DOC_TYPE}, include=["metadatas"])
+    indexed = {}
+    for chunk_id, metadata in zip(stored["ids"], stored["metadatas"]):
+        topic = indexed.setdefault(metadata.get("topic_id", ""), {
+            "date_created": metadata.get("date_created", ""),
+            "chunk_ids": [],
+            "dependent_topics": set(),
+        })
+        topic["chunk_ids"].append(chunk_id)
+        topic["dependent_topics"].update(json.loads(metadata.get("duplicate_topic_ids") or "[]"))
+
+    return indexed
+
+
+def diff_medline_release(xml_path: str, indexed: Dict[str, Dict]) -> Dict[str, Set[str]]:
+    """
+    Compare a MedlinePlus XML release against the indexed topics by topic ID and date-created.
+
+    Args:
+        xml_path: Path of the new mplus_topics_*.xml release
+        indexed: Output of get_indexed_topics()
+
+    Returns:
+        Dictionary with the 'new', 'updated', 'removed' and 'unchanged' topic ID sets
+    """
+    delta = {"new": set(), "updated": set(), "removed": set(), "unchanged": set()}
+    release_ids = set()
+    for topic in iter_health_topics(xml_path):
+        topic_id = topic.get('id', '')
+        release_ids.add(topic_id)
+        if topic_id not in indexed:
+            delta["new"].add(topic_id)
+        elif indexed[topic_id]["date_created"] != topic.get('date-created', ''):
+            delta["updated"].add(topic_id)
+        else:
+            delta["unchanged"].add(topic_id)
+
+    delta["removed"] = set(indexed) - release_ids
+    return delta
+
+
+def update_medline_index(
+    xml_path: str,
+    source_url: str,
+    vector_store=None,
+    batch_size: int = 3000,
+    pause: float = 60,
+) -> Dict[str, int]:
+    """
+    Index a MedlinePlus XML release, embedding and upserting only the changed topics.
+
+    On an empty store this indexes the whole release. On an indexed store, topics that
+    are new or whose date-created changed are re-chunked and re-embedded, the stale
+    chunks of updated topics are replaced and topics dropped from the release are removed.
+    Unchanged topics whose deduplicated content was kept only in a deleted chunk are
+    re-indexed with them.
+
+    Args:
+        xml_path: Path of the mplus_topics_*.xml release
+        source_url: Value stored as the 'source' metadata (usually the release URL)
+        vector_store: The ChromaDB vector store instance (defaults to build_retriever())
+        batch_size: Number of chunks embedded per batch
+        pause: Seconds to wait between batches to avoid rate limits
+
+    Returns:
+        Summary with the number of new, updated, removed, unchanged and re-indexed topics,
+        chunks added and chunks saved by deduplication
+    """
+    if vector_store is None:
+        vector_store = build_retriever(add_new_docs=False)
+
+    indexed = get_indexed_topics(vector_store)
+    delta = diff_medline_release(xml_path, indexed)
+    print(f"Medline release delta: {len(delta['new'])} new, {len(delta['updated'])} updated, "
+          f"{len(delta['removed'])} removed, {len(delta['unchanged'])} unchanged topics")
+
+    # Unchanged topics whose duplicate chunks were dropped in favour of a chunk about to be
+    # deleted would lose that content: they are re-indexed too (which may delete further chunks)
+    deleted = delta["updated"] | delta["removed"]
+    reindexed: Set[str] = set()
+    pending = deleted
+    while pending:
+        dependents = {dependent
+                      for topic_id in pending
+                      for dependent in indexed[topic_id]["dependent_topics"]
+                      if dependent in delta["unchanged"] and dependent not in reindexed}
+        reindexed |= dependents
+        pending = dependents
+    if reindexed:
+        print(f"Re-indexing {len(reindexed)} unchanged topics whose duplicates were kept in deleted chunks")
+    changed = delta["new"] | delta["updated"] | reindexed
+
+    # Drop the stale chunks of updated, removed and re-indexed topics
+    stale_ids = [chunk_id
+                 for topic_id in deleted | reindexed
+                 for chunk_id in indexed[topic_id]["chunk_ids"]]
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+
+    chunks_added = chunks_deduplicated = 0
+    if changed:
+        documents = load_medline_documents(xml_path, source_url, topic_ids=changed)
+        chunks = process_documents(documents)
+        if DEDUP_ENABLED:
+            chunks, dedup_report = deduplicate_chunks(chunks)
+            chunks_deduplicated = dedup_report["saved_chunks"]
+        chunks_added = add_documents_in_batches(vector_store, chunks, batch_size=batch_size, pause=pause)
+
+    summary = {
+        "new": len(delta["new"]),
+        "updated": len(delta["updated"]),
+        "removed": len(delta["removed"]),
+        "unchanged": len(delta["unchanged"]),
+        "reindexed": len(reindexed),
+        "chunks_removed": len(stale_ids),
+        "chunks_added": chunks_added,
+        "chunks_deduplicated": chunks_deduplicated,
+    }
+    logger.info(f"Medline index update from {xml_path}: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index a MedlinePlus XML release into the vector store.")
+    parser.add_argument("xml_path", help="Local path of the mplus_topics_*.xml release")
+    parser.add_argument("--source-url", default=None,
+                        help="Value stored as the 'source' metadata (defaults to the release URL)")
+    parser.add_argument("--batch-size", type=int, default=3000, help="Chunks embedded per batch")
+    parser.add_argument("--pause", type=float, default=60, help="Seconds to wait between batches")
+    args = parser.parse_args()
+
+    source = args.source_url or "https://medlineplus.gov/xml/" + args.xml_path.replace("\\", "/").split("/")[-1]
+    print(update_medline_index(args.xml_path, source, batch_size=args.batch_size, pause=args.pause))
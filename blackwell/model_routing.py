@@ -0,0 +1,100 @@
+"""
+Final Report Model Routing
+
+The final report is the slowest and most expensive call of an evaluation. This module
+decides, from the clinical certainty expert's report, whether a case needs pro_model or
+whether fast_model can write it: the expert's confidence level is turned into a score,
+lowered for each red flag it lists, and cases scoring at or above a threshold go to
+fast_model. Reports whose confidence can't be read always go to pro_model. This routing is
+opt-in (FINAL_REPORT_ROUTING = "confidence"), by default pro_model writes every final report.
+"""
+
+import re
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+from blackwell.config import (
+    logger, FINAL_REPORT_ROUTING, ROUTING_FAST_THRESHOLD, ROUTING_CONFIDENCE_SCORES, ROUTING_RED_FLAG_PENALTY
+)
+
+FAST_MODEL = "fast_model"
+PRO_MODEL = "pro_model"
+
+_CONFIDENCE = re.compile(r"Confidence Level:\**\s*\[?\s*(High|Moderate|Low)", re.IGNORECASE)
+_RED_FLAGS = re.compile(r"Red Flags[^\n]*?:\**\s*\n?(.*?)(?=\n\s*\*\*[^*\n]+:\*\*|\n\s*#|\Z)", re.IGNORECASE | re.DOTALL)
+_BULLET = re.compile(r"^\s*(?:[*\-•]|\d+[.)])\s+")
+_NO_FLAGS = re.compile(r"^\W*(none|no red flags|n/?a)\b", re.IGNORECASE)
+
+
+@dataclass
+class RoutingDecision:
+    """Model chosen for a final report and why."""
+    model: str
+    confidence: Optional[str] = None
+    red_flags: int = 0
+    score: Optional[float] = None
+    reason: str = ""
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def parse_confidence(certainty_report: str) -> Optional[str]:
+    """Confidence level ("high", "moderate" or "low") stated in a certainty report, if any."""
+    match = _CONFIDENCE.search(certainty_report or "")
+    return match.group(1).lower() if match else None
+
+
+def count_red_flags(certainty_report: str) -> int:
+    """Number of red flags listed in a certainty report ("None" counts as zero)."""
+    match = _RED_FLAGS.search(certainty_report or "")
+    if match is None:
+        return 0
+    lines = [line.strip() for line in match.group(1).splitlines() if line.strip()]
+    bullets = [line for line in lines if _BULLET.match(line)]
+    flags = [line for line in (bullets or lines) if not _NO_FLAGS.match(_BULLET.sub("", line))]
+    return len(flags)
+
+
+def confidence_score(certainty_report: str) -> Optional[float]:
+    """Routing score of a certainty report (None if its confidence level can't be read)."""
+    confidence = parse_confidence(certainty_report)
+    if confidence is None:
+        return None
+    score = ROUTING_CONFIDENCE_SCORES[confidence] - ROUTING_RED_FLAG_PENALTY * count_red_flags(certainty_report)
+    return round(max(0.0, score), 3)
+
+
+def route_final_report(certainty_report: Optional[str], policy: str = FINAL_REPORT_ROUTING,
+                       threshold: float = ROUTING_FAST_THRESHOLD) -> RoutingDecision:
+    """
+    Choose the model writing the final report of a case.
+
+    Args:
+        certainty_report: Text of the clinical certainty expert's report
+        policy: "pro" (always pro_model), "fast" (always fast_model) or "confidence"
+        threshold: Score from which the "confidence" policy uses fast_model
+
+    Returns:
+        The routing decision
+    """
+    if policy not in ("pro", "fast", "confidence"):
+        raise ValueError(f"Unknown routing policy '{policy}', choose 'pro', 'fast' or 'confidence'")
+
+    # The score is recorded under every policy, so runs with a fixed model can replay the routing
+    confidence = parse_confidence(certainty_report)
+    red_flags = count_red_flags(certainty_report)
+    score = confidence_score(certainty_report)
+    if policy == "pro":
+        decision = RoutingDecision(PRO_MODEL, confidence, red_flags, score, "policy")
+    elif policy == "fast":
+        decision = RoutingDecision(FAST_MODEL, confidence, red_flags, score, "policy")
+    elif score is None:
+        decision = RoutingDecision(PRO_MODEL, reason="confidence level not found")
+    elif score >= threshold:
+        decision = RoutingDecision(FAST_MODEL, confidence, red_flags, score, f"score {score} >= {threshold}")
+    else:
+        decision = RoutingDecision(PRO_MODEL, confidence, red_flags, score, f"score {score} < {threshold}")
+    logger.info(f"Final report routed to {decision.model} ({decision.confidence} confidence, "
+                f"{decision.red_flags} red flags: {decision.reason})")
+    return decision
@@ -0,0 +1,355 @@
+"""
+Prompt Prefix Caching
+
+The system prompts in blackwell.prompts are static and long, yet they are sent and
+prefilled again on every call. This module lets the providers reuse them:
+
+- Gemini: each static prompt is registered once per model as cached content (explicit
+  context caching, renewed when its TTL runs out). Calls starting with a registered prompt
+  are sent without it, referencing the cached content instead. Prompts the API refuses to
+  cache (e.g. below the minimum cacheable size) are sent inline as before.
+- Ollama: models are kept resident between calls (keep_alive, set in blackwell.config) and
+  system messages are moved to the front, so consecutive calls share their static prefix and
+  Ollama reuses its evaluated KV cache instead of prefilling it again.
+
+Calls sent with a cached content stay keyed in the LLM response cache (blackwell.llm_cache)
+as the same call with the prompt inline: the cached content name changes with every process
+and TTL renewal, so it is kept out of the key and identical calls are still replayed.
+
+PromptCacheMeter measures the effect per evaluation: input tokens served from the provider
+cache, prefill time (Ollama) and time to first token.
+
+Usage (from the project root):
+    python -m blackwell.prompt_cache check-key
+"""
+
+import sys
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import argparse
+import threading
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.globals import get_llm_cache
+from langchain_core.load import dumps
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import Runnable, RunnableConfig
+
+# blackwell.config wraps the models with this cache, so its logger is fetched by name
+logger = logging.getLogger("blackwell")
+
+RENEW_MARGIN = 60  # Seconds before expiry from which a cached prompt is registered again
+
+
+def _prompt_key(prompt: SystemMessage) -> str:
+    return hashlib.sha256(str(prompt.content).encode("utf-8")).hexdigest()
+
+
+def static_prefix_first(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """Move the system messages to the front (stable), so the static prefix is shared between calls."""
+    system = [message for message in messages if isinstance(message, SystemMessage)]
+    if not system or messages[:len(system)] == system:
+        return messages
+    return system + [message for message in messages if not isinstance(message, SystemMessage)]
+
+
+def response_cache_key(model, messages: List[BaseMessage], **kwargs: Any) -> Tuple[str, str]:
+    """
+    LLM response cache key (prompt, llm_string) of a call sending its messages inline.
+
+    Same key as the model's own cache lookup (see BaseChatModel._generate_with_cache).
+    """
+    normalized = [message.model_copy(update={"id": None}) if message.id is not None else message
+                  for message in messages]
+    return dumps(normalized), model._get_llm_string(**kwargs)
+
+
+def _response_cache(model) -> Optional[BaseCache]:
+    # Same resolution as the model: its own cache, else the global one unless disabled
+    if isinstance(model.cache, BaseCache):
+        return model.cache
+    return None if model.cache is False else get_llm_cache()
+
+
+def _is_cached(cache: BaseCache, prompt: str, llm_string: str) -> bool:
+    contains = getattr(cache, "contains", None)
+    return contains(prompt, llm_string) if contains is not None else cache.lookup(prompt, llm_string) is not None
+
+
+def _is_missing_cache_error(error: BaseException) -> bool:
+    message = str(error).lower()
+    return "cachedcontent" in message.replace(" ", "") or "cached content" in message
+
+
+class PromptCache:
+    """Registry of the static prompts cached on the Gemini API, per model."""
+
+    def __init__(self, ttl: int = 3600):
+        """
+        Initialize the registry.
+
+        Args:
+            ttl: Lifetime (s) of each cached prompt on the API
+        """
+        self.ttl = ttl
+        # (model name, prompt hash) -> (cached content name, or None if the prompt can't be cached; expiry)
+        self._entries: Dict[Tuple[str, str], Tuple[Optional[str], float]] = {}
+        self._lock = threading.Lock()
+
+    def cached_content(self, model, prompt: SystemMessage) -> Optional[str]:
+        """
+        Name of the cached content holding a prompt, registering it on first use.
+
+        Args:
+            model: The ChatGoogleGenerativeAI model the prompt is sent to
+            prompt: The static system prompt
+
+        Returns:
+            The cached content name, or None if the prompt must be sent inline
+        """
+        from langchain_google_genai import create_context_cache
+
+        key = (model.model, _prompt_key(prompt))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[1] - RENEW_MARGIN > time.time()):
+                return entry[0]
+            try:
+                name = create_context_cache(model, [prompt], ttl=f"{self.ttl}s")
+                logger.info(f"Prompt cache: registered a {len(prompt.content)} char prompt for {model.model} as {name}")
+            except Exception as e:
+                # Typically a prompt below the model's minimum cacheable size, never retried
+                logger.info(f"Prompt cache: prompt not cacheable for {model.model}, sending it inline ({e})")
+                name = None
+            self._entries[key] = (name, time.time() + self.ttl)
+            return name
+
+    def invalidate(self, model, prompt: SystemMessage) -> None:
+        """Forget a cached prompt (e.g. deleted on the API side), so it is registered again."""
+        with self._lock:
+            self._entries.pop((model.model, _prompt_key(prompt)), None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            cached = sum(1 for name, _ in self._entries.values() if name is not None)
+            return {"cached_prompts": cached, "inline_prompts": len(self._entries) - cached}
+
+
+class PromptCachedModel(Runnable):
+    """
+    Chat model wrapper sending registered static prompts through the prompt cache.
+
+    Only invoke/ainvoke are overridden; batch and abatch go through them.
+    """
+
+    def __init__(self, model, cache: Optional[PromptCache], static_prompts: Iterable[SystemMessage]):
+        """
+        Wrap a chat model.
+
+        Args:
+            model: The chat model
+            cache: The Gemini prompt cache (None only reorders the messages, e.g. for Ollama)
+            static_prompts: The system prompts worth caching
+        """
+        self.bound = model
+        self.cache = cache
+        self.static_keys = {_prompt_key(prompt) for prompt in static_prompts}
+        # Sends the cached content calls, whose responses are stored under the inline call's key
+        self.uncached = model.model_copy(update={"cache": False})
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose the wrapped model's attributes (model name, temperature, ...)
+        if name in ("bound", "uncached"):
+            raise AttributeError(name)
+        return getattr(self.bound, name)
+
+    def _prepare(self, messages: List[BaseMessage], kwargs: Dict) -> Tuple[List[BaseMessage], Optional[SystemMessage], Dict, Optional[Tuple]]:
+        # (messages to send, static prompt left out of them, cached content kwargs, response cache entry)
+        messages = static_prefix_first(list(messages))
+        first = messages[0] if messages else None
+        if (self.cache is None or not isinstance(first, SystemMessage)
+                or _prompt_key(first) not in self.static_keys
+                or sum(isinstance(message, SystemMessage) for message in messages) > 1):
+            return messages, None, {}, None
+        response_cache = _response_cache(self.bound)
+        entry = (response_cache, *response_cache_key(self.bound, messages, **kwargs)) if response_cache else None
+        if entry is not None and _is_cached(*entry):
+            # Replayed by the model's own cache lookup of the inline call
+            return messages, None, {}, None
+        name = self.cache.cached_content(self.bound, first)
+        if name is None:
+            return messages, None, {}, None
+        # The cached content carries the system instruction, the request must not repeat it
+        return messages[1:], first, {"cached_content": name}, entry
+
+    def invoke(self, input: List[BaseMessage], config: Optional[RunnableConfig] = None, **kwargs: Any):
+        messages, prompt, extra, entry = self._prepare(input, kwargs)
+        if prompt is None:
+            return self.bound.invoke(messages, config, **kwargs)
+        try:
+            response = (self.uncached if entry else self.bound).invoke(messages, config, **extra, **kwargs)
+        except Exception as e:
+            if not _is_missing_cache_error(e):
+                raise
+            logger.warning(f"Prompt cache: cached content unavailable, sending the prompt inline ({e})")
+            self.cache.invalidate(self.bound, prompt)
+            return self.bound.invoke([prompt] + messages, config, **kwargs)
+        if entry is not None:
+            entry[0].update(entry[1], entry[2], [ChatGeneration(message=response)])
+        return response
+
+    async def ainvoke(self, input: List[BaseMessage], config: Optional[RunnableConfig] = None, **kwargs: Any):
+        # Registering a prompt and looking up the response cache are blocking, kept off the event loop
+        messages, prompt, extra, entry = await asyncio.to_thread(self._prepare, input, kwargs)
+        if prompt is None:
+            return await self.bound.ainvoke(messages, config, **kwargs)
+        try:
+            response = await (self.uncached if entry else self.bound).ainvoke(messages, config, **extra, **kwargs)
+        except Exception as e:
+            if not _is_missing_cache_error(e):
+                raise
+            logger.warning(f"Prompt cache: cached content unavailable, sending the prompt inline ({e})")
+            self.cache.invalidate(self.bound, prompt)
+            return await self.bound.ainvoke([prompt] + messages, config, **kwargs)
+        if entry is not None:
+            await asyncio.to_thread(entry[0].update, entry[1], entry[2], [ChatGeneration(message=response)])
+        return response
+
+
+def with_prompt_cache(model, cache: Optional[PromptCache], static_prompts: Iterable[SystemMessage]) -> PromptCachedModel:
+    """Wrap a chat model so its static prompts go through the prompt cache."""
+    return PromptCachedModel(model, cache, static_prompts)
+
+
+class PromptCacheMeter(BaseCallbackHandler):
+    """
+    Collects, for one evaluation, the input tokens served from the provider cache and the
+    prefill latency of every chat model call (agents included).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, float] = {}
+        self._first_token: Dict[UUID, float] = {}
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.first_token_seconds = {"cached": [], "uncached": []}
+        self.prefill_seconds = 0.0  # Ollama prompt evaluation time
+        self.load_seconds = 0.0  # Ollama model load time
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *,
+                            run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._first_token.setdefault(run_id, time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        first_token = self._first_token.pop(run_id, None) or time.perf_counter()
+        input_tokens = cached_tokens = 0
+        prefill = load = 0.0
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+                metadata = getattr(message, "response_metadata", None) or {}
+                prefill += (metadata.get("prompt_eval_duration") or 0) / 1e9
+                load += (metadata.get("load_duration") or 0) / 1e9
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached_tokens
+            self.prefill_seconds += prefill
+            self.load_seconds += load
+            if started is not None:
+                self.first_token_seconds["cached" if cached_tokens else "uncached"].append(first_token - started)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+        self._first_token.pop(run_id, None)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals of the evaluation."""
+        with self._lock:
+            latency = {
+                kind: round(sum(values) / len(values), 2) if values else None
+                for kind, values in self.first_token_seconds.items()
+            }
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cached_input_tokens": self.cached_tokens,
+                "cached_ratio": round(self.cached_tokens / self.input_tokens, 3) if self.input_tokens else 0.0,
+                "avg_first_token_seconds_cached": latency["cached"],
+                "avg_first_token_seconds_uncached": latency["uncached"],
+                "ollama_prefill_seconds": round(self.prefill_seconds, 2),
+                "ollama_load_seconds": round(self.load_seconds, 2),
+            }
+
+    def log_summary(self) -> None:
+        summary = self.summary()
+        cached, uncached = (f"{seconds}s" if seconds is not None else "n/a" for seconds in
+                            (summary["avg_first_token_seconds_cached"], summary["avg_first_token_seconds_uncached"]))
+        logger.info(
+            f"Prompt cache: {summary['cached_input_tokens']}/{summary['input_tokens']} input tokens served "
+            f"from cache over {summary['calls']} calls ({summary['cached_ratio']:.0%}), time to first token "
+            f"{cached} cached vs {uncached} uncached, Ollama prefill {summary['ollama_prefill_seconds']}s / load {summary['ollama_load_seconds']}s"
+        )
+
+
+def _static_call_key() -> Dict[str, str]:
+    # Key of a static-prompt fast_model call, with a cached content name unique to this process
+    from langchain_core.caches import InMemoryCache
+    from langchain_core.globals import set_llm_cache
+    from blackwell.config import fast_model
+    from blackwell.prompts import STATIC_PROMPTS
+    from blackwell.registry import resolve
+    from blackwell.prompt_cache import PromptCachedModel  # The wrapper class, not this script's copy
+
+    model = resolve(fast_model)
+    if not isinstance(model, PromptCachedModel) or model.cache is None:
+        raise SystemExit("The prompt cache is disabled (PROMPT_CACHE_ENABLED, LOCAL_LLMS), nothing to check")
+    prompt = STATIC_PROMPTS[0]
+    name = f"cachedContents/{uuid.uuid4().hex}"
+    model.cache._entries[(model.bound.model, _prompt_key(prompt))] = (name, time.time() + model.cache.ttl)
+    if model.bound.cache is None:
+        set_llm_cache(InMemoryCache())
+    _, _, extra, entry = model._prepare([prompt, HumanMessage(content="Patient reports a headache.")], {})
+    return {"cached_content": extra["cached_content"],
+            "prompt": hashlib.sha256(entry[1].encode()).hexdigest(),
+            "llm_string": hashlib.sha256(entry[2].encode()).hexdigest()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the prompt cache against the LLM response cache.")
+    parser.add_argument("command", choices=["check-key", "key"],
+                        help="check-key: compare the response cache key of the same call in two processes")
+    args = parser.parse_args()
+
+    if args.command == "key":
+        print(json.dumps(_static_call_key()))
+    else:
+        keys = []
+        for _ in range(2):
+            child = subprocess.run([sys.executable, "-m", "blackwell.prompt_cache", "key"], capture_output=True, text=True)
+            if child.returncode != 0:
+                sys.exit(child.stderr.strip() or child.stdout.strip())
+            keys.append(json.loads(child.stdout.strip().splitlines()[-1]))
+        for key in keys:
+            print(key)
+        same = all(keys[0][part] == keys[1][part] for part in ("prompt", "llm_string"))
+        print("Same response cache key in both processes" if same else "Response cache keys differ between processes")
+        sys.exit(0 if same else 1)
@@ -1,4 +1,4 @@
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import HumanMessage, SystemMessage
 
 pubmed_research_agent_prompt = SystemMessage(
     content="""# IDENTITY AND MISSION
@@ -791,3 +791,36 @@ Your response must begin with the [DOCUMENT_ANALYSIS_REPORT] tag and follow this
 ---
 """
 )
+
+report_compaction_prompt = SystemMessage(
+    content="""# IDENTITY AND MISSION
+You are a "Clinical Evidence Compressor." You receive a research report gathered for a patient's diagnosis and treatment. Your mission is to shorten it to at most **{target_words} words** so it can be passed on to the treatment planning step.
+
+# CRITICAL DIRECTIVES
+1.  **Extractive Only:** Copy the most relevant sentences and bullet points verbatim. Do not paraphrase, interpret, or add any information that is not in the report.
+2.  **Keep Clinical Specifics:** Prefer sentences containing drug names, doses, durations, contraindications, diagnostic criteria, exam indications, and evidence levels or study results.
+3.  **Keep Attribution:** Keep the source names, file names, PMIDs and URLs attached to the facts you keep.
+4.  **Keep Structure:** Keep the section headers of the report that still have content under them.
+5.  **No References Section:** The report's references are appended back unchanged after your output, do not write them.
+
+Your response must be just the compacted report.
+"""
+)
+
+research_resume_prompt = HumanMessage(
+    content="""Your previous answer could not be used: it was empty, truncated or missing its **References:** section.
+Do not repeat the searches you already made. Using the tool results above (and new tool calls only if they are not enough), write the complete research report again, ending with a **References:** section listing every source you cite."""
+)
+
+# Static prompts sent as the prefix of fast_model/pro_model calls, registered with the prompt cache
+STATIC_PROMPTS = [
+    h_analyze_query_prompt,
+    t_analyze_query_prompt,
+    clinical_certainty_prompt,
+    investigative_workup_prompt,
+    hypothesis_synthesis_prompt,
+    treatment_eval_prompt,
+    final_report_prompt,
+    anamnesis_prompt,
+    document_analysis_prompt,
+]
@@ -5,11 +5,14 @@ A streamlined library for researching treatment options from PubMed given diagno
 
 import requests
 import time
+import threading
 from typing import List, Dict, Optional, Any
 from xml.etree import ElementTree as ET
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+from blackwell.telemetry import record_sleep
+
 
 @dataclass
 class PubMedArticle:
@@ -73,13 +76,18 @@ class PubMedClient:
         self.tool = tool
         self.rate_limit = 0.34 if not api_key else 0.1  # seconds between requests
         self.last_request_time = 0
+        self._rate_lock = threading.Lock()  # The tools call the client from concurrent evaluations
     
     def _wait_for_rate_limit(self):
         """Ensure we don't exceed API rate limits."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.rate_limit:
-            time.sleep(self.rate_limit - elapsed)
-        self.last_request_time = time.time()
+        with self._rate_lock:
+            # Reserve the next request slot, then wait for it outside the lock
+            slot = max(time.time(), self.last_request_time + self.rate_limit)
+            self.last_request_time = slot
+        delay = slot - time.time()
+        if delay > 0:
+            time.sleep(delay)
+            record_sleep("rate_limit", delay)
     
     def _build_params(self, **kwargs) -> Dict[str, str]:
         """Build common parameters for API requests."""
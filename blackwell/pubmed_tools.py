@@ -5,6 +5,7 @@ This module provides ready-to-use LangChain tools for integrating PubMed researc
 into your clinical decision support agents.
 """
 
+import asyncio
 from typing import Optional
 from langchain_core.tools import StructuredTool
 from pydantic import BaseModel, Field
@@ -92,9 +93,27 @@ def _get_treatment_guidelines_func(diagnosis: str, max_results: int = 5) -> str:
     return researcher.format_results_for_llm(results)
 
 
+# Async variants: the PubMed client is blocking, so calls run in a worker thread and
+# leave the event loop free for other evaluations
+async def _aresearch_treatment_options_func(diagnosis: str, max_results: int = 10) -> str:
+    """Async version of research_treatment_options."""
+    return await asyncio.to_thread(_research_treatment_options_func, diagnosis, max_results)
+
+
+async def _aresearch_specific_treatment_efficacy_func(diagnosis: str, treatment: str, max_results: int = 8) -> str:
+    """Async version of research_specific_treatment_efficacy."""
+    return await asyncio.to_thread(_research_specific_treatment_efficacy_func, diagnosis, treatment, max_results)
+
+
+async def _aget_treatment_guidelines_func(diagnosis: str, max_results: int = 5) -> str:
+    """Async version of get_treatment_guidelines."""
+    return await asyncio.to_thread(_get_treatment_guidelines_func, diagnosis, max_results)
+
+
 # Create structured tools
 research_treatment_options = StructuredTool.from_function(
     func=_research_treatment_options_func,
+    coroutine=_aresearch_treatment_options_func,
     name="research_treatment_options",
     description=(
         "Research treatment options for a given diagnosis from PubMed. "
@@ -106,6 +125,7 @@ research_treatment_options = StructuredTool.from_function(
 
 research_specific_treatment_efficacy = StructuredTool.from_function(
     func=_research_specific_treatment_efficacy_func,
+    coroutine=_aresearch_specific_treatment_efficacy_func,
     name="research_specific_treatment_efficacy",
     description=(
         "Research the efficacy of a specific treatment for a given diagnosis. "
@@ -117,6 +137,7 @@ research_specific_treatment_efficacy = StructuredTool.from_function(
 
 get_treatment_guidelines = StructuredTool.from_function(
     func=_get_treatment_guidelines_func,
+    coroutine=_aget_treatment_guidelines_func,
     name="get_treatment_guidelines",
     description=(
         "Find clinical practice guidelines and recommendations for treating a diagnosis. "
@@ -5,26 +5,38 @@ This module provides ready-to-use LangChain tools for integrating vector store r
 and web crawling into your clinical decision support agents.
 """
 
+import time
+import asyncio
 from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.tools import StructuredTool
 from langchain_core.documents import Document
 from pydantic import BaseModel, Field
-from blackwell.utils import fetch_medical_website_content
+from blackwell.config import logger
+from blackwell.utils import crawl_urls
+from blackwell.web_kb import WEB_PAGE_DOC_TYPE, index_crawled_pages, not_expired_filter
 
 
-# Global vector store instance
+# Global vector store instances
 _vector_store = None
+_web_store = None
 
+# Crawled pages are embedded in the background so the crawl tool returns right away
+_indexing_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="web-kb-indexer")
 
-def initialize_rag_tools(vector_store):
+
+def initialize_rag_tools(vector_store, web_store=None):
     """
     Initialize the RAG tools with a vector store.
     
     Args:
         vector_store: The ChromaDB vector store instance
+        web_store: Optional vector store of crawled pages (see blackwell.web_kb). When set,
+                   crawled pages are indexed into it and retrieve_documents searches it too.
     """
-    global _vector_store
+    global _vector_store, _web_store
     _vector_store = vector_store
+    _web_store = web_store
 
 
 def get_vector_store():
@@ -35,6 +47,21 @@ def get_vector_store():
     return _vector_store
 
 
+def get_web_store():
+    """Get the vector store of crawled pages (None if the web knowledge base is disabled)."""
+    return _web_store
+
+
+def _index_pages_in_background(results: List[dict]) -> None:
+    def index():
+        try:
+            index_crawled_pages(_web_store, results)
+        except Exception as e:
+            logger.error(f"Error indexing crawled pages: {e}")
+
+    _indexing_executor.submit(index)
+
+
 # Pydantic models for tool arguments
 class RetrieveDocumentsInput(BaseModel):
     """Input schema for retrieve_documents tool."""
@@ -54,7 +81,8 @@ def _retrieve_documents_func(query: str, k: int = 10) -> str:
     
     This tool searches through the local knowledge base of medical documents (PDFs, texts, etc.)
     that have been indexed in the vector database. Use this to find relevant information from
-    your curated medical literature collection.
+    your curated medical literature collection. Pages crawled earlier (and not expired) are
+    searched as well, and both result sets are merged by similarity score.
     
     Args:
         query: The search query describing the medical information needed
@@ -69,8 +97,13 @@ def _retrieve_documents_func(query: str, k: int = 10) -> str:
         if not query or query.strip() == "":
             return "Error: Query cannot be empty. Please provide a specific search query."
         
-        # Perform similarity search
-        retrieved_docs: List[Document] = vector_store.similarity_search(query, k=k)
+        # Perform similarity search, merging the crawled pages by distance
+        results = vector_store.similarity_search_with_score(query, k=k)
+        web_store = get_web_store()
+        if web_store is not None:
+            results += web_store.similarity_search_with_score(query, k=k, filter=not_expired_filter())
+            results = sorted(results, key=lambda result: result[1])[:k]
+        retrieved_docs: List[Document] = [doc for doc, _ in results]
         
         if not retrieved_docs:
             return f"No documents found for query: '{query}'. Try rephrasing or broadening your search."
@@ -85,7 +118,11 @@ def _retrieve_documents_func(query: str, k: int = 10) -> str:
             page = doc.metadata.get('page', 'N/A')
             
             formatted_results.append(f"\n[Document {idx}/{len(retrieved_docs)}]")
-            formatted_results.append(f"Source: {source} (Page: {page})")
+            if doc.metadata.get('type') == WEB_PAGE_DOC_TYPE:
+                fetched = time.strftime('%Y-%m-%d', time.localtime(doc.metadata.get('fetched_at', 0)))
+                formatted_results.append(f"Source: {source} (Crawled: {fetched})")
+            else:
+                formatted_results.append(f"Source: {source} (Page: {page})")
             formatted_results.append("-" * 80)
             formatted_results.append(doc.page_content)
             formatted_results.append("=" * 80)
@@ -129,14 +166,16 @@ def _web_crawl_medline_func(urls: str) -> str:
         formatted_results.append(f"Web Crawling {len(url_list)} medical websites...\n")
         formatted_results.append("=" * 80)
         
-        for idx, url in enumerate(url_list, 1):
+        # Fetch the websites concurrently, results come back in input order
+        results = crawl_urls(url_list)
+        if get_web_store() is not None:
+            _index_pages_in_background(results)
+        
+        for idx, (url, result) in enumerate(zip(url_list, results), 1):
             formatted_results.append(f"\n[Website {idx}/{len(url_list)}]")
             formatted_results.append(f"URL: {url}")
             formatted_results.append("-" * 80)
             
-            # Fetch the website content
-            result = fetch_medical_website_content(url)
-            
             if result.get('success', False):
                 formatted_results.append(f"Title: {result.get('title', 'N/A')}")
                 formatted_results.append(f"Source: {result.get('source', 'N/A')}")
@@ -154,9 +193,22 @@ def _web_crawl_medline_func(urls: str) -> str:
         return f"Error during web crawling: {str(e)}"
 
 
+# Async variants: Chroma and the crawler are blocking, so calls run in a worker thread and
+# leave the event loop free for other evaluations
+async def _aretrieve_documents_func(query: str, k: int = 10) -> str:
+    """Async version of retrieve_documents."""
+    return await asyncio.to_thread(_retrieve_documents_func, query, k)
+
+
+async def _aweb_crawl_medline_func(urls: str) -> str:
+    """Async version of web_crawl_medline."""
+    return await asyncio.to_thread(_web_crawl_medline_func, urls)
+
+
 # Create structured tools
 retrieve_documents = StructuredTool.from_function(
     func=_retrieve_documents_func,
+    coroutine=_aretrieve_documents_func,
     name="retrieve_documents",
     description=(
         "Retrieve relevant medical documents from the local vector database using similarity search. "
@@ -170,6 +222,7 @@ retrieve_documents = StructuredTool.from_function(
 
 web_crawl_medline = StructuredTool.from_function(
     func=_web_crawl_medline_func,
+    coroutine=_aweb_crawl_medline_func,
     name="web_crawl_medline",
     description=(
         "Crawl trusted medical websites to extract health information. "
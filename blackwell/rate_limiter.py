@@ -0,0 +1,236 @@
+"""
+Adaptive LLM Rate Limiting
+
+Every chat model shares a ModelRateLimiter (passed as its rate_limiter) that tracks the
+requests and tokens of the last minute, so calls are only delayed when the RPM or TPM
+budget is actually exhausted. A RateLimitCallback attached to the same model records the
+tokens used by each call and backs off exponentially after quota errors (429 /
+RESOURCE_EXHAUSTED), honouring the retry delay suggested by the API. Because limiter and
+callback live on the model, calls made inside agents are limited as well.
+"""
+
+import re
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from blackwell.telemetry import record_sleep
+
+# blackwell.config builds the models with these limiters, so its logger is fetched by name
+logger = logging.getLogger("blackwell")
+
+WINDOW = 60.0  # Seconds covered by the RPM/TPM budgets
+MAX_BACKOFF = 300.0  # Upper bound (s) of the quota error backoff
+_RETRY_DELAY = re.compile(r"retry(?:[ _-]?delay)?['\"]?\s*(?:in|:)\s*['\"]?(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+# Exception classes of the providers' rate limit errors (langchain_core ModelRateLimitError,
+# google.api_core ResourceExhausted/TooManyRequests), matched by name so none must be installed
+_QUOTA_ERROR_TYPES = {"ModelRateLimitError", "ResourceExhausted", "TooManyRequests"}
+
+
+def _status_code(error: BaseException) -> Any:
+    # google.genai APIError (code, status), ollama ResponseError (status_code), httpx/requests (response)
+    if getattr(error, "status", None) == "RESOURCE_EXHAUSTED":
+        return 429
+    for code in (getattr(error, "code", None), getattr(error, "status_code", None),
+                 getattr(getattr(error, "response", None), "status_code", None)):
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """
+    Whether an exception (or the exception it was raised from) reports an exhausted API
+    quota or rate limit, from its type or HTTP status code rather than its message.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if _QUOTA_ERROR_TYPES & {cls.__name__ for cls in type(error).__mro__} or _status_code(error) == 429:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def suggested_retry_delay(error: BaseException) -> Optional[float]:
+    """Retry delay (s) suggested in a quota error message, if any."""
+    match = _RETRY_DELAY.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class ModelRateLimiter(BaseRateLimiter):
+    """
+    Sliding-window RPM/TPM limiter for one model, safe to share between threads and
+    event loops.
+    """
+
+    def __init__(self, name: str, rpm: int, tpm: int, backoff: float = 15.0, check_every: float = 0.1):
+        """
+        Initialize the limiter.
+
+        Args:
+            name: Model name used in the logs
+            rpm: Requests allowed per minute
+            tpm: Tokens allowed per minute
+            backoff: Initial wait (s) after a quota error, doubled on consecutive errors
+            check_every: Polling interval (s) while waiting for the budget
+        """
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.backoff = backoff
+        self.check_every = check_every
+        self._requests: deque = deque()  # Start times of the requests in the window
+        self._tokens: deque = deque()  # (time, tokens) used in the window
+        self._token_total = 0
+        self._blocked_until = 0.0
+        self._quota_errors = 0
+        self._waited = 0.0
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._requests and now - self._requests[0] >= WINDOW:
+            self._requests.popleft()
+        while self._tokens and now - self._tokens[0][0] >= WINDOW:
+            self._token_total -= self._tokens.popleft()[1]
+
+    def _try_acquire(self) -> Tuple[bool, float]:
+        """Take a request slot if the budget allows it, otherwise return the time to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            waits = []
+            if now < self._blocked_until:
+                waits.append(self._blocked_until - now)
+            if len(self._requests) >= self.rpm:
+                waits.append(WINDOW - (now - self._requests[0]))
+            if self._token_total >= self.tpm:
+                # Wait until enough of the oldest usage leaves the window
+                excess = self._token_total - self.tpm
+                for used_at, tokens in self._tokens:
+                    excess -= tokens
+                    if excess < 0:
+                        waits.append(WINDOW - (now - used_at))
+                        break
+            if waits:
+                return False, max(waits)
+            self._requests.append(now)
+            return True, 0.0
+
+    def _log_wait(self, wait: float) -> None:
+        with self._lock:
+            self._waited += wait
+        logger.info(f"Rate limiter {self.name}: budget exhausted, waiting {wait:.1f}s")
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        ok, wait = self._try_acquire()
+        if ok or not blocking:
+            return ok
+        self._log_wait(wait)
+        started = time.monotonic()
+        while not ok:
+            time.sleep(max(self.check_every, min(wait, WINDOW)))
+            ok, wait = self._try_acquire()
+        record_sleep("rate_limit", time.monotonic() - started)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        ok, wait = self._try_acquire()
+        if ok or not blocking:
+            return ok
+        self._log_wait(wait)
+        started = time.monotonic()
+        while not ok:
+            await asyncio.sleep(max(self.check_every, min(wait, WINDOW)))
+            ok, wait = self._try_acquire()
+        record_sleep("rate_limit", time.monotonic() - started)
+        return True
+
+    def record_tokens(self, tokens: int) -> None:
+        """Count the tokens used by a completed call against the TPM budget."""
+        with self._lock:
+            self._tokens.append((time.monotonic(), tokens))
+            self._token_total += tokens
+            self._quota_errors = 0
+
+    def report_quota_error(self, retry_after: Optional[float] = None) -> float:
+        """
+        Block new calls after a quota error.
+
+        Args:
+            retry_after: Delay (s) suggested by the API, overrides the exponential backoff
+
+        Returns:
+            The backoff applied in seconds
+        """
+        with self._lock:
+            self._quota_errors += 1
+            delay = retry_after or min(MAX_BACKOFF, self.backoff * 2 ** (self._quota_errors - 1))
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        logger.warning(f"Rate limiter {self.name}: quota error, backing off for {delay:.1f}s")
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        """Current usage of the budgets and the total time calls spent waiting."""
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                "requests_last_minute": len(self._requests),
+                "tokens_last_minute": self._token_total,
+                "quota_errors": self._quota_errors,
+                "waited_seconds": round(self._waited, 1),
+            }
+
+
+class RateLimitCallback(BaseCallbackHandler):
+    """Feeds token usage and quota errors of a model's calls back into its limiter."""
+
+    def __init__(self, limiter: ModelRateLimiter):
+        self.limiter = limiter
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                tokens += usage.get("total_tokens", 0)
+        if not tokens and response.llm_output:
+            tokens = (response.llm_output.get("token_usage") or {}).get("total_tokens", 0)
+        self.limiter.record_tokens(tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        if is_quota_error(error):
+            self.limiter.report_quota_error(suggested_retry_delay(error))
+
+
+# Limiters shared by every model instance with the same name
+_limiters: Dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rpm: int, tpm: int, backoff: float = 15.0) -> ModelRateLimiter:
+    """Get or create the shared limiter of a model."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = ModelRateLimiter(name, rpm, tpm, backoff)
+        return _limiters[name]
+
+
+def rate_limited(name: str, rpm: int, tpm: int, backoff: float = 15.0) -> Dict[str, Any]:
+    """
+    Keyword arguments attaching the shared limiter of a model to a chat model constructor.
+
+    Example:
+        >>> fast_model = ChatGoogleGenerativeAI(model="gemini-2.5-flash", **rate_limited("fast_model", 10, 250000))
+    """
+    limiter = get_rate_limiter(name, rpm, tpm, backoff)
+    return {"rate_limiter": limiter, "callbacks": [RateLimitCallback(limiter)]}
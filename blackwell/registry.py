@@ -0,0 +1,140 @@
+"""
+Lazy Component Registry
+
+The expensive resources of the package (chat and embedding model clients, vector stores,
+agents, compiled graphs) are registered here with a factory instead of being built when
+their module is imported. Each component is built once, on first use, and shared
+afterwards. register() returns a LazyComponent proxy that modules expose under the usual
+name, so existing imports keep working:
+
+    >>> from blackwell.config import fast_model  # Nothing is built yet
+    >>> fast_model.invoke(messages)  # Builds the client, then calls it
+
+warmup() builds the registered components ahead of time, e.g. when the web server starts,
+so the first request doesn't pay for them.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Imported by blackwell.config, so its logger is fetched by name
+logger = logging.getLogger("blackwell")
+
+
+class ComponentRegistry:
+    """Named components built by their factory on first use."""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._components: Dict[str, Any] = {}
+        self._build_seconds: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> "LazyComponent":
+        """
+        Register a component (registering a name again replaces it, unbuilt).
+
+        Args:
+            name: Name of the component
+            factory: Callable building it, may get other components
+
+        Returns:
+            A proxy building the component on first attribute access
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._components.pop(name, None)
+            self._build_seconds.pop(name, None)
+            self._locks.setdefault(name, threading.Lock())
+        return LazyComponent(self, name)
+
+    def get(self, name: str) -> Any:
+        """The component registered under a name, built if it wasn't yet."""
+        try:
+            return self._components[name]
+        except KeyError:
+            pass
+        if name not in self._factories:
+            raise KeyError(f"Unknown component '{name}', registered: {', '.join(self._factories)}")
+        # One lock per component: concurrent first uses wait for a single build, and a
+        # factory can get the components it depends on
+        with self._locks[name]:
+            if name not in self._components:
+                start = time.perf_counter()
+                component = self._factories[name]()
+                self._build_seconds[name] = round(time.perf_counter() - start, 3)
+                self._components[name] = component
+                logger.info(f"Registry: built {name} in {self._build_seconds[name]}s")
+        return self._components[name]
+
+    def is_built(self, name: str) -> bool:
+        return name in self._components
+
+    def names(self) -> list:
+        with self._lock:
+            return list(self._factories)
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, Optional[float]]:
+        """
+        Build components ahead of their first use.
+
+        A component that fails to build is logged and skipped (its first use raises again).
+
+        Args:
+            names: Components to build (default: all, in registration order)
+
+        Returns:
+            Build time (s) of each component (0.0 if it was already built, None if it failed)
+        """
+        timings: Dict[str, Optional[float]] = {}
+        for name in list(names) if names is not None else self.names():
+            if self.is_built(name):
+                timings[name] = 0.0
+                continue
+            try:
+                self.get(name)
+                timings[name] = self._build_seconds.get(name, 0.0)
+            except Exception as e:
+                logger.error(f"Registry: warmup of {name} failed: {e}")
+                timings[name] = None
+        return timings
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "registered": len(self._factories),
+                "built": len(self._components),
+                "build_seconds": dict(self._build_seconds),
+            }
+
+
+class LazyComponent:
+    """Stand-in for a registered component, forwarding attribute access to the built component."""
+
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: ComponentRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._registry.get(self._name), attr)
+
+    def __repr__(self) -> str:
+        if self._registry.is_built(self._name):
+            return repr(self._registry.get(self._name))
+        return f"<lazy component '{self._name}' (not built)>"
+
+
+def resolve(component: Any) -> Any:
+    """The built component behind a LazyComponent (other values are returned as is)."""
+    if isinstance(component, LazyComponent):
+        return component._registry.get(component._name)
+    return component
+
+
+# Components of the package (models in blackwell.config, vector stores and graphs in the agents)
+registry = ComponentRegistry()
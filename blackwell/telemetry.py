@@ -0,0 +1,290 @@
+"""
+Evaluator Telemetry
+
+Per-node spans of an evaluation. instrument_node wraps a graph node so that, while it runs,
+a SpanRecorder is attached to every LangChain run started inside it (registered as a
+configure hook, so the chat model calls and the tool calls of the agents are seen without
+passing callbacks around). Each node attempt yields a JSON-serializable span:
+
+    {"name": "rag_research", "kind": "node", "attempt": 1, "status": "ok", "start": ..., "end": ...,
+     "duration": 12.4, "llm": {"calls": 4, "seconds": 9.1, "input_tokens": ..., "output_tokens": ...,
+     "retries": 0}, "tools": {"calls": 3, "seconds": 2.8, "by_name": {"retrieve_documents": 2, ...}},
+     "sleep": {"rate_limit": 0.0, "retry_backoff": 0.0}, "children": [<llm and tool spans>]}
+
+The spans are added to the graph state (metrics) together with the spans of the failed
+attempts before them, and can be exported as JSON lines for latency breakdowns per case.
+"""
+
+import json
+import time
+import inspect
+import logging
+import threading
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+from langgraph.runtime import get_runtime
+
+# Imported by blackwell.rate_limiter (through blackwell.config), so its logger is fetched by name
+logger = logging.getLogger("blackwell")
+
+
+class SpanRecorder(BaseCallbackHandler):
+    """Collects the chat model and tool runs of one node attempt."""
+
+    def __init__(self, name: str, attempt: int = 1):
+        self.name = name
+        self.attempt = attempt
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.children: List[Dict[str, Any]] = []
+        self.sleep = {"rate_limit": 0.0, "retry_backoff": 0.0}
+        self.llm_retries = 0
+        self._open: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, kind: str, name: str) -> None:
+        with self._lock:
+            self._open[run_id] = {"name": name, "kind": kind, "start": time.time()}
+
+    def _finish(self, run_id: UUID, **fields: Any) -> None:
+        with self._lock:
+            child = self._open.pop(run_id, None)
+            if child is None:
+                return
+            child["end"] = time.time()
+            child["duration"] = round(child["end"] - child["start"], 3)
+            child.update(fields)
+            self.children.append(child)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name", "chat_model")
+        self._start(run_id, "llm", model)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+        self._finish(run_id, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=str(error), input_tokens=0, output_tokens=0)
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self.llm_retries += 1
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "tool", (serialized or {}).get("name") or kwargs.get("name") or "tool")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=str(error))
+
+    def add_sleep(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self.sleep[kind] = self.sleep.get(kind, 0.0) + seconds
+
+    def close(self, error: Optional[BaseException] = None) -> Dict[str, Any]:
+        """Finish the span and return it as a dict."""
+        self.end = time.time()
+        if error is not None:
+            self.status, self.error = "error", f"{type(error).__name__}: {error}"
+        with self._lock:
+            children = sorted(self.children, key=lambda child: child["start"])
+        llm = [child for child in children if child["kind"] == "llm"]
+        tools = [child for child in children if child["kind"] == "tool"]
+        by_name: Dict[str, int] = {}
+        for tool in tools:
+            by_name[tool["name"]] = by_name.get(tool["name"], 0) + 1
+        return {
+            "name": self.name,
+            "kind": "node",
+            "attempt": self.attempt,
+            "status": self.status,
+            "error": self.error,
+            "start": self.start,
+            "end": self.end,
+            "duration": round(self.end - self.start, 3),
+            "llm": {
+                "calls": len(llm),
+                "seconds": round(sum(child["duration"] for child in llm), 3),
+                "input_tokens": sum(child["input_tokens"] for child in llm),
+                "output_tokens": sum(child["output_tokens"] for child in llm),
+                "retries": self.llm_retries,
+            },
+            "tools": {
+                "calls": len(tools),
+                "seconds": round(sum(child["duration"] for child in tools), 3),
+                "by_name": by_name,
+            },
+            "sleep": {kind: round(seconds, 3) for kind, seconds in self.sleep.items()},
+            "children": children,
+        }
+
+
+# Recorder of the node attempt running in the current context
+_current_recorder: ContextVar[Optional[SpanRecorder]] = ContextVar("blackwell_span_recorder", default=None)
+register_configure_hook(_current_recorder, inheritable=True)
+
+# Spans of failed node attempts, by graph task, added to the state with the attempt that succeeds
+FAILED_SPANS_TTL = 3600  # Time (s) the spans of a failed attempt wait for a retry (a node out of retries never has one)
+_failed_spans: Dict[str, List[Dict[str, Any]]] = {}
+_failed_spans_lock = threading.Lock()
+
+
+def record_sleep(kind: str, seconds: float) -> None:
+    """Count time spent sleeping (e.g. waiting for a rate limiter) against the running node."""
+    recorder = _current_recorder.get()
+    if recorder is not None and seconds > 0:
+        recorder.add_sleep(kind, seconds)
+
+
+def _graph_task():
+    # (task id, attempt) of the running graph task, (None, 1) outside a graph or before
+    # langgraph 1.1.3 (no execution info)
+    try:
+        info = getattr(get_runtime(), "execution_info", None)
+    except RuntimeError:
+        info = None
+    if info is None:
+        return None, 1
+    return info.task_id, info.node_attempt
+
+
+def _begin(name: str):
+    task_id, attempt = _graph_task()
+    recorder = SpanRecorder(name, attempt)
+    with _failed_spans_lock:
+        failed = _failed_spans.pop(task_id, []) if task_id else []
+    if failed:
+        recorder.add_sleep("retry_backoff", recorder.start - failed[-1]["end"])
+    return task_id, recorder, failed, _current_recorder.set(recorder)
+
+
+def _end(task_id: Optional[str], recorder: SpanRecorder, failed: List[Dict], token, update=None,
+         error: Optional[BaseException] = None):
+    _current_recorder.reset(token)
+    span = recorder.close(error)
+    if error is not None:
+        if task_id:
+            with _failed_spans_lock:
+                for stale in [key for key, spans in _failed_spans.items()
+                              if spans[-1]["end"] < span["end"] - FAILED_SPANS_TTL]:
+                    del _failed_spans[stale]
+                _failed_spans[task_id] = failed + [span]
+        return None
+    update = dict(update or {})
+    update["metrics"] = failed + [span]
+    return update
+
+
+def instrument_node(name: str) -> Callable:
+    """
+    Decorator recording a span for each attempt of a graph node (sync or async).
+
+    The node's update gets a "metrics" list with its span, merged into the state by the
+    add_metrics reducer.
+
+    Example:
+        >>> @instrument_node("analyze")
+        ... def analyze_query(state): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                task_id, recorder, failed, token = _begin(name)
+                try:
+                    update = await func(*args, **kwargs)
+                except BaseException as e:
+                    _end(task_id, recorder, failed, token, error=e)
+                    raise
+                return _end(task_id, recorder, failed, token, update)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            task_id, recorder, failed, token = _begin(name)
+            try:
+                update = func(*args, **kwargs)
+            except BaseException as e:
+                _end(task_id, recorder, failed, token, error=e)
+                raise
+            return _end(task_id, recorder, failed, token, update)
+        return wrapper
+    return decorator
+
+
+def add_metrics(current: List[Dict], update: Optional[List[Dict]]) -> List[Dict]:
+    # Spans of the nodes are concatenated, None (initial state of a new evaluation) resets them
+    if update is None:
+        return []
+    return (current or []) + update
+
+
+def breakdown(spans: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Totals per node of an evaluation's spans.
+
+    Args:
+        spans: The metrics of the evaluation state
+
+    Returns:
+        For each node: attempts, wall time, LLM time and tokens, tool calls and sleep time
+    """
+    totals: Dict[str, Dict[str, Any]] = {}
+    for span in spans:
+        node = totals.setdefault(span["name"], {
+            "attempts": 0, "seconds": 0.0, "llm_calls": 0, "llm_seconds": 0.0, "input_tokens": 0,
+            "output_tokens": 0, "tool_calls": 0, "tool_seconds": 0.0, "sleep_seconds": 0.0,
+        })
+        node["attempts"] += 1
+        node["seconds"] += span["duration"]
+        node["llm_calls"] += span["llm"]["calls"]
+        node["llm_seconds"] += span["llm"]["seconds"]
+        node["input_tokens"] += span["llm"]["input_tokens"]
+        node["output_tokens"] += span["llm"]["output_tokens"]
+        node["tool_calls"] += span["tools"]["calls"]
+        node["tool_seconds"] += span["tools"]["seconds"]
+        node["sleep_seconds"] += sum(span["sleep"].values())
+    for node in totals.values():
+        for key in ("seconds", "llm_seconds", "tool_seconds", "sleep_seconds"):
+            node[key] = round(node[key], 3)
+    return totals
+
+
+def log_breakdown(spans: List[Dict[str, Any]]) -> None:
+    for name, node in breakdown(spans).items():
+        logger.info(
+            f"Telemetry {name}: {node['seconds']}s over {node['attempts']} attempt(s), LLM {node['llm_calls']} calls "
+            f"{node['llm_seconds']}s ({node['input_tokens']} in / {node['output_tokens']} out tokens), "
+            f"tools {node['tool_calls']} calls {node['tool_seconds']}s, sleeping {node['sleep_seconds']}s"
+        )
+
+
+def export_spans(spans: List[Dict[str, Any]], path: str, **fields: Any) -> None:
+    """
+    Append the spans of an evaluation to a JSON lines file.
+
+    Args:
+        spans: The metrics of the evaluation state
+        path: Path to the JSON lines file
+        fields: Extra fields of the record (e.g. thread_id, case id)
+    """
+    record = {**fields, "exported_at": time.time(), "spans": spans}
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, default=str) + "\n")
@@ -0,0 +1,117 @@
+"""
+Token Budget for the Evaluator Context
+
+The treatment and final report calls both receive the anamnesis, the hypothesis and the
+research reports. Before those calls, the evaluator measures every input (estimated at
+CHARS_PER_TOKEN characters per token) and, if their total exceeds CONTEXT_TOKEN_BUDGET,
+compacts the oversized research reports with fast_model extractive summaries. The
+"**References:**" section of each report is kept verbatim, so the references cited in the
+final report are unaffected.
+"""
+
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import AnyMessage, HumanMessage
+
+from blackwell.config import logger, CONTEXT_TOKEN_BUDGET, COMPACTION_MIN_TOKENS
+from blackwell.prompts import report_compaction_prompt
+
+CHARS_PER_TOKEN = 4
+WORDS_PER_TOKEN = 0.75
+REFERENCES_MARKER = "**References:**"
+
+
+def message_text(message: AnyMessage) -> str:
+    """Text of a message, whether its content is a string or a list of parts."""
+    content = message.content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+def estimate_tokens(message: AnyMessage) -> int:
+    """Estimate the prompt tokens of a message."""
+    return len(message_text(message)) // CHARS_PER_TOKEN
+
+
+def split_references(text: str) -> Tuple[str, str]:
+    """Split a research report into its body and its references section (marker included)."""
+    index = text.find(REFERENCES_MARKER)
+    if index == -1:
+        return text, ""
+    return text[:index].rstrip(), text[index:]
+
+
+class ContextBudget:
+    """Decides which reports to compact, and by how much, to fit a token budget."""
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET, min_tokens: int = COMPACTION_MIN_TOKENS):
+        """
+        Initialize the budget.
+
+        Args:
+            budget: Estimated tokens allowed for the inputs of a call
+            min_tokens: Reports at or below this size are never compacted
+        """
+        self.budget = budget
+        self.min_tokens = min_tokens
+
+    def plan(self, fixed: List[AnyMessage], reports: Dict[str, AnyMessage]) -> Dict[str, int]:
+        """
+        Compute the target size of the reports that must be compacted.
+
+        Args:
+            fixed: Inputs that are sent as they are (prompts, anamnesis, hypothesis)
+            reports: Compactable research reports by name
+
+        Returns:
+            Target tokens of each report to compact (empty if everything fits)
+        """
+        fixed_tokens = sum(estimate_tokens(message) for message in fixed)
+        sizes = {name: estimate_tokens(report) for name, report in reports.items()}
+        if fixed_tokens + sum(sizes.values()) <= self.budget:
+            return {}
+
+        # Share the remaining budget between the reports in proportion to their size
+        available = max(0, self.budget - fixed_tokens)
+        scale = available / sum(sizes.values())
+        return {name: max(self.min_tokens, int(size * scale)) for name, size in sizes.items() if size > self.min_tokens}
+
+
+def compaction_messages(report: AnyMessage, target_tokens: int) -> List[AnyMessage]:
+    """Messages asking fast_model for an extractive summary of a report's body."""
+    body, _ = split_references(message_text(report))
+    prompt = report_compaction_prompt.model_copy(update={
+        "content": report_compaction_prompt.content.format(target_words=int(target_tokens * WORDS_PER_TOKEN))
+    })
+    return [prompt, HumanMessage(content=body)]
+
+
+def compacted_report(report: AnyMessage, summary: AnyMessage) -> AnyMessage:
+    """Rebuild a report from its summary and its original references section."""
+    original = message_text(report)
+    _, references = split_references(original)
+    text = message_text(summary).strip()
+    if not text or len(text) >= len(original):
+        return report  # Compaction failed or did not help
+    return HumanMessage(content=f"{text}\n\n{references}" if references else text)
+
+
+def log_savings(originals: Dict[str, AnyMessage], compacted: Dict[str, AnyMessage], calls: int) -> int:
+    """
+    Log the prompt tokens saved by a compaction.
+
+    Args:
+        originals: Reports before compaction
+        compacted: Reports after compaction
+        calls: Number of calls each report is sent to
+
+    Returns:
+        Estimated prompt tokens saved
+    """
+    before = sum(estimate_tokens(report) for report in originals.values())
+    after = sum(estimate_tokens(report) for report in compacted.values())
+    saved = (before - after) * calls
+    logger.info(f"Context budget: compacted {', '.join(originals)} from ~{before} to ~{after} tokens, "
+                f"saving ~{saved} prompt tokens over {calls} calls")
+    return saved
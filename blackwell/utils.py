@@ -1,7 +1,37 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
+import re
+import time
+import hashlib
+import threading
 import requests
-from bs4 import BeautifulSoup
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+
+from blackwell.config import (
+    logger,
+    HTTP_CACHE_ENABLED,
+    CRAWL_DEADLINE,
+    CRAWL_PER_DOMAIN_LIMIT,
+    CRAWL_MAX_WORKERS,
+    CRAWL_MIN_INTERVAL,
+    CRAWL_STATS_WINDOW,
+    CRAWL_BREAKER_ERROR_RATE,
+    CRAWL_BREAKER_MIN_REQUESTS,
+    CRAWL_BREAKER_CONSECUTIVE_FAILURES,
+    CRAWL_BREAKER_COOLDOWN,
+    MAX_PAGE_BYTES,
+    CRAWL_SNAPSHOT_MODE,
+    CRAWL_SNAPSHOT_PATH,
+    CRAWL_SNAPSHOT_SERVER,
+)
+from blackwell.http_cache import get_http_cache
+from blackwell.crawl_snapshots import snapshot_adapter
+from blackwell.html_extraction import get_extractor, get_streaming_extractor
 
 
 def get_available_docs(folder_path, extensions) -> list:
@@ -22,17 +52,38 @@ def get_available_docs(folder_path, extensions) -> list:
         print(f"Warning: Directory not found at {folder_path}")
         return []
 
-    documents = []
+    return list(scan_docs(folder_path, extensions))
+
 
-    # Walk through directory and subdirectories
-    for root, _, files in os.walk(folder_path):
-        for file in files:
-            # Check if file has one of the specified extensions
-            if extensions is None or any(
-                file.lower().endswith(f".{ext.lower()}") for ext in extensions
-            ):
-                documents.append(os.path.join(root, file))
-                # documents.append({"name": file, "path": os.path.join(root, file)})
+def scan_docs(folder_path, extensions) -> Dict[str, tuple]:
+    """
+    Walk a folder and its subfolders with os.scandir, collecting the matching documents.
+
+    Args:
+        folder_path: Path to the folder to search
+        extensions: List of file extensions to include (None includes all files)
+
+    Returns:
+        Dictionary mapping each document path to its (mtime_ns, size) stat signature
+    """
+    suffixes = tuple(f".{ext.lower()}" for ext in extensions) if extensions is not None else None
+    documents = {}
+    pending = [folder_path]
+
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif suffixes is None or entry.name.lower().endswith(suffixes):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue  # File removed while scanning
+                        documents[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            continue  # Folder removed or unreadable while scanning
 
     return documents
 
@@ -74,10 +125,368 @@ def format_references(references: List[Dict]) -> str:
     return "\n".join(formatted)
 
 
-def fetch_medical_website_content(url: str, max_chars: int = 15000) -> dict:
+# Comprehensive headers to mimic a real browser and avoid bot detection
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+}
+
+def extract_medical_content(html, url: str, backend: Optional[str] = None) -> dict:
+    """
+    Extract the title and main content text of a medical web page.
+
+    Args:
+        html: Raw page content (bytes or str)
+        url: The page URL, used to pick the site-specific content selectors
+        backend: Extraction backend name (defaults to HTML_EXTRACTION_BACKEND)
+
+    Returns:
+        dict with 'title', 'content' (cleaned, not truncated) and 'source' (the domain)
+    """
+    return get_extractor(backend)(html, url)
+
+
+def _page_result(url: str, page: dict, max_chars: int, cache_status: str) -> dict:
+    """Build the fetch result for an extracted page, limiting the content length."""
+    clean_text = page['content']
+    if len(clean_text) > max_chars:
+        clean_text = clean_text[:max_chars] + "\n\n... (content truncated)"
+
+    return {
+        'success': True,
+        'content': clean_text,
+        'title': page['title'],
+        'url': url,
+        'source': page['source'],
+        'cache_status': cache_status
+    }
+
+
+def _error_result(url: str, error: str) -> dict:
+    return {
+        'success': False,
+        'content': '',
+        'title': '',
+        'url': url,
+        'source': '',
+        'error': error
+    }
+
+
+# Shared pooled HTTP session, so connections are reused across crawls
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get or create the shared, connection-pooling HTTP session.
+
+    With CRAWL_SNAPSHOT_MODE set, the session records its responses into the snapshot
+    archive or replays them from a stand-in server (see blackwell.crawl_snapshots).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(BROWSER_HEADERS)
+            pool = {'pool_connections': CRAWL_MAX_WORKERS, 'pool_maxsize': CRAWL_MAX_WORKERS}
+            if CRAWL_SNAPSHOT_MODE:
+                adapter = snapshot_adapter(CRAWL_SNAPSHOT_MODE, CRAWL_SNAPSHOT_PATH, CRAWL_SNAPSHOT_SERVER, **pool)
+            else:
+                adapter = HTTPAdapter(**pool)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+    return _session
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request targets a website whose circuit breaker is open."""
+
+
+@dataclass
+class DomainState:
+    """Politeness and health bookkeeping of one website."""
+    slots: threading.BoundedSemaphore
+    outcomes: deque  # (latency, ok) of the most recent requests
+    next_start: float = 0.0
+    consecutive_failures: int = 0
+    circuit: str = "closed"  # 'closed', 'open' or 'half-open'
+    open_until: float = 0.0
+    trial_in_flight: bool = False
+
+    def error_rate(self) -> float:
+        return sum(not ok for _, ok in self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        latencies = sorted(latency for latency, _ in self.outcomes)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+
+
+def _is_domain_failure(error: Exception) -> bool:
+    """Whether an exception says the website is unhealthy (not just that the page is missing)."""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status in (403, 408, 429) or status >= 500
+    return isinstance(error, requests.exceptions.RequestException)
+
+
+class CrawlScheduler:
+    """
+    Per-domain politeness scheduler with a circuit breaker.
+
+    Every request to a website goes through slot(): it caps the concurrent requests and
+    spaces their start times, keeps rolling error and latency statistics, and fails fast
+    with CircuitOpenError while the website is considered unhealthy. After the cool-down a
+    single trial request is let through (half-open); its outcome closes or reopens the circuit.
+    """
+
+    def __init__(
+        self,
+        per_domain_limit: int = CRAWL_PER_DOMAIN_LIMIT,
+        min_interval: float = CRAWL_MIN_INTERVAL,
+        window: int = CRAWL_STATS_WINDOW,
+        error_rate: float = CRAWL_BREAKER_ERROR_RATE,
+        min_requests: int = CRAWL_BREAKER_MIN_REQUESTS,
+        consecutive_failures: int = CRAWL_BREAKER_CONSECUTIVE_FAILURES,
+        cooldown: float = CRAWL_BREAKER_COOLDOWN,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            per_domain_limit: Maximum concurrent requests per website
+            min_interval: Minimum time (s) between two request starts on the same website
+            window: Number of recent requests kept per website for the statistics
+            error_rate: Error rate over the window that opens the circuit
+            min_requests: Requests in the window before the error rate is considered
+            consecutive_failures: Consecutive failures that open the circuit right away
+            cooldown: Time (s) the circuit stays open before a trial request
+        """
+        self.per_domain_limit = per_domain_limit
+        self.min_interval = min_interval
+        self.window = window
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.consecutive_failures = consecutive_failures
+        self.cooldown = cooldown
+        self._domains: Dict[str, DomainState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, domain: str) -> DomainState:
+        if domain not in self._domains:
+            self._domains[domain] = DomainState(
+                slots=threading.BoundedSemaphore(self.per_domain_limit),
+                outcomes=deque(maxlen=self.window),
+            )
+        return self._domains[domain]
+
+    def _admit(self, domain: str) -> DomainState:
+        """Check the circuit of a website, letting a single trial through after the cool-down."""
+        with self._lock:
+            state = self._state(domain)
+            now = time.monotonic()
+            if state.circuit == "open" and now >= state.open_until:
+                state.circuit = "half-open"
+            if state.circuit == "open" or (state.circuit == "half-open" and state.trial_in_flight):
+                retry_in = max(0.0, state.open_until - now)
+                raise CircuitOpenError(
+                    f"{domain} is failing (error rate {state.error_rate():.0%} over the last "
+                    f"{len(state.outcomes)} requests), skipped for another {retry_in:.0f}s"
+                )
+            if state.circuit == "half-open":
+                state.trial_in_flight = True
+            return state
+
+    def _record(self, domain: str, state: DomainState, latency: Optional[float], ok: bool) -> None:
+        with self._lock:
+            if latency is not None:
+                state.outcomes.append((latency, ok))
+            trial = state.trial_in_flight
+            state.trial_in_flight = False
+            if latency is None:
+                return  # The request never started: nothing was learned about the website
+
+            state.consecutive_failures = 0 if ok else state.consecutive_failures + 1
+            if ok:
+                if trial:
+                    state.circuit = "closed"
+                    state.outcomes.clear()
+                    logger.info(f"Crawl circuit for {domain} closed")
+                return
+
+            unhealthy = (
+                trial
+                or state.consecutive_failures >= self.consecutive_failures
+                or (len(state.outcomes) >= self.min_requests and state.error_rate() >= self.error_rate)
+            )
+            if unhealthy and state.circuit != "open":
+                state.circuit = "open"
+                state.open_until = time.monotonic() + self.cooldown
+                logger.warning(f"Crawl circuit for {domain} opened for {self.cooldown}s: "
+                               f"{state.consecutive_failures} consecutive failures, "
+                               f"error rate {state.error_rate():.0%}")
+
+    @contextmanager
+    def slot(self, url: str, timeout: float):
+        """
+        Context manager wrapping one request to the website of a URL.
+
+        Exceptions raised inside the block are recorded as failures when they indicate an
+        unhealthy website (timeouts, connection errors, 403/429/5xx responses).
+
+        Args:
+            url: The requested URL
+            timeout: Maximum time (s) to wait for a free slot and the politeness interval
+
+        Raises:
+            CircuitOpenError: The website's circuit is open
+            TimeoutError: No slot became available within the timeout
+        """
+        domain = urlparse(url).netloc.lower()
+        state = self._admit(domain)
+        deadline = time.monotonic() + timeout
+        if not state.slots.acquire(timeout=max(0.0, timeout)):
+            self._record(domain, state, None, True)
+            raise TimeoutError(f"No free crawl slot for {domain} within {timeout:.0f}s")
+
+        latency, ok = None, True
+        try:
+            with self._lock:
+                start_at = max(time.monotonic(), state.next_start)
+                if start_at > deadline:
+                    raise TimeoutError(f"Rate limit for {domain} exceeds the {timeout:.0f}s timeout")
+                state.next_start = start_at + self.min_interval
+            time.sleep(max(0.0, start_at - time.monotonic()))
+
+            started = time.monotonic()
+            try:
+                yield
+            except Exception as e:
+                ok = not _is_domain_failure(e)
+                raise
+            finally:
+                latency = time.monotonic() - started
+        finally:
+            state.slots.release()
+            self._record(domain, state, latency, ok)
+
+    def stats(self) -> Dict[str, dict]:
+        """Rolling error and latency statistics of every website seen so far."""
+        with self._lock:
+            return {
+                domain: {
+                    "circuit": state.circuit,
+                    "requests": len(state.outcomes),
+                    "error_rate": round(state.error_rate(), 3),
+                    "latency_p50": state.latency_percentile(0.5),
+                    "latency_p95": state.latency_percentile(0.95),
+                    "consecutive_failures": state.consecutive_failures,
+                }
+                for domain, state in self._domains.items()
+            }
+
+
+# Global scheduler shared by every crawl
+_crawl_scheduler: Optional[CrawlScheduler] = None
+
+
+def get_crawl_scheduler() -> CrawlScheduler:
+    """Get or create the global crawl scheduler."""
+    global _crawl_scheduler
+    with _session_lock:
+        if _crawl_scheduler is None:
+            _crawl_scheduler = CrawlScheduler()
+    return _crawl_scheduler
+
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+_CHARSET_PATTERN = re.compile(r'charset="?([\w.:-]+)', re.IGNORECASE)
+
+
+class UnsupportedContentError(Exception):
+    """Raised when a crawled URL does not return an HTML page."""
+
+
+def _download_page(response: requests.Response, url: str, max_chars: int, timeout: float,
+                   max_bytes: int = MAX_PAGE_BYTES) -> tuple:
+    """
+    Stream a response body into an incremental extractor.
+
+    Args:
+        response: A response opened with stream=True
+        url: The page URL
+        max_chars: Content characters needed before the download can stop
+        timeout: Total download time limit in seconds
+        max_bytes: Maximum bytes read from the body
+
+    Returns:
+        Tuple of (extracted page, hash of the bytes read). A page whose download stopped
+        early records max_chars under 'truncated_at'
+    """
+    content_type = response.headers.get('Content-Type', '')
+    mime_type = content_type.split(';')[0].strip().lower()
+    if mime_type and mime_type not in HTML_CONTENT_TYPES:
+        raise UnsupportedContentError(f"{url} is not an HTML page (Content-Type: {mime_type})")
+
+    charset = _CHARSET_PATTERN.search(content_type)
+    extractor = get_streaming_extractor(url, max_chars, charset.group(1) if charset else None)
+    digest = hashlib.sha256()
+    received = 0
+    truncated = False
+    expires_at = time.monotonic() + timeout
+    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+        chunk = chunk[:max_bytes - received]
+        digest.update(chunk)
+        received += len(chunk)
+        if extractor.feed(chunk):
+            logger.debug(f"Stopped downloading {url} after {received} bytes: enough content extracted")
+            truncated = True
+            break
+        if received >= max_bytes:
+            logger.info(f"Stopped downloading {url} at the {max_bytes} bytes limit")
+            break
+        if time.monotonic() > expires_at:
+            raise requests.exceptions.Timeout(f"Download of {url} took longer than {timeout}s")
+
+    page = extractor.close()
+    if truncated:
+        # Only the first max_chars characters are known to be complete (see CacheEntry.covers)
+        page['truncated_at'] = max_chars
+    return page, digest.hexdigest()
+
+
+def fetch_medical_website_content(
+    url: str, max_chars: int = 15000, use_cache: bool = True, timeout: float = 15
+) -> dict:
     """
     Fetch and extract content from various medical websites (MedlinePlus, Mayo Clinic, CDC, etc.).
     This function intelligently identifies the main content area across different website structures.
+
+    Pages go through an on-disk HTTP cache (see blackwell.http_cache): fresh entries are served
+    without any request, stale ones are revalidated with ETag/Last-Modified conditional GETs, and
+    the extracted text is reused whenever the page body hash is unchanged. Network requests go
+    through the crawl scheduler (see CrawlScheduler), so websites that keep failing are skipped
+    immediately instead of waiting for the timeout. The cache is bypassed while crawl snapshots
+    are recorded (CRAWL_SNAPSHOT_MODE = "record").
+
+    The body is streamed: non-HTML responses are rejected from their Content-Type before the
+    body is read, at most MAX_PAGE_BYTES are downloaded, and the download stops as soon as
+    enough main-content text for max_chars has been extracted. Pages cached from such a
+    partial download are only reused by calls asking for at most as many characters.
     
     Supports:
         - MedlinePlus (medlineplus.gov)
@@ -91,6 +500,8 @@ def fetch_medical_website_content(url: str, max_chars: int = 15000) -> dict:
     Args:
         url: The URL to fetch
         max_chars: Maximum characters to return (default 15000)
+        use_cache: Whether to use the HTTP cache (default True, see HTTP_CACHE_ENABLED)
+        timeout: Request timeout in seconds (default 15)
     
     Returns:
         dict with keys:
@@ -99,6 +510,7 @@ def fetch_medical_website_content(url: str, max_chars: int = 15000) -> dict:
             - title (str): The page title
             - url (str): The original URL
             - source (str): The website domain
+            - cache_status (str): 'hit', 'revalidated', 'unchanged' or 'miss' (if success is True)
             - error (str, optional): Error message if success is False
             
     Example:
@@ -109,186 +521,98 @@ def fetch_medical_website_content(url: str, max_chars: int = 15000) -> dict:
         >>>     print(result['content'][:500])
     """
     try:
-        # Set comprehensive headers to mimic a real browser and avoid bot detection
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-        }
-        
-        # Create a session for better connection handling
-        session = requests.Session()
-        session.headers.update(headers)
-        
-        response = session.get(url, timeout=15, allow_redirects=True)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract domain for identification
-        from urllib.parse import urlparse
-        domain = urlparse(url).netloc.lower()
-        
-        # Extract title
-        title_tag = soup.find('title')
-        title = title_tag.get_text().strip() if title_tag else "Untitled"
-        
-        # Remove unwanted elements
-        unwanted_tags = ['script', 'style', 'nav', 'header', 'footer', 'aside', 
-                        'iframe', 'noscript', 'button', 'form']
-        for element in soup(unwanted_tags):
-            element.decompose()
-        
-        # Remove elements by class/id that typically contain navigation/ads
-        unwanted_selectors = [
-            '.navigation', '.nav', '.menu', '.sidebar', '.advertisement', 
-            '.ad', '.social-share', '.related-links', '.breadcrumb',
-            '#navigation', '#sidebar', '#comments', '.comments'
-        ]
-        for selector in unwanted_selectors:
-            for element in soup.select(selector):
-                element.decompose()
-        
-        # Define content selectors for different websites
-        content_selectors = {
-            'medlineplus.gov': [
-                '#mplus-content', 
-                '#topic-summary', 
-                '.main-content',
-                'article',
-                '#article'
-            ],
-            'mayoclinic.org': [
-                '.content',
-                'article',
-                '.main-content',
-                '[role="main"]',
-                '#main-content'
-            ],
-            'familydoctor.org': [
-                '.content-area',
-                'article',
-                '.post-content',
-                '.entry-content',
-                'main'
-            ],
-            'cdc.gov': [
-                '#content',
-                'article',
-                '.syndicate',
-                '.content-area',
-                'main'
-            ],
-            'nih.gov': [
-                '#content',
-                'article',
-                '.main-content',
-                '[role="main"]',
-                'main'
-            ],
-            'webmd.com': [
-                'article',
-                '.article-body',
-                '.content',
-                'main'
-            ],
-            'kidshealth.org': [
-                'article',
-                '.article-body',
-                '#content',
-                'main'
-            ],
-            'healthline.com': [
-                'article',
-                '.article-body',
-                '#article-content',
-                'main'
-            ]
-        }
-        
-        # Find appropriate selectors for this domain
-        selectors = []
-        for site_domain, site_selectors in content_selectors.items():
-            if site_domain in domain:
-                selectors = site_selectors
-                break
-        
-        # If no specific selectors found, use generic ones
-        if not selectors:
-            selectors = ['article', 'main', '[role="main"]', '.content', '#content', '.main-content']
-        
-        # Try to find main content area
-        main_content = None
-        for selector in selectors:
-            main_content = soup.select_one(selector)
-            if main_content:
-                break
-        
-        # Use full body if no main content found
-        if not main_content:
-            main_content = soup.find('body')
-        
-        if main_content:
-            text = main_content.get_text(separator='\n', strip=True)
-        else:
-            text = soup.get_text(separator='\n', strip=True)
-        
-        # Clean up excessive whitespace
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        clean_text = '\n'.join(lines)
-        
-        # Remove duplicate lines (common in web scraping)
-        seen_lines = set()
-        unique_lines = []
-        for line in lines:
-            if line not in seen_lines or len(line) > 100:  # Keep long lines even if duplicate
-                unique_lines.append(line)
-                seen_lines.add(line)
-        clean_text = '\n'.join(unique_lines)
-        
-        # Limit length
-        if len(clean_text) > max_chars:
-            clean_text = clean_text[:max_chars] + "\n\n... (content truncated)"
-        
-        return {
-            'success': True,
-            'content': clean_text,
-            'title': title,
-            'url': url,
-            'source': domain
-        }
+        # Recording bypasses the cache, so every page reaches the archive as a full response
+        cache = get_http_cache() if use_cache and HTTP_CACHE_ENABLED and CRAWL_SNAPSHOT_MODE != "record" else None
+        entry = cache.lookup(url) if cache is not None else None
+        if entry is not None and not entry.covers(max_chars):
+            # Cached from a download that stopped before max_chars characters: fetch it again
+            entry = None
+        if entry is not None and entry.is_fresh():
+            return _page_result(url, entry.page, max_chars, 'hit')
+
+        request_headers = entry.conditional_headers() if entry is not None else {}
+        with get_crawl_scheduler().slot(url, timeout=timeout):
+            response = get_http_session().get(url, timeout=timeout, allow_redirects=True,
+                                              headers=request_headers, stream=True)
+            if response.status_code == 304:
+                response.close()
+                if entry is not None:
+                    cache.refresh(url, response.headers)
+                    return _page_result(url, entry.page, max_chars, 'revalidated')
+                # Nothing cached to serve the 304 from: treat it as a miss and fetch the page
+                logger.debug(f"Got 304 for {url} without a cached page, fetching it again")
+                response = get_http_session().get(url, timeout=timeout, allow_redirects=True, stream=True)
+            with response:
+                response.raise_for_status()
+                if response.status_code == 304:
+                    raise requests.exceptions.RequestException(f"{url} answered 304 to an unconditional request")
+                page, content_hash = _download_page(response, url, max_chars, timeout)
+
+        # Keep the cached page when the downloaded body is identical
+        if entry is not None and entry.content_hash == content_hash:
+            cache.refresh(url, response.headers)
+            return _page_result(url, entry.page, max_chars, 'unchanged')
+
+        if cache is not None:
+            cache.store(url, response.headers, content_hash, page)
+
+        return _page_result(url, page, max_chars, 'miss')
+    except CircuitOpenError as e:
+        return _error_result(url, f'Skipped: {str(e)}')
+    except UnsupportedContentError as e:
+        return _error_result(url, f'Skipped: {str(e)}')
+    except TimeoutError as e:
+        return _error_result(url, f'Crawl deadline exceeded: {str(e)}')
     except requests.exceptions.Timeout:
-        return {
-            'success': False,
-            'content': '',
-            'title': '',
-            'url': url,
-            'source': '',
-            'error': 'Request timeout - website took too long to respond'
-        }
+        return _error_result(url, 'Request timeout - website took too long to respond')
     except requests.exceptions.RequestException as e:
-        return {
-            'success': False,
-            'content': '',
-            'title': '',
-            'url': url,
-            'source': '',
-            'error': f'Request error: {str(e)}'
-        }
+        return _error_result(url, f'Request error: {str(e)}')
     except Exception as e:
-        return {
-            'success': False,
-            'content': '',
-            'title': '',
-            'url': url,
-            'source': '',
-            'error': f'Unexpected error: {str(e)}'
-        }
+        return _error_result(url, f'Unexpected error: {str(e)}')
+
+
+def crawl_urls(
+    urls: List[str],
+    max_chars: int = 15000,
+    deadline: float = CRAWL_DEADLINE,
+    max_workers: int = CRAWL_MAX_WORKERS,
+) -> List[dict]:
+    """
+    Fetch several medical web pages concurrently within a total deadline.
+
+    Requests share one pooled session and the global crawl scheduler (per-domain
+    concurrency, rate limit and circuit breaker), and each request timeout is capped by
+    the time left before the deadline.
+
+    Args:
+        urls: The URLs to fetch
+        max_chars: Maximum characters returned per page
+        deadline: Total time budget in seconds for the whole crawl
+        max_workers: Maximum concurrent requests overall
+
+    Returns:
+        One fetch_medical_website_content() result per URL, in input order. Pages that
+        did not complete before the deadline are returned as failures.
+    """
+    if not urls:
+        return []
+    expires_at = time.monotonic() + deadline
+
+    def fetch(url: str) -> dict:
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            return _error_result(url, 'Crawl deadline exceeded')
+        return fetch_medical_website_content(url, max_chars=max_chars, timeout=min(15, remaining))
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    futures = [executor.submit(fetch, url) for url in urls]
+    wait(futures, timeout=deadline)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for url, future in zip(urls, futures):
+        if future.done() and not future.cancelled():
+            results.append(future.result())
+        else:
+            results.append(_error_result(url, f'Crawl deadline of {deadline}s exceeded'))
+    return results
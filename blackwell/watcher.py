@@ -0,0 +1,289 @@
+"""
+Document Folder Watcher
+
+Keeps the vector store in sync with DATA_FOLDER without periodic full rescans. File events
+come from Linux inotify (through ctypes, no extra dependency); on other platforms, or when
+inotify is unavailable, the folder is polled with os.scandir stat signatures. Events are
+debounced so a file being copied is ingested once, after it has settled, and only the
+changed files are fed into ingestion.
+"""
+
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional
+
+from blackwell.config import logger, ACCEPTED_EXTENSIONS as AC, DATA_FOLDER
+from blackwell.utils import scan_docs
+
+# inotify flags (from <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+ChangeCallback = Callable[[List[str], List[str]], None]
+
+
+class _Inotify:
+    """Minimal recursive inotify wrapper built on libc through ctypes."""
+
+    def __init__(self, folder_path: str):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available on this platform")
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        self.add_tree(folder_path)
+
+    def add_tree(self, folder_path: str) -> None:
+        """Watch a folder and all of its subfolders."""
+        pending = [folder_path]
+        while pending:
+            path = pending.pop()
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"Could not watch {path}: {os.strerror(ctypes.get_errno())}")
+                continue
+            self._dirs[wd] = path
+            try:
+                with os.scandir(path) as entries:
+                    pending.extend(e.path for e in entries if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def read(self, timeout: float) -> List[tuple]:
+        """
+        Wait up to timeout seconds for events.
+
+        Returns:
+            List of (path, mask) tuples
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(("", mask))
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            folder = self._dirs.get(wd)
+            if folder is None:
+                continue
+            path = os.path.join(folder, os.fsdecode(name)) if name else folder
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+            events.append((path, mask))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DocumentWatcher:
+    """
+    Watch a document folder and report debounced batches of changed and deleted files.
+
+    The callback receives (changed_paths, deleted_paths) once no new event has been seen
+    for `debounce` seconds. Paths use the same format as get_available_docs(), so they
+    match the 'source' metadata of the indexed chunks.
+    """
+
+    def __init__(
+        self,
+        folder_path: str,
+        on_change: ChangeCallback,
+        extensions: Optional[List[str]] = AC,
+        debounce: float = 2.0,
+        poll_interval: float = 5.0,
+        use_inotify: bool = True,
+    ):
+        """
+        Initialize the watcher.
+
+        Args:
+            folder_path: Folder to watch (recursively)
+            on_change: Callback receiving (changed_paths, deleted_paths)
+            extensions: File extensions to watch (None watches every file)
+            debounce: Seconds without events before a batch is flushed
+            poll_interval: Seconds between scans when polling
+            use_inotify: Try inotify before falling back to polling
+        """
+        self.folder_path = folder_path
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._suffixes = tuple(f".{ext.lower()}" for ext in extensions) if extensions is not None else None
+        self._extensions = extensions
+        self._pending: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self._last_flush = time.time()
+
+        if use_inotify:
+            try:
+                self._inotify = _Inotify(folder_path)
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable ({e}), falling back to polling")
+        # Known files: stat signatures when polling, membership only with inotify
+        self._snapshot: Dict[str, tuple] = scan_docs(folder_path, extensions)
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def _accepts(self, path: str) -> bool:
+        return self._suffixes is None or path.lower().endswith(self._suffixes)
+
+    def _collect_inotify(self) -> None:
+        for path, mask in self._inotify.read(timeout=min(self.debounce, 1.0)):
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: rescan for files modified or removed since the last flush
+                snapshot = scan_docs(self.folder_path, self._extensions)
+                for doc in snapshot.keys() | self._snapshot.keys():
+                    if doc not in snapshot or snapshot[doc][0] / 1e9 >= self._last_flush - self.debounce:
+                        self._pending[doc] = time.time()
+            elif mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land in a new folder before its watch is in place
+                    for doc in scan_docs(path, self._extensions):
+                        self._pending[doc] = time.time()
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    prefix = path + os.sep
+                    for doc in [p for p in self._snapshot if p.startswith(prefix)]:
+                        self._pending[doc] = time.time()
+            elif self._accepts(path):
+                self._pending[path] = time.time()
+
+    def _collect_polling(self) -> None:
+        self._stop.wait(self.poll_interval)
+        snapshot = scan_docs(self.folder_path, self._extensions)
+        now = time.time()
+        for path in snapshot.keys() | self._snapshot.keys():
+            if snapshot.get(path) != self._snapshot.get(path):
+                self._pending[path] = now
+        self._snapshot = snapshot
+
+    def _flush(self) -> None:
+        now = time.time()
+        if not self._pending or now - max(self._pending.values()) < self.debounce:
+            return
+        paths, self._pending = list(self._pending), {}
+        self._last_flush = now
+        changed = [p for p in paths if os.path.isfile(p)]
+        deleted = [p for p in paths if not os.path.isfile(p)]
+        if self._inotify is not None:
+            for path in changed:
+                self._snapshot[path] = ()
+            for path in deleted:
+                self._snapshot.pop(path, None)
+        logger.info(f"Document watcher: {len(changed)} changed, {len(deleted)} deleted files")
+        try:
+            self.on_change(changed, deleted)
+        except Exception as e:
+            logger.error(f"Error ingesting watched files: {e}")
+
+    def run(self) -> None:
+        """Watch the folder until stop() is called (blocking)."""
+        print(f"Watching {self.folder_path} ({self.mode})...")
+        try:
+            while not self._stop.is_set():
+                if self._inotify is not None:
+                    self._collect_inotify()
+                else:
+                    self._collect_polling()
+                self._flush()
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+
+    def start(self) -> "DocumentWatcher":
+        """Watch the folder in a background thread."""
+        self._thread = threading.Thread(target=self.run, name="document-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop watching and wait for the background thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def watch_data_folder(vector_store=None, debounce: float = 2.0, poll_interval: float = 5.0,
+                      use_inotify: bool = True) -> DocumentWatcher:
+    """
+    Start a background watcher that keeps the vector store in sync with DATA_FOLDER.
+
+    Files added while the watcher was not running are indexed first, then only
+    changed files are re-ingested.
+
+    Args:
+        vector_store: The ChromaDB vector store instance (defaults to build_retriever())
+        debounce: Seconds without events before changes are ingested
+        poll_interval: Seconds between scans when polling
+        use_inotify: Try inotify before falling back to polling
+
+    Returns:
+        The running DocumentWatcher
+    """
+    from blackwell.document_processer import build_retriever, sync_documents
+
+    if vector_store is None:
+        vector_store = build_retriever(add_new_docs=True)
+
+    return DocumentWatcher(
+        folder_path=DATA_FOLDER + "/",
+        on_change=lambda changed, deleted: sync_documents(vector_store, changed, deleted),
+        debounce=debounce,
+        poll_interval=poll_interval,
+        use_inotify=use_inotify,
+    ).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the vector store in sync with DATA_FOLDER.")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Seconds without events before ingesting")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between scans when polling")
+    parser.add_argument("--poll", action="store_true", help="Force polling instead of inotify")
+    args = parser.parse_args()
+
+    watcher = watch_data_folder(debounce=args.debounce, poll_interval=args.poll_interval,
+                                use_inotify=not args.poll)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
@@ -0,0 +1,112 @@
+"""
+Web Knowledge Base
+
+Pages crawled by the agents (web_crawl_medline) are chunked, embedded and upserted into a
+secondary Chroma collection, tagged with their URL, fetch time and expiry time. The
+retrieve_documents tool searches this collection next to the main one, so conditions that
+were researched on the web before are answered locally until their pages expire.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from blackwell.config import logger, embeddings_model, DB_PATH, WEB_KB_COLLECTION, WEB_KB_TTL
+from blackwell.document_processer import process_documents
+from blackwell.http_cache import hash_content
+
+WEB_PAGE_DOC_TYPE = "web_page"
+_TRUNCATION_MARKER = "\n\n... (content truncated)"
+
+
+def build_web_store():
+    """
+    Open the collection of crawled pages.
+
+    Returns:
+        The ChromaDB vector store holding the crawled pages
+    """
+    return Chroma(
+        collection_name=WEB_KB_COLLECTION,
+        embedding_function=embeddings_model,
+        persist_directory=DB_PATH,
+    )
+
+
+def not_expired_filter(now: Optional[float] = None) -> Dict:
+    """Chroma metadata filter matching the pages that have not expired yet."""
+    return {"expires_at": {"$gt": now or time.time()}}
+
+
+def index_crawled_pages(web_store, pages: List[Dict], ttl: float = WEB_KB_TTL) -> int:
+    """
+    Chunk, embed and upsert successfully crawled pages.
+
+    Pages already indexed with the same content and not expired are skipped; pages whose
+    content changed or that expired replace their previous chunks. The chunks of every other
+    expired page are purged first, so the collection doesn't grow without bound.
+
+    Args:
+        web_store: The vector store of crawled pages (see build_web_store())
+        pages: fetch_medical_website_content() results
+        ttl: Time (s) the indexed pages are used before they must be crawled again
+
+    Returns:
+        Number of chunks added
+    """
+    purge_expired_pages(web_store)
+    now = time.time()
+    documents = []
+    for page in pages:
+        content = page.get("content", "")
+        if not page.get("success") or not content.strip():
+            continue
+        content = content.removesuffix(_TRUNCATION_MARKER)
+        content_hash = hash_content(content.encode())
+
+        stored = web_store.get(where={"url": page["url"]}, include=["metadatas"])
+        if stored["ids"]:
+            metadata = stored["metadatas"][0]
+            if metadata.get("content_hash") == content_hash and metadata.get("expires_at", 0) > now:
+                continue
+            web_store.delete(ids=stored["ids"])
+
+        documents.append(Document(
+            page_content=f"Title: {page.get('title', '')}\n\n{content}",
+            metadata={
+                "source": page["url"],
+                "url": page["url"],
+                "title": page.get("title", ""),
+                "domain": page.get("source", ""),
+                "fetched_at": now,
+                "expires_at": now + ttl,
+                "content_hash": content_hash,
+                "type": WEB_PAGE_DOC_TYPE,
+            },
+        ))
+
+    if not documents:
+        return 0
+    chunks = process_documents(documents)
+    web_store.add_documents(chunks)
+    logger.info(f"Indexed {len(documents)} crawled pages ({len(chunks)} chunks) into {WEB_KB_COLLECTION}")
+    return len(chunks)
+
+
+def purge_expired_pages(web_store) -> int:
+    """
+    Delete the chunks of expired pages.
+
+    Args:
+        web_store: The vector store of crawled pages
+
+    Returns:
+        Number of chunks deleted
+    """
+    expired = web_store.get(where={"expires_at": {"$lte": time.time()}}, include=[])
+    if expired["ids"]:
+        web_store.delete(ids=expired["ids"])
+        logger.info(f"Purged {len(expired['ids'])} expired chunks from {WEB_KB_COLLECTION}")
+    return len(expired["ids"])
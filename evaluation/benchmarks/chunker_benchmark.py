@@ -0,0 +1,88 @@
+"""
+Chunker Benchmark
+
+Compares the single-pass offset chunker (blackwell.chunker) against LangChain's
+RecursiveCharacterTextSplitter on the MedlinePlus corpus, reporting chunks/sec and
+peak traced memory for each splitter.
+
+Usage (from the project root):
+    python evaluation/benchmarks/chunker_benchmark.py data/mplus_topics_2025-11-29.xml
+"""
+
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from blackwell.chunker import split_documents, regex_token_offsets
+from blackwell.medline import load_medline_documents
+
+
+def run_splitter(name: str, split, documents, repeats: int) -> dict:
+    """Time a splitter over the documents and measure its peak memory."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        chunks = split(documents)
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced on a separate run so tracing overhead doesn't skew timings
+    tracemalloc.start()
+    split(documents)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    elapsed = statistics.median(timings)
+    lengths = [len(chunk.page_content) for chunk in chunks]
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "seconds": round(elapsed, 4),
+        "chunks_per_sec": round(len(chunks) / elapsed, 1),
+        "peak_mb": round(peak / 2**20, 2),
+        "mean_chunk_chars": round(statistics.mean(lengths), 1),
+        "max_chunk_chars": max(lengths),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the offset chunker against RecursiveCharacterTextSplitter.")
+    parser.add_argument("xml_path", help="Local path of the mplus_topics_*.xml release")
+    parser.add_argument("--chunk-size", type=int, default=1536)
+    parser.add_argument("--chunk-overlap", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per splitter (median is reported)")
+    parser.add_argument("--output", default=None, help="Optional JSON file to save the results")
+    args = parser.parse_args()
+
+    documents = load_medline_documents(args.xml_path, args.xml_path)
+    print(f"Loaded {len(documents)} Medline documents "
+          f"({sum(len(d.page_content) for d in documents) / 2**20:.1f}M chars)")
+
+    recursive = RecursiveCharacterTextSplitter(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        length_function=len,
+    )
+    # Token sizing uses the same budget in approximate tokens, roughly 4 chars each
+    splitters = {
+        "recursive": recursive.split_documents,
+        "offset": lambda docs: split_documents(docs, args.chunk_size, args.chunk_overlap),
+        "offset_tokens": lambda docs: split_documents(docs, args.chunk_size // 4, args.chunk_overlap // 4,
+                                                       token_offsets=regex_token_offsets),
+    }
+
+    results = [run_splitter(name, split, documents, args.repeats) for name, split in splitters.items()]
+
+    print(f"\n{'splitter':<15}{'chunks':>8}{'seconds':>10}{'chunks/s':>12}{'peak MB':>10}{'max chars':>11}")
+    for r in results:
+        print(f"{r['splitter']:<15}{r['chunks']:>8}{r['seconds']:>10}{r['chunks_per_sec']:>12}"
+              f"{r['peak_mb']:>10}{r['max_chunk_chars']:>11}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"chunk_size": args.chunk_size, "chunk_overlap": args.chunk_overlap,
+                       "documents": len(documents), "results": results}, f, indent=2)
+        print(f"\nResults saved to {args.output}")
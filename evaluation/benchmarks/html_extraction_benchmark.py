@@ -0,0 +1,115 @@
+"""
+HTML Extraction Benchmark
+
+Compares the HTML extraction backends (blackwell.html_extraction) on saved pages,
+reporting pages/sec per backend and whether each backend reproduces the reference
+BeautifulSoup output exactly.
+
+Fixtures are a folder of HTML files plus an index.json mapping each file name to the URL
+it was saved from (the URL selects the per-domain content selectors). A small set of pages
+modelled on the supported sites is committed in evaluation/benchmarks/fixtures/html; record
+real pages into another folder for representative timings.
+
+Usage (from the project root):
+    python evaluation/benchmarks/html_extraction_benchmark.py evaluation/benchmarks/fixtures/html
+    python evaluation/benchmarks/html_extraction_benchmark.py --record fixtures/html https://medlineplus.gov/flu.html
+    python evaluation/benchmarks/html_extraction_benchmark.py fixtures/html --output bench/html_extraction.json
+"""
+
+import os
+import json
+import time
+import argparse
+import statistics
+
+from blackwell.html_extraction import EXTRACTION_BACKENDS, get_extractor
+from blackwell.utils import get_http_session
+
+
+def record_fixtures(folder: str, urls: list) -> None:
+    """Download pages into the fixtures folder and update its index.json."""
+    os.makedirs(folder, exist_ok=True)
+    index_path = os.path.join(folder, "index.json")
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+
+    session = get_http_session()
+    for url in urls:
+        response = session.get(url, timeout=15)
+        response.raise_for_status()
+        name = f"page_{len(index):04d}.html"
+        with open(os.path.join(folder, name), "wb") as f:
+            f.write(response.content)
+        index[name] = url
+        print(f"Saved {url} -> {name}")
+
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=2)
+
+
+def load_fixtures(folder: str) -> list:
+    """Load (url, html bytes) pairs listed in the fixtures index.json."""
+    with open(os.path.join(folder, "index.json")) as f:
+        index = json.load(f)
+    pages = []
+    for name, url in sorted(index.items()):
+        with open(os.path.join(folder, name), "rb") as f:
+            pages.append((url, f.read()))
+    return pages
+
+
+def run_backend(backend: str, pages: list, repeats: int) -> tuple:
+    """Time a backend over every page, returning its stats and its outputs."""
+    extract = get_extractor(backend)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        outputs = [extract(html, url) for url, html in pages]
+        timings.append(time.perf_counter() - start)
+
+    elapsed = statistics.median(timings)
+    return {
+        "backend": backend,
+        "pages": len(pages),
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(len(pages) / elapsed, 1),
+        "mb_per_sec": round(sum(len(html) for _, html in pages) / 2**20 / elapsed, 2),
+    }, outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the HTML extraction backends on saved pages.")
+    parser.add_argument("fixtures", help="Folder with the saved HTML pages and their index.json")
+    parser.add_argument("--record", nargs="+", default=None, metavar="URL",
+                        help="Download these URLs into the fixtures folder instead of benchmarking")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per backend (median is reported)")
+    parser.add_argument("--output", default=None, help="Optional JSON file to save the results")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.fixtures, args.record)
+        raise SystemExit(0)
+
+    pages = load_fixtures(args.fixtures)
+    print(f"Loaded {len(pages)} pages ({sum(len(html) for _, html in pages) / 2**20:.1f} MB)")
+
+    reference = None
+    results = []
+    for backend in sorted(EXTRACTION_BACKENDS, key=lambda name: name != "bs4"):
+        stats, outputs = run_backend(backend, pages, args.repeats)
+        reference = reference or outputs
+        mismatches = [url for (url, _), out, ref in zip(pages, outputs, reference) if out != ref]
+        stats["matching_pages"] = len(pages) - len(mismatches)
+        results.append(stats)
+        print(f"{backend:<6}{stats['pages_per_sec']:>10} pages/s{stats['mb_per_sec']:>9} MB/s"
+              f"{stats['matching_pages']:>6}/{len(pages)} identical to bs4")
+        for url in mismatches[:5]:
+            print(f"      differs: {url}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
@@ -0,0 +1,237 @@
+"""
+Ingestion Throughput Benchmark
+
+Measures load_documents, process_documents, chunk deduplication and the vector store add
+path on a generated corpus of PDFs, TXTs and CSVs at several sizes. Embeddings come from a
+deterministic local fake model, so no Gemini quota is spent and runs are reproducible.
+Each size runs in its own process so peak RSS is measured independently.
+
+Usage (from the project root):
+    python evaluation/benchmarks/ingestion_benchmark.py --output bench/ingestion.json
+    python evaluation/benchmarks/ingestion_benchmark.py --compare bench/ingestion.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import contextlib
+import multiprocessing
+from queue import Empty
+from datetime import datetime
+
+# The Gemini clients are never called by the benchmark
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+
+CORPUS_SIZES = {"small": 30, "medium": 150, "large": 600}  # Number of files per corpus
+WORDS = (
+    "patient presents with acute chronic pain fever fatigue nausea headache diagnosis treatment "
+    "therapy dose clinical trial symptoms history examination blood pressure infection chest "
+    "abdominal swelling cough medication allergy risk factor management guideline evidence "
+    "follow-up laboratory imaging ultrasound hemoglobin platelet insulin glucose renal hepatic"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 24))).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, count: int) -> list:
+    return [" ".join(_sentence(rng) for _ in range(rng.randint(3, 8))) for _ in range(count)]
+
+
+def write_pdf(path: str, pages: list) -> None:
+    """Write a minimal multi-page PDF (Helvetica text, one paragraph list per page)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        text = " T* ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj" for line in lines
+        )
+        stream = f"BT /F1 9 Tf 40 760 Td 11 TL {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    with open(path, "wb") as f:
+        f.write(out.getvalue())
+
+
+def generate_corpus(folder: str, num_files: int, seed: int = 42) -> list:
+    """Generate a deterministic corpus of PDF, TXT and CSV files, returning their paths."""
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(num_files):
+        kind = ("pdf", "txt", "csv")[i % 3]
+        path = os.path.join(folder, f"doc_{i:05d}.{kind}")
+        if kind == "pdf":
+            pages = [[_sentence(rng) for _ in range(40)] for _ in range(rng.randint(2, 6))]
+            write_pdf(path, pages)
+        elif kind == "txt":
+            with open(path, "w") as f:
+                f.write("\n\n".join(_paragraphs(rng, rng.randint(10, 40))))
+        else:
+            with open(path, "w") as f:
+                f.write("case_id,condition,symptoms,notes\n")
+                for row in range(rng.randint(20, 80)):
+                    f.write(f"{row},{rng.choice(WORDS)},{' '.join(rng.sample(WORDS, 4))},\"{_sentence(rng)}\"\n")
+        paths.append(path)
+    return paths
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def run_size(name: str, num_files: int, embedding_dim: int, queue) -> None:
+    """Benchmark the ingestion stages on one corpus size (runs in a child process)."""
+    from langchain_chroma import Chroma
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from blackwell.document_processer import load_documents, process_documents, add_documents_in_batches
+    from blackwell.dedupe import deduplicate_chunks
+
+    workdir = tempfile.mkdtemp(prefix=f"blackwell_bench_{name}_")
+    try:
+        paths = generate_corpus(os.path.join(workdir, "data"), num_files)
+        result = {"size": name, "files": num_files, "stages": {}}
+
+        def stage(stage_name, func, unit, count_of):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                output = func()
+            elapsed = time.perf_counter() - start
+            count = count_of(output)
+            result["stages"][stage_name] = {
+                unit: count,
+                "seconds": round(elapsed, 4),
+                f"{unit}_per_sec": round(count / elapsed, 1) if elapsed > 0 else None,
+                "peak_rss_mb": _peak_rss_mb(),
+            }
+            return output
+
+        documents = stage("load_documents", lambda: load_documents(paths), "docs", len)
+        chunks = stage("process_documents", lambda: process_documents(documents), "chunks", len)
+        unique, _ = stage("deduplicate_chunks", lambda: deduplicate_chunks(chunks), "chunks",
+                          lambda out: len(chunks))
+
+        vector_store = Chroma(
+            collection_name=f"benchmark_{name}",
+            embedding_function=DeterministicFakeEmbedding(size=embedding_dim),
+            persist_directory=os.path.join(workdir, "db"),
+        )
+        stage("vector_store_add", lambda: add_documents_in_batches(vector_store, unique, pause=0),
+              "vectors", lambda out: out)
+        queue.put(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _wait_for_result(process, queue, timeout: float):
+    """Result of a size run, None if its process exited without one or ran past the timeout."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return queue.get(timeout=1)
+        except Empty:
+            if not process.is_alive():
+                # A result put just before exiting may still be in flight
+                try:
+                    return queue.get(timeout=1)
+                except Empty:
+                    return None
+    process.terminate()
+    return None
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print the throughput change of every stage against a baseline run."""
+    base_sizes = {r["size"]: r for r in baseline["results"]}
+    print(f"\nComparison against {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+    for result in current["results"]:
+        base = base_sizes.get(result["size"])
+        if base is None:
+            continue
+        for stage_name, stats in result["stages"].items():
+            rate_key = next(k for k in stats if k.endswith("_per_sec"))
+            old = base["stages"].get(stage_name, {}).get(rate_key)
+            new = stats[rate_key]
+            if old and new:
+                print(f"  {result['size']:<8}{stage_name:<20}{rate_key:<18}{old:>10} -> {new:>10} "
+                      f"({100 * (new - old) / old:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark document ingestion with a fake embedding model.")
+    parser.add_argument("--sizes", nargs="+", default=list(CORPUS_SIZES), choices=list(CORPUS_SIZES))
+    parser.add_argument("--embedding-dim", type=int, default=768, help="Dimension of the fake embeddings")
+    parser.add_argument("--timeout", type=float, default=3600, help="Seconds allowed for each size")
+    parser.add_argument("--output", default=None, help="JSON file to save the results")
+    parser.add_argument("--compare", default=None, help="Baseline JSON file to compare against")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for size in args.sizes:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_size, args=(size, CORPUS_SIZES[size], args.embedding_dim, queue))
+        process.start()
+        result = _wait_for_result(process, queue, args.timeout)
+        process.join()
+        if result is None:
+            print(f"\n[{size}: failed, process exit code {process.exitcode}]")
+            continue
+        results.append(result)
+
+        print(f"\n[{size}: {result['files']} files]")
+        for stage_name, stats in result["stages"].items():
+            rate_key = next(k for k in stats if k.endswith("_per_sec"))
+            print(f"  {stage_name:<20}{stats[rate_key]:>12} {rate_key:<16}{stats['seconds']:>9}s"
+                  f"{stats['peak_rss_mb']:>10} MB peak RSS")
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "embedding_dim": args.embedding_dim,
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
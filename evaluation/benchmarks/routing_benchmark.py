@@ -0,0 +1,211 @@
+"""
+Final Report Routing Benchmark
+
+Measures the accuracy/latency trade-off of routing the final report between fast_model and
+pro_model on the 250-case evaluation dataset (evaluation/evaluator_output.csv). Each case
+runs the evaluator once; the final report is then also written by the model the router did
+not pick, from the same inputs, so every case has a paired fast_model/pro_model report.
+Their primary diagnoses are scored against the true condition with the embedding
+similarity thresholds of the evaluation notebook.
+
+From the paired results, the summary replays the "confidence" policy at several thresholds
+(the always-pro and always-fast policies are the two ends) without calling the models again.
+Results are appended per case, so an interrupted run resumes where it stopped.
+
+Usage (from the project root, calls the Gemini API):
+    python evaluation/benchmarks/routing_benchmark.py --limit 50
+    python evaluation/benchmarks/routing_benchmark.py --summary-only
+"""
+
+import re
+import csv
+import sys
+import json
+import time
+import uuid
+import argparse
+
+import numpy as np
+from langchain_core.messages import HumanMessage
+
+DATASET_PATH = "evaluation/evaluator_output.csv"
+OUTPUT_PATH = "evaluation/scores/routing_benchmark.jsonl"
+THRESHOLDS = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+DIAGNOSIS_CORRECT_THRESHOLD = 0.85  # Same similarity thresholds as the evaluation notebook
+DIAGNOSIS_PARTIAL_THRESHOLD = 0.8
+_DIAGNOSIS_PATTERNS = [
+    r'\*\*Probable Cause:\s*([^\*\n]+)',
+    r'Probable Cause:\s*\*\*([^\*\n]+)\*\*',
+    r'Probable Cause:\s*([^\n\*]+)',
+    r'Probable Diagnosis:\s*([^\n\*]+)',
+    r'Primary Diagnosis:\s*\*\*([^\*]+)\*\*',
+    r'Primary Diagnosis:\s*([^\n\*]+)',
+    r'\*\*Diagnosis:\s*([^\*\n]+)',
+    r'Most Likely Diagnosis:\s*\*\*([^\*]+)\*\*',
+]
+
+
+def load_cases(path: str = DATASET_PATH) -> list:
+    """The dataset cases with an anamnesis report (emergency-aborted interviews are skipped)."""
+    csv.field_size_limit(sys.maxsize)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    cases = []
+    for index, row in enumerate(rows):
+        report = json.loads(row["anamnesis_report"])
+        if "EMERGENCY DETECTED" in report:
+            continue
+        cases.append({"case_index": index, "anamnesis_report": report, "true_condition": row["true_condition"]})
+    return cases
+
+
+def extract_diagnosis(report: str):
+    """Primary diagnosis stated in a final report, if any."""
+    for pattern in _DIAGNOSIS_PATTERNS:
+        match = re.search(pattern, report, re.IGNORECASE)
+        if match:
+            return re.sub(r'\s+', ' ', re.sub(r'\*+', '', match.group(1))).strip()
+    return None
+
+
+def score_report(report: str, true_condition: str, embeddings_model) -> dict:
+    """Primary diagnosis of a report and its similarity category against the true condition."""
+    diagnosis = extract_diagnosis(report)
+    if not diagnosis:
+        return {"diagnosis": None, "similarity": 0.0, "category": "MISSING"}
+    diagnosis_vector, condition_vector = np.array(embeddings_model.embed_documents([diagnosis, true_condition]))
+    similarity = float(diagnosis_vector @ condition_vector /
+                       (np.linalg.norm(diagnosis_vector) * np.linalg.norm(condition_vector)))
+    if similarity >= DIAGNOSIS_CORRECT_THRESHOLD:
+        category = "CORRECT"
+    elif similarity >= DIAGNOSIS_PARTIAL_THRESHOLD:
+        category = "PARTIAL"
+    else:
+        category = "INCORRECT"
+    return {"diagnosis": diagnosis, "similarity": round(similarity, 4), "category": category}
+
+
+def run_case(case: dict) -> dict:
+    """Evaluate a case and write its final report with both models."""
+    from blackwell.config import embeddings_model, fast_model, pro_model
+    from blackwell.evaluator import EvaluatorAgent, _final_messages
+    from blackwell.model_routing import FAST_MODEL, PRO_MODEL
+    from blackwell.telemetry import breakdown
+
+    state = {
+        "references": None,  # None resets the accumulated fields of the thread
+        "anamnesis_report": HumanMessage(content=case["anamnesis_report"]),
+        "next_node": None,
+        "query": None,
+        "reports": None,
+        "final_report": None,
+        "metrics": None,
+    }
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}, "recursion_limit": 50}
+    start = time.perf_counter()
+    result = EvaluatorAgent.invoke(state, config)
+    pipeline_seconds = time.perf_counter() - start
+
+    routing = result["routing"]
+    treatment = [span for span in result["metrics"] if span["name"] == "treatment" and span["status"] == "ok"][-1]
+    final_call = [child for child in treatment["children"] if child["kind"] == "llm"][-1]
+    reports = {routing["model"]: {"report": result["final_report"], "seconds": final_call["duration"]}}
+
+    # The same final report inputs, sent to the model the router did not pick
+    other = PRO_MODEL if routing["model"] == FAST_MODEL else FAST_MODEL
+    messages = _final_messages(result, result["reports"]["treatment_report"], result["reports"]["research_report"])
+    start = time.perf_counter()
+    response = (pro_model if other == PRO_MODEL else fast_model).invoke(messages)
+    reports[other] = {"report": response.content if isinstance(response.content, str) else str(response.content),
+                      "seconds": round(time.perf_counter() - start, 3)}
+
+    return {
+        "case_index": case["case_index"],
+        "true_condition": case["true_condition"],
+        "routing": routing,
+        "pipeline_seconds": round(pipeline_seconds, 3),
+        "nodes": breakdown(result["metrics"]),
+        "models": {
+            model: {"seconds": entry["seconds"], **score_report(entry["report"], case["true_condition"], embeddings_model)}
+            for model, entry in reports.items()
+        },
+    }
+
+
+def summarize(results: list) -> list:
+    """Accuracy and latency of the always-pro, always-fast and confidence policies."""
+    policies = [("pro", None)] + [("confidence", threshold) for threshold in THRESHOLDS] + [("fast", None)]
+    rows = []
+    for policy, threshold in policies:
+        correct = partial = fast_cases = 0
+        final_seconds, pipeline_seconds, similarities = [], [], []
+        for result in results:
+            score = result["routing"].get("score")
+            if policy == "fast" or (policy == "confidence" and score is not None and score >= threshold):
+                model = "fast_model"
+            else:
+                model = "pro_model"
+            fast_cases += model == "fast_model"
+            entry = result["models"][model]
+            correct += entry["category"] == "CORRECT"
+            partial += entry["category"] == "PARTIAL"
+            similarities.append(entry["similarity"])
+            final_seconds.append(entry["seconds"])
+            # Pipeline time with the routed model's final report instead of the one that ran
+            ran = result["models"][result["routing"]["model"]]["seconds"]
+            pipeline_seconds.append(result["pipeline_seconds"] - ran + entry["seconds"])
+        count = len(results)
+        rows.append({
+            "policy": policy if threshold is None else f"confidence>={threshold}",
+            "cases": count,
+            "fast_share": round(fast_cases / count, 3),
+            "correct": round(correct / count, 3),
+            "correct_or_partial": round((correct + partial) / count, 3),
+            "mean_similarity": round(float(np.mean(similarities)), 4),
+            "mean_final_seconds": round(float(np.mean(final_seconds)), 2),
+            "mean_pipeline_seconds": round(float(np.mean(pipeline_seconds)), 2),
+        })
+    return rows
+
+
+def _load_results(path: str) -> list:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the final report model routing on the evaluation dataset.")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="JSON lines file of the per-case results")
+    parser.add_argument("--limit", type=int, default=None, help="Number of cases to evaluate (default: all)")
+    parser.add_argument("--summary-only", action="store_true", help="Summarize the existing results without running cases")
+    args = parser.parse_args()
+
+    results = _load_results(args.output)
+    if not args.summary_only:
+        done = {result["case_index"] for result in results}
+        cases = [case for case in load_cases() if case["case_index"] not in done][:args.limit]
+        for number, case in enumerate(cases, 1):
+            print(f"Case {case['case_index']} ({number}/{len(cases)}): {case['true_condition']}")
+            try:
+                result = run_case(case)
+            except Exception as e:
+                print(f"  failed: {e}")
+                continue
+            results.append(result)
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+            print(f"  routed to {result['routing']['model']} (score {result['routing'].get('score')}), "
+                  + ", ".join(f"{model}: {entry['category']} in {entry['seconds']}s"
+                              for model, entry in result["models"].items()))
+
+    if not results:
+        print("No results to summarize")
+        sys.exit(0)
+    print(f"\n{'policy':<18}{'fast share':>11}{'correct':>9}{'corr+part':>11}{'similarity':>12}"
+          f"{'final (s)':>11}{'pipeline (s)':>14}")
+    for row in summarize(results):
+        print(f"{row['policy']:<18}{row['fast_share']:>11.0%}{row['correct']:>9.0%}{row['correct_or_partial']:>11.0%}"
+              f"{row['mean_similarity']:>12}{row['mean_final_seconds']:>11}{row['mean_pipeline_seconds']:>14}")
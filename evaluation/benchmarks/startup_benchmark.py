@@ -0,0 +1,150 @@
+"""
+Startup Benchmark
+
+Measures import time of the package entry points and time to first request of the web
+app, with and without warmup. The models, vector stores, agents and graphs are built on
+first use (see blackwell.registry), so imports should stay cheap and the build cost should
+move either to the first request or to warmup().
+
+Each measurement runs in a fresh process (nothing is already imported or built) and is
+repeated, and the median is reported. The first requests are /api/chat/history, which
+builds the anamnesis graph, and the setup of a first evaluation (evaluator graph, agents,
+vector stores and models). Neither calls the Gemini API.
+
+Usage (from the project root):
+    python evaluation/benchmarks/startup_benchmark.py --output bench/startup.json
+    python evaluation/benchmarks/startup_benchmark.py --compare bench/startup.json
+"""
+
+import os
+import sys
+import json
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+# The Gemini clients are created by warmup but never called by the benchmark
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+
+IMPORTS = ["blackwell.config", "blackwell.evaluator", "web_app"]
+
+# Runs in the child process, prints a JSON line of timings
+_IMPORT_SCRIPT = """
+import json, time, resource
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+from blackwell.registry import registry
+print(json.dumps({{"seconds": seconds, "built": registry.stats()["built"],
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+_REQUEST_SCRIPT = """
+import json, time, uuid, resource
+start = time.perf_counter()
+import web_app
+from fastapi.testclient import TestClient
+timings = {{"import": time.perf_counter() - start}}
+if {warm}:
+    start = time.perf_counter()
+    web_app.warmup()
+    timings["warmup"] = time.perf_counter() - start
+client = TestClient(web_app.app)  # Outside a with block: no lifespan, so no background warmup
+start = time.perf_counter()
+response = client.post("/api/chat/history", json={{"thread_id": str(uuid.uuid4())}})
+timings["first_chat_request"] = time.perf_counter() - start
+start = time.perf_counter()
+web_app.EvaluatorAgent.get_state({{"configurable": {{"thread_id": str(uuid.uuid4())}}}})
+for name in ("rag_agent_diagnosis", "rag_agent_treatment", "pubmed_agent"):  # Used by the first graph steps
+    web_app.registry.get(name)
+timings["first_evaluation_setup"] = time.perf_counter() - start
+timings["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+timings["status"] = response.status_code
+print(json.dumps(timings))
+"""
+
+
+def _run(script: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _median(runs: list) -> dict:
+    return {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]}
+
+
+def measure_imports(repeat: int) -> dict:
+    """Median import time, built components and peak RSS of each entry point."""
+    return {module: _median([_run(_IMPORT_SCRIPT.format(module=module)) for _ in range(repeat)])
+            for module in IMPORTS}
+
+
+def measure_first_request(repeat: int, warm: bool) -> dict:
+    """Median time to the first requests, right after import (cold) or after warmup() (warm)."""
+    runs = [_run(_REQUEST_SCRIPT.format(warm=warm)) for _ in range(repeat)]
+    if any(run["status"] != 200 for run in runs):
+        raise RuntimeError(f"/api/chat/history failed: {[run['status'] for run in runs]}")
+    timings = _median(runs)
+    timings["time_to_first_request"] = round(
+        timings["import"] + timings.get("warmup", 0.0) + timings["first_chat_request"], 3
+    )
+    return timings
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict) -> None:
+    """Print the change of every timing against a baseline run."""
+    print(f"\nComparison against {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+    for section in ("imports", "first_request"):
+        for name, timings in current[section].items():
+            base = baseline.get(section, {}).get(name, {})
+            for key, new in timings.items():
+                old = base.get(key)
+                if key in ("built", "status") or not old:
+                    continue
+                print(f"  {section:<15}{name:<22}{key:<24}{old:>9} -> {new:>9} ({100 * (new - old) / old:+.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark import time and time to first request.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per measurement (median reported)")
+    parser.add_argument("--output", default=None, help="JSON file to save the results")
+    parser.add_argument("--compare", default=None, help="Baseline JSON file to compare against")
+    args = parser.parse_args()
+
+    imports = measure_imports(args.repeat)
+    print(f"{'import':<22}{'seconds':>9}{'built':>7}{'peak RSS (MB)':>15}")
+    for module, timings in imports.items():
+        print(f"{module:<22}{timings['seconds']:>9}{timings['built']:>7}{timings['peak_rss_mb']:>15}")
+
+    first_request = {"cold": measure_first_request(args.repeat, warm=False),
+                     "warm": measure_first_request(args.repeat, warm=True)}
+    print(f"\n{'web app':<8}{'import':>8}{'warmup':>8}{'1st chat':>10}{'1st eval setup':>16}{'to 1st request':>16}")
+    for mode, timings in first_request.items():
+        print(f"{mode:<8}{timings['import']:>8}{timings.get('warmup', 0.0):>8}{timings['first_chat_request']:>10}"
+              f"{timings['first_evaluation_setup']:>16}{timings['time_to_first_request']:>16}")
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "imports": imports,
+        "first_request": first_request,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults saved to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
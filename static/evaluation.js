@@ -581,6 +581,45 @@ function showPlaceholder(container, text) {
     container.innerHTML = `<p class="placeholder">${text}</p>`;
 }
 
+const NODE_LABELS = {
+    analyze: "Analyzing the case",
+    rag_research: "Searching the knowledge base",
+    pubmed: "Searching PubMed",
+    hypothesis: "Generating diagnostic hypotheses",
+    treatment: "Writing the treatment plan and final report",
+};
+
+function renderProgress(container, steps, draft) {
+    const items = steps.map(step => {
+        const details = Object.entries(step.reportSizes || {})
+            .map(([name, size]) => `${name.replace(/_/g, " ")}: ${size.toLocaleString()} chars`);
+        if (step.seconds != null) {
+            details.unshift(`${step.seconds.toFixed(1)}s`);
+        }
+        const sizes = details.join(", ");
+        const status = step.done ? "done" : "running";
+        return `<li class="progress-step ${status}">${NODE_LABELS[step.node] || step.node}${step.done ? " ✓" : "…"}${sizes ? ` <span class="progress-detail">(${sizes})</span>` : ""}</li>`;
+    });
+    const draftHtml = draft
+        ? `<div class="report-content evaluation-report">${window.marked ? window.marked.parse(draft) : draft}</div>`
+        : "";
+    container.innerHTML = `<ul class="evaluation-progress">${items.join("")}</ul>${draftHtml}`;
+}
+
+function parseSseFrame(frame) {
+    // A frame is "event: <type>" and "data: <json>" lines
+    let event = "message";
+    const data = [];
+    frame.split("\n").forEach(line => {
+        if (line.startsWith("event:")) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith("data:")) {
+            data.push(line.slice(5).trim());
+        }
+    });
+    return { event, data: data.length ? JSON.parse(data.join("\n")) : {} };
+}
+
 async function requestEvaluation() {
     const report = window.sessionStorage.getItem(REPORT_KEY);
     const sessionThread = window.sessionStorage.getItem(THREAD_KEY);
@@ -598,8 +637,8 @@ async function requestEvaluation() {
     showPlaceholder(evaluationOutput, "Generating evaluation...");
 
     try {
-        console.log("Sending evaluation request...");
-        const response = await fetch("/api/evaluate", {
+        console.log("Sending streamed evaluation request...");
+        const response = await fetch("/api/evaluate/stream", {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({ report, thread_id: sessionThread }),
@@ -613,9 +652,66 @@ async function requestEvaluation() {
             throw new Error(`Evaluation failed: ${response.status} - ${errorText}`);
         }
 
-        const data = await response.json();
-        renderMarkdown(evaluationOutput, data.evaluation);
-        window.sessionStorage.setItem(EVALUATION_KEY, data.evaluation);
+        // Progress of each node run (nodes can run several times and in parallel)
+        const steps = [];
+        let draft = "";
+        let evaluation = null;
+        let renderPending = false;
+        const scheduleRender = () => {
+            if (renderPending) {
+                return;
+            }
+            renderPending = true;
+            window.requestAnimationFrame(() => {
+                renderPending = false;
+                if (evaluation === null) {
+                    renderProgress(evaluationOutput, steps, draft);
+                }
+            });
+        };
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+            const frames = buffer.split("\n\n");
+            buffer = frames.pop();
+
+            for (const frame of frames) {
+                if (!frame.trim()) {
+                    continue;
+                }
+                const { event, data } = parseSseFrame(frame);
+                if (event === "node_start") {
+                    steps.push({ node: data.node, done: false });
+                } else if (event === "node_end") {
+                    const step = steps.find(s => s.node === data.node && !s.done);
+                    if (step) {
+                        step.done = true;
+                        step.reportSizes = data.report_sizes;
+                        step.seconds = data.seconds;
+                    }
+                } else if (event === "token") {
+                    draft += data.text;
+                } else if (event === "final") {
+                    evaluation = data.evaluation;
+                } else if (event === "error") {
+                    throw new Error(data.detail || "Evaluation failed.");
+                }
+                scheduleRender();
+            }
+        }
+
+        if (evaluation === null) {
+            throw new Error("The evaluation stream ended without a report.");
+        }
+        renderMarkdown(evaluationOutput, evaluation);
+        window.sessionStorage.setItem(EVALUATION_KEY, evaluation);
     } catch (error) {
         console.error("Evaluation error:", error);
         showPlaceholder(evaluationOutput, error.message || "Unexpected error while generating the evaluation.");
@@ -1,14 +1,17 @@
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
 from unittest import result
 from uuid import uuid4
+from contextlib import asynccontextmanager
 import os
+import json
 import shutil
+import threading
 from pathlib import Path
 
 # FastAPI imports
 from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form
 from fastapi.concurrency import run_in_threadpool
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
@@ -18,10 +21,31 @@ from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, System
 
 # Local imports
 from blackwell.anamnesis import AnamnesisAgent
-from blackwell.evaluator import EvaluatorAgent
-from blackwell.config import logger
-
-app = FastAPI(title="Blackwell Clinical Assistant")
+from blackwell.evaluator import EvaluatorAgent, EVALUATOR_NODES, FINAL_REPORT_TAG
+from blackwell.config import logger, llm_cache, TELEMETRY_EXPORT_PATH, WARMUP_ON_STARTUP
+from blackwell.registry import registry
+from blackwell.prompt_cache import PromptCacheMeter
+from blackwell.telemetry import breakdown, export_spans, log_breakdown
+
+def warmup() -> Dict[str, Optional[float]]:
+    """Build the models, vector stores, agents and graphs ahead of the first request."""
+    timings = registry.warmup()
+    built = {name: seconds for name, seconds in timings.items() if seconds is not None}
+    logger.info(f"Warmup: {len(built)}/{len(timings)} components ready in {sum(built.values()):.2f}s "
+                + ", ".join(f"{name} {seconds}s" for name, seconds in built.items()))
+    return timings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        # In the background: the server accepts requests right away, and a request needing a
+        # component still being built waits for that build instead of starting another
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Blackwell Clinical Assistant", lifespan=lifespan)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
@@ -203,29 +227,112 @@ async def get_chat_history(request: ChatHistoryRequest) -> ChatResponse:
     return ChatResponse(thread_id=request.thread_id, messages=messages, finished=finished)
 
 
+def _evaluation_state(request: EvaluationRequest) -> dict:
+    return {
+        "references": None,  # None resets the accumulated fields of the thread
+        "anamnesis_report": HumanMessage(content=request.report),
+        "next_node": None,
+        "query": None,
+        "reports": None,
+        "final_report": None,
+        "metrics": None,
+    }
+
+
+def _report_telemetry(thread_id: str, spans: List[dict]) -> None:
+    log_breakdown(spans)
+    if TELEMETRY_EXPORT_PATH:
+        export_spans(spans, TELEMETRY_EXPORT_PATH, thread_id=thread_id)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _chunk_text(content) -> str:
+    # Gemini may stream content as a list of parts
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content or ""
+
+
+async def _evaluation_events(request: EvaluationRequest) -> AsyncIterator[str]:
+    meter = PromptCacheMeter()
+    config = {"configurable": {"thread_id": request.thread_id}, "callbacks": [meter]}
+    try:
+        async for event in EvaluatorAgent.astream_events(_evaluation_state(request), config, version="v2"):
+            kind, name = event["event"], event["name"]
+            # Node runs are direct children of the graph run (rag_research's inner lambda shares its name)
+            is_node = name in EVALUATOR_NODES and len(event.get("parent_ids", [])) == 1
+            if kind == "on_chain_start" and is_node:
+                yield _sse("node_start", {"node": name})
+            elif kind == "on_chain_end" and is_node:
+                update = event["data"].get("output") or {}
+                spans = update.get("metrics") or []
+                yield _sse("node_end", {
+                    "node": name,
+                    "seconds": spans[-1]["duration"] if spans else None,
+                    "report_sizes": {report: len(_chunk_text(message.content))
+                                     for report, message in (update.get("reports") or {}).items()},
+                    "references": len(update.get("references") or []),
+                })
+            elif kind == "on_chat_model_stream" and FINAL_REPORT_TAG in event.get("tags", []):
+                text = _chunk_text(event["data"]["chunk"].content)
+                if text:
+                    yield _sse("token", {"text": text})
+
+        meter.log_summary()
+        if llm_cache is not None:
+            llm_cache.log_stats()
+        snapshot = await EvaluatorAgent.aget_state(config)
+        spans = snapshot.values.get("metrics", [])
+        _report_telemetry(request.thread_id, spans)
+        final_report = snapshot.values.get("final_report")
+        if not final_report:
+            yield _sse("error", {"detail": "Evaluator returned no report"})
+            return
+        yield _sse("final", {"evaluation": str(final_report), "metrics": breakdown(spans)})
+    except Exception as exc:  # pragma: no cover - defensive path
+        logger.error(f"Error during streamed evaluation: {exc}")
+        yield _sse("error", {"detail": str(exc)})
+
+
+@app.post("/api/evaluate/stream")
+async def evaluate_stream(request: EvaluationRequest) -> StreamingResponse:
+    """
+    Stream an evaluation as server-sent events: node_start / node_end (with the sizes of
+    the reports the node wrote), token (final report text as it is generated), then final
+    (the complete report with references) or error.
+    """
+    print(f"\n=== Streamed Evaluation Request (thread {request.thread_id}) ===")
+    return StreamingResponse(
+        _evaluation_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/evaluate", response_model=EvaluationResponse)
 async def evaluate(request: EvaluationRequest) -> EvaluationResponse:
     print(f"\n=== Evaluation Request ===")
     print(f"Thread ID: {request.thread_id}")
     print(f"Report length: {len(request.report)}")
     
-    initial_state = {
-        "references": [],
-        "anamnesis_report": HumanMessage(content=request.report),
-        "next_node": None,
-        "query": None,
-        "reports": {},
-        "final_report": None,
-    }
+    initial_state = _evaluation_state(request)
     try:
         
         print("Invoking Evaluator Agent...")
-        result = await run_in_threadpool(
-            EvaluatorAgent.invoke,
+        # Async graph run: waiting on the models does not hold a worker thread
+        meter = PromptCacheMeter()
+        result = await EvaluatorAgent.ainvoke(
             initial_state,
-            {"configurable": {"thread_id": request.thread_id}},
+            {"configurable": {"thread_id": request.thread_id}, "callbacks": [meter]},
         )
         print(f"Evaluator Agent completed.")
+        meter.log_summary()
+        _report_telemetry(request.thread_id, result.get("metrics", []))
+        if llm_cache is not None:
+            llm_cache.log_stats()
     except Exception as exc:  # pragma: no cover - defensive path
         logger.error(f"Error during evaluation: {exc}")
         raise HTTPException(status_code=500, detail=str(exc)) from exc